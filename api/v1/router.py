@@ -1,10 +1,13 @@
 from django.urls import path
 from rest_framework import routers
 from modules.manager.views.user import UserViewSet
+from modules.events.views import EventViewSet, CategoryViewSet
 
 
 router = routers.DefaultRouter()
 
 router.register( r'users', UserViewSet, basename='users' )
+router.register( r'events', EventViewSet, basename='events' )
+router.register( r'categories', CategoryViewSet, basename='categories' )
 
 urlpatterns = router.urls
@@ -0,0 +1,72 @@
+import hashlib
+import hmac
+import secrets
+
+from django.conf import settings
+
+from modules.authentication.models import APIKey
+from modules.common.lru import LRUCache
+
+
+API_KEY_PREFIX_BYTES = 6
+API_KEY_CACHE_TTL = getattr(settings, "API_KEY_CACHE_TTL", 60)
+
+# Claves resueltas por prefijo (con su usuario). Revocar una clave tarda como
+# mucho API_KEY_CACHE_TTL segundos en aplicarse en otros procesos.
+_resolved = LRUCache(
+    maxsize=getattr(settings, "API_KEY_CACHE_SIZE", 1024), ttl=API_KEY_CACHE_TTL)
+
+
+def hash_secret(secret):
+    pepper = getattr(settings, "API_KEY_PEPPER", settings.SECRET_KEY)
+    return hmac.new(pepper.encode("utf-8"), secret.encode("utf-8"),
+                    hashlib.sha256).hexdigest()
+
+
+def create_api_key(user, name, scopes=None, expires_at=None):
+    """
+    Crea una clave y devuelve ``(api_key, clave_en_claro)``. La clave en
+    claro no se guarda: solo puede mostrarse ahora.
+    """
+    prefix = secrets.token_hex(API_KEY_PREFIX_BYTES)
+    secret = secrets.token_urlsafe(32)
+    api_key = APIKey.objects.create(
+        user=user,
+        name=name,
+        prefix=prefix,
+        hashed_secret=hash_secret(secret),
+        scopes=list(scopes or []),
+        expires_at=expires_at,
+    )
+    return api_key, f"{prefix}.{secret}"
+
+
+def resolve_api_key(raw_key):
+    """
+    Devuelve la APIKey válida que corresponde a ``raw_key`` o ``None``.
+    El secreto se compara en tiempo constante.
+    """
+    prefix, sep, secret = raw_key.partition(".")
+    if not sep or not prefix or not secret:
+        return None
+
+    api_key = _resolved.get(prefix)
+    if api_key is None:
+        api_key = (
+            APIKey.objects.select_related("user").filter(prefix=prefix).first()
+        )
+        if api_key is None:
+            return None
+        _resolved.set(prefix, api_key)
+
+    if not hmac.compare_digest(api_key.hashed_secret, hash_secret(secret)):
+        return None
+    if not api_key.is_valid() or not api_key.user.is_active:
+        return None
+    return api_key
+
+
+def revoke_api_key(api_key):
+    api_key.is_active = False
+    api_key.save(update_fields=["is_active"])
+    _resolved.delete(api_key.prefix)
@@ -1,6 +1,20 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class AuthenticationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'modules.authentication'
+
+    def ready(self):
+        # Barrido periódico opcional de tokens caducados dentro del proceso.
+        interval = getattr(settings, 'TOKEN_SWEEPER_INTERVAL', None)
+        if interval:
+            from modules.authentication.sweeper import start_sweeper
+            start_sweeper(interval)
+
+        # Workers del outbox de correo dentro del proceso (0 = usar run_mailer).
+        workers = getattr(settings, 'EMAIL_OUTBOX_WORKERS', 0)
+        if workers:
+            from modules.authentication.mailer import start_mailer
+            start_mailer(workers)
@@ -0,0 +1,133 @@
+import json
+import math
+
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+
+from .hashing import hashing_pool, HashingPoolFull
+from .models import PasswordResetToken
+from .principals import invalidate_user
+from .serializers import LoginSerializer, RegisterSerializer, ResetPasswordSerializer
+from .sessions import start_session, device_label, client_device_id
+from .throttling import LoginIPThrottle, LoginEmailThrottle
+
+
+# Versiones asíncronas (ASGI) de las vistas de autenticación que calculan
+# hashes de contraseñas. El hashing corre en ``hashing_pool`` y, si su cola
+# está llena, se responde 503 en lugar de bloquear hilos del servidor.
+
+
+def _busy_response():
+    response = JsonResponse(
+        {"error": "Servidor ocupado, inténtalo de nuevo."},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+    )
+    response["Retry-After"] = "1"
+    return response
+
+
+def _throttled_response(wait):
+    response = JsonResponse(
+        {"error": "Demasiados intentos, inténtalo más tarde."},
+        status=status.HTTP_429_TOO_MANY_REQUESTS,
+    )
+    response["Retry-After"] = str(math.ceil(wait))
+    return response
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncHashingView(View):
+    """
+    Base de las vistas: las subclases definen ``handle(data)``, que recibe
+    el cuerpo JSON y se ejecuta entero en ``hashing_pool`` (serializer,
+    hashing y escrituras), y devuelve la respuesta.
+    """
+
+    http_method_names = ["post", "options"]
+    throttle_classes = []
+
+    def parse(self, request):
+        try:
+            return json.loads(request.body or b"{}")
+        except ValueError:
+            return None
+
+    async def post(self, request, *args, **kwargs):
+        data = self.parse(request)
+        if not isinstance(data, dict):
+            return JsonResponse(
+                {"error": "JSON inválido"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Igual que en las vistas DRF, se limita antes de tocar BD o hashing.
+        request.data = data
+        waits = [
+            throttle.wait()
+            for throttle in (cls() for cls in self.throttle_classes)
+            if not throttle.allow_request(request, self)
+        ]
+        if waits:
+            return _throttled_response(max(waits))
+
+        try:
+            return await hashing_pool.run(self.handle, data)
+        except HashingPoolFull:
+            return _busy_response()
+
+
+class AsyncLoginView(AsyncHashingView):
+    throttle_classes = [LoginIPThrottle, LoginEmailThrottle]
+
+    def handle(self, data):
+        serializer = LoginSerializer(data=data)
+        if serializer.is_valid():
+            access_token, refresh_token = start_session(
+                serializer.validated_data, device_label(self.request, data),
+                client_device_id(data))
+            return JsonResponse(
+                {"access_token": access_token, "refresh_token": refresh_token},
+                status=status.HTTP_200_OK,
+            )
+        return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class AsyncRegisterView(AsyncHashingView):
+    def handle(self, data):
+        serializer = RegisterSerializer(data=data)
+        if serializer.is_valid():
+            serializer.save()
+            return JsonResponse(
+                {"detail": "Registro exitoso. Revisa tu correo."},
+                status=status.HTTP_201_CREATED,
+            )
+        return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class AsyncResetPasswordView(AsyncHashingView):
+    def handle(self, data):
+        # La ruta incluye el token, pero igual que ResetPasswordView se usa
+        # el del cuerpo.
+        serializer = ResetPasswordSerializer(data=data)
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        reset_obj = PasswordResetToken.objects.filter(
+            token=serializer.validated_data["token"]).select_related("user").first()
+        if not reset_obj or not reset_obj.is_valid():
+            return JsonResponse(
+                {"error": "Token inválido o expirado"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        user = reset_obj.user
+        user.set_password(serializer.validated_data["password"])
+        user.save()
+        invalidate_user(user)
+        reset_obj.delete()
+
+        return JsonResponse(
+            {"detail": "Contraseña actualizada correctamente."},
+            status=status.HTTP_200_OK,
+        )
@@ -1,12 +1,26 @@
+import copy
 import jwt
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import SAFE_METHODS
 from django.conf import settings
 from modules.authentication.models import BlacklistedToken, AuthToken
+from modules.authentication.utils import decode_access_token
+from modules.authentication.api_keys import resolve_api_key
+from modules.authentication.sessions import touch_session
+from modules.authentication.principals import (
+    TokenPrincipal,
+    get_cached_user,
+    get_session_generation,
+)
 from modules.manager.models import User
 
 
 class JWTAuthentication(BaseAuthentication):
+    # Con JWT_CLAIMS_ONLY_READS las peticiones de solo lectura se resuelven
+    # con los claims firmados del token, sin cargar el usuario.
+    claims_only_reads = getattr(settings, "JWT_CLAIMS_ONLY_READS", False)
+
     def authenticate(self, request):
         auth_header = request.headers.get("Authorization")
 
@@ -19,9 +33,18 @@ class JWTAuthentication(BaseAuthentication):
             raise AuthenticationFailed("Token inválido o revocado.")
 
         try:
-            payload = jwt.decode(
-                token, settings.SECRET_KEY, algorithms=["HS256"])
-            user = User.objects.get(id=payload["user_id"])
+            payload = decode_access_token(token)
+            if (self.claims_only_reads and request.method in SAFE_METHODS
+                    and "is_staff" in payload):
+                user = TokenPrincipal(payload)
+                generation = get_session_generation(payload["user_id"])
+            else:
+                user = get_cached_user(payload["user_id"])
+                generation = user.session_generation
+            # "Cerrar sesión en todos los dispositivos" incrementa la generación
+            if payload.get("gen", 0) != generation:
+                raise AuthenticationFailed("Sesión cerrada.")
+            touch_session(token)
             return (user, token)
         except jwt.ExpiredSignatureError:
             raise AuthenticationFailed("Token expirado.")
@@ -29,3 +52,26 @@ class JWTAuthentication(BaseAuthentication):
             raise AuthenticationFailed("Token inválido.")
         except User.DoesNotExist:
             raise AuthenticationFailed("Usuario no encontrado.")
+
+
+class APIKeyAuthentication(BaseAuthentication):
+    """
+    Autenticación con ``Authorization: Api-Key <prefix>.<secret>`` para
+    clientes servicio a servicio. ``request.auth`` es la APIKey.
+    """
+
+    keyword = "Api-Key"
+
+    def authenticate(self, request):
+        auth_header = request.headers.get("Authorization")
+
+        if not auth_header or not auth_header.startswith(self.keyword + " "):
+            return None
+
+        api_key = resolve_api_key(auth_header[len(self.keyword) + 1:].strip())
+        if api_key is None:
+            raise AuthenticationFailed("API key inválida o revocada.")
+        return (copy.copy(api_key.user), api_key)
+
+    def authenticate_header(self, request):
+        return self.keyword
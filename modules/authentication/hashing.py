@@ -0,0 +1,93 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+
+logger = logging.getLogger(__name__)
+
+HASHING_POOL_WORKERS = getattr(
+    settings, "HASHING_POOL_WORKERS", min(4, os.cpu_count() or 1))
+HASHING_POOL_QUEUE = getattr(settings, "HASHING_POOL_QUEUE", 32)
+
+
+class HashingPoolFull(Exception):
+    """No quedan huecos en la cola del pool de hashing."""
+
+
+class HashingPool:
+    """
+    Ejecutor acotado para el trabajo que calcula hashes de contraseñas
+    (PBKDF2), de modo que una ráfaga de logins no deje sin hilos al resto de
+    endpoints. Admite como mucho ``workers + max_queue`` tareas a la vez y
+    rechaza las siguientes con ``HashingPoolFull``. Las tareas son vistas
+    completas, así que las métricas de duración (``*_task_seconds``) miden
+    la petición entera y no solo el hashing.
+    """
+
+    def __init__(self, workers=HASHING_POOL_WORKERS, max_queue=HASHING_POOL_QUEUE):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="hashing")
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def _call(self, fn, args, kwargs):
+        with self._lock:
+            self._pending -= 1
+            self._running += 1
+        close_old_connections()
+        started = time.monotonic()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = time.monotonic() - started
+            close_old_connections()
+            with self._lock:
+                self._running -= 1
+                self.completed += 1
+                self.total_seconds += elapsed
+                self.max_seconds = max(self.max_seconds, elapsed)
+            self._slots.release()
+
+    def submit(self, fn, *args, **kwargs):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            logger.warning("Pool de hashing lleno: %s", self.stats())
+            raise HashingPoolFull()
+        with self._lock:
+            self._pending += 1
+        return self._executor.submit(self._call, fn, args, kwargs)
+
+    async def run(self, fn, *args, **kwargs):
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_depth": self._pending,
+                "running": self._running,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_task_seconds": (
+                    self.total_seconds / self.completed if self.completed else 0.0
+                ),
+                "max_task_seconds": self.max_seconds,
+            }
+
+
+hashing_pool = HashingPool()
@@ -0,0 +1,67 @@
+import time
+
+import jwt
+from django.conf import settings
+
+from modules.authentication.models import BlacklistedToken
+from modules.authentication.principals import get_cached_user
+from modules.authentication.utils import decode_access_token
+from modules.manager.models import User
+
+
+# Tope para cachear una respuesta: una revocación tarda como mucho esto en
+# verse desde los servicios que cachean la introspección.
+INTROSPECTION_MAX_AGE = getattr(settings, "INTROSPECTION_MAX_AGE", 60)
+INTROSPECTION_MAX_BATCH = getattr(settings, "INTROSPECTION_MAX_BATCH", 100)
+
+INACTIVE = {"active": False}
+
+
+def introspect(token):
+    """
+    Estado de un access token al estilo RFC 7662, con las mismas
+    comprobaciones que ``JWTAuthentication``. Devuelve ``(respuesta,
+    max_age)``: un token inactivo (caducado, revocado, de otra generación o
+    de un usuario inactivo) puede cachearse ``INTROSPECTION_MAX_AGE``; uno
+    activo, como mucho hasta que caduca.
+    """
+    if not isinstance(token, str) or not token:
+        return INACTIVE, INTROSPECTION_MAX_AGE
+    if BlacklistedToken.is_blacklisted(token):
+        return INACTIVE, INTROSPECTION_MAX_AGE
+    try:
+        payload = decode_access_token(token)
+        user = get_cached_user(payload["user_id"])
+    except (jwt.InvalidTokenError, KeyError, User.DoesNotExist):
+        return INACTIVE, INTROSPECTION_MAX_AGE
+
+    if not user.is_active or payload.get("gen", 0) != user.session_generation:
+        return INACTIVE, INTROSPECTION_MAX_AGE
+
+    remaining = int(payload["exp"] - time.time())
+    if remaining <= 0:
+        return INACTIVE, INTROSPECTION_MAX_AGE
+    return {
+        "active": True,
+        "token_type": "access_token",
+        "sub": str(user.id),
+        "username": user.email,
+        "is_staff": user.is_staff,
+        "exp": payload["exp"],
+        "iat": payload.get("iat"),
+        "jti": payload.get("jti"),
+    }, min(remaining, INTROSPECTION_MAX_AGE)
+
+
+def introspect_many(tokens):
+    """
+    Introspección en lote. Devuelve ``(respuestas, max_age)`` con las
+    respuestas en el mismo orden y el ``max_age`` más restrictivo.
+    """
+    results = []
+    max_age = INTROSPECTION_MAX_AGE
+    for token in tokens:
+        result, token_max_age = introspect(token)
+        results.append(result)
+        max_age = min(max_age, token_max_age)
+    return results, max_age
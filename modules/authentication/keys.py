@@ -0,0 +1,107 @@
+import threading
+from pathlib import Path
+
+import jwt
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+
+# Algoritmo heredado: firma con SECRET_KEY y sin "kid".
+LEGACY_ALGORITHM = "HS256"
+
+
+class SigningKey:
+    """
+    Clave del anillo ya parseada: los objetos de clave se construyen una
+    sola vez para que firmar y verificar no vuelvan a leer PEM.
+    """
+
+    def __init__(self, kid, algorithm, private_key=None, public_key=None):
+        self.kid = kid
+        self.algorithm = algorithm
+        self._algorithm = jwt.get_algorithm_by_name(algorithm)
+        self.signing_key = (
+            self._algorithm.prepare_key(private_key) if private_key else None
+        )
+        if public_key:
+            self.verifying_key = self._algorithm.prepare_key(public_key)
+        elif self.signing_key is not None:
+            self.verifying_key = self.signing_key.public_key()
+        else:
+            raise ImproperlyConfigured(
+                f"La clave JWT '{kid}' necesita private_key o public_key.")
+
+    def to_jwk(self):
+        jwk = self._algorithm.to_jwk(self.verifying_key, as_dict=True)
+        jwk.update({"kid": self.kid, "alg": self.algorithm, "use": "sig"})
+        return jwk
+
+
+def _read(entry, name):
+    if entry.get(name):
+        return entry[name]
+    path = entry.get(f"{name}_path")
+    return Path(path).read_bytes() if path else None
+
+
+class KeyRing:
+    """
+    Claves de firma configuradas en ``JWT_SIGNING_KEYS``. La primera es la
+    activa; el resto solo se usan para verificar tokens emitidos antes de
+    una rotación. Sin claves configuradas se firma con HS256/SECRET_KEY.
+    """
+
+    def __init__(self, entries):
+        self.keys = {}
+        for entry in entries:
+            key = SigningKey(
+                entry["kid"],
+                entry.get("algorithm", "EdDSA"),
+                private_key=_read(entry, "private_key"),
+                public_key=_read(entry, "public_key"),
+            )
+            self.keys[key.kid] = key
+        self.active = next(iter(self.keys.values()), None)
+        if self.active is not None and self.active.signing_key is None:
+            raise ImproperlyConfigured(
+                "La clave JWT activa (la primera) necesita private_key.")
+
+    def encode(self, payload):
+        if self.active is None:
+            return jwt.encode(payload, settings.SECRET_KEY,
+                              algorithm=LEGACY_ALGORITHM)
+        return jwt.encode(
+            payload,
+            self.active.signing_key,
+            algorithm=self.active.algorithm,
+            headers={"kid": self.active.kid},
+        )
+
+    def decode(self, token):
+        kid = jwt.get_unverified_header(token).get("kid")
+        if kid is None:
+            if self.active is not None and not getattr(
+                    settings, "JWT_ACCEPT_LEGACY_HS256", True):
+                raise jwt.InvalidTokenError("Token sin kid.")
+            return jwt.decode(token, settings.SECRET_KEY,
+                              algorithms=[LEGACY_ALGORITHM])
+        key = self.keys.get(kid)
+        if key is None:
+            raise jwt.InvalidTokenError("kid desconocido.")
+        return jwt.decode(token, key.verifying_key, algorithms=[key.algorithm])
+
+    def jwks(self):
+        return {"keys": [key.to_jwk() for key in self.keys.values()]}
+
+
+_key_ring = None
+_lock = threading.Lock()
+
+
+def get_key_ring():
+    global _key_ring
+    if _key_ring is None:
+        with _lock:
+            if _key_ring is None:
+                _key_ring = KeyRing(getattr(settings, "JWT_SIGNING_KEYS", []))
+    return _key_ring
@@ -0,0 +1,174 @@
+import logging
+import threading
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db.models import Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.html import strip_tags
+
+from modules.authentication.models import OutboxEmail
+
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE = getattr(settings, "EMAIL_OUTBOX_BATCH_SIZE", 50)
+OUTBOX_MAX_ATTEMPTS = getattr(settings, "EMAIL_OUTBOX_MAX_ATTEMPTS", 5)
+OUTBOX_RETRY_BASE = getattr(settings, "EMAIL_OUTBOX_RETRY_BASE", 30)
+OUTBOX_POLL_INTERVAL = getattr(settings, "EMAIL_OUTBOX_POLL_INTERVAL", 10)
+# Un envío reclamado que no termina en este tiempo se considera abandonado.
+OUTBOX_CLAIM_TIMEOUT = timedelta(minutes=5)
+
+_wakeup = threading.Event()
+
+
+def notify_outbox():
+    """Despierta a los workers en cuanto hay correo nuevo confirmado."""
+    _wakeup.set()
+
+
+def claim_batch(batch_size=OUTBOX_BATCH_SIZE):
+    """
+    Reclama hasta ``batch_size`` correos listos para enviar. El UPDATE
+    condicional garantiza que cada fila la procesa un solo worker.
+    """
+    now = timezone.now()
+    ready = OutboxEmail.objects.filter(
+        Q(status=OutboxEmail.PENDING, next_attempt_at__lte=now)
+        | Q(status=OutboxEmail.SENDING, claimed_at__lte=now - OUTBOX_CLAIM_TIMEOUT)
+    )
+    ids = list(ready.order_by("next_attempt_at").values_list(
+        "pk", flat=True)[:batch_size])
+    if not ids:
+        return []
+    claim = uuid.uuid4()
+    ready.filter(pk__in=ids).update(
+        status=OutboxEmail.SENDING, claimed_by=claim, claimed_at=now)
+    return list(OutboxEmail.objects.filter(claimed_by=claim))
+
+
+def build_message(email, connection):
+    html_message = render_to_string(email.template_name, email.context)
+    message = EmailMultiAlternatives(
+        subject=email.subject,
+        body=strip_tags(html_message),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[email.recipient],
+        connection=connection,
+    )
+    message.attach_alternative(html_message, "text/html")
+    return message
+
+
+def _mark_failed(email, error):
+    email.attempts += 1
+    email.last_error = str(error)
+    email.claimed_by = None
+    if email.attempts >= OUTBOX_MAX_ATTEMPTS:
+        email.status = OutboxEmail.FAILED
+    else:
+        email.status = OutboxEmail.PENDING
+        email.next_attempt_at = timezone.now() + timedelta(
+            seconds=OUTBOX_RETRY_BASE * 2 ** (email.attempts - 1))
+    email.save(update_fields=[
+        "attempts", "last_error", "claimed_by", "status", "next_attempt_at"])
+
+
+def _release(emails):
+    """Devuelve a PENDING correos reclamados sin contar un intento."""
+    OutboxEmail.objects.filter(
+        pk__in=[email.pk for email in emails], status=OutboxEmail.SENDING,
+    ).update(status=OutboxEmail.PENDING, claimed_by=None, claimed_at=None)
+
+
+def _open_connection(pending):
+    """
+    Abre una conexión SMTP. Si no se puede, libera ``pending`` para que otro
+    intento los recoja sin esperar a OUTBOX_CLAIM_TIMEOUT.
+    """
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception:
+        _release(pending)
+        raise
+    return connection
+
+
+def _close_connection(connection):
+    try:
+        connection.close()
+    except Exception:
+        logger.debug("Error cerrando la conexión SMTP.", exc_info=True)
+
+
+def drain_outbox(batch_size=OUTBOX_BATCH_SIZE):
+    """
+    Envía lotes del outbox hasta vaciarlo, reutilizando la conexión SMTP
+    mientras los envíos funcionen; tras un error se abre una nueva, por si
+    la anterior se ha caído. Devuelve ``(enviados, fallidos)``.
+    """
+    sent = failed = 0
+    connection = None
+    try:
+        while True:
+            batch = claim_batch(batch_size)
+            if not batch:
+                break
+            delivered = []
+            try:
+                for index, email in enumerate(batch):
+                    if connection is None:
+                        connection = _open_connection(batch[index:])
+                    try:
+                        build_message(email, connection).send()
+                    except Exception as exc:
+                        logger.warning("Error enviando correo %s: %s", email.pk, exc)
+                        _mark_failed(email, exc)
+                        failed += 1
+                        _close_connection(connection)
+                        connection = None
+                    else:
+                        delivered.append(email.pk)
+            finally:
+                OutboxEmail.objects.filter(pk__in=delivered).update(
+                    status=OutboxEmail.SENT, sent_at=timezone.now(),
+                    claimed_by=None)
+                sent += len(delivered)
+    finally:
+        if connection is not None:
+            _close_connection(connection)
+    return sent, failed
+
+
+def _worker(poll_interval):
+    from django.db import close_old_connections
+
+    while True:
+        _wakeup.wait(poll_interval)
+        _wakeup.clear()
+        close_old_connections()
+        try:
+            drain_outbox()
+        except Exception:
+            logger.exception("Error procesando el outbox de correo.")
+
+
+_workers = []
+
+
+def start_mailer(workers, poll_interval=OUTBOX_POLL_INTERVAL):
+    """
+    Arranca ``workers`` hilos demonio que vacían el outbox (una vez por proceso).
+    """
+    while len(_workers) < workers:
+        thread = threading.Thread(
+            target=_worker, args=(poll_interval,),
+            name=f"outbox-mailer-{len(_workers)}", daemon=True,
+        )
+        thread.start()
+        _workers.append(thread)
+    return _workers
@@ -0,0 +1,75 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from modules.authentication.models import AuthToken, BlacklistedToken
+from modules.authentication.utils import hash_token
+
+
+class Command(BaseCommand):
+    help = (
+        "Rellena los digests SHA-256 de AuthToken y BlacklistedToken a partir "
+        "de las columnas en claro, por lotes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--clear-plaintext",
+            action="store_true",
+            help="Vacía las columnas en claro de las filas migradas.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        clear = options["clear_plaintext"]
+
+        migrated = self._backfill(
+            AuthToken,
+            {"access_token": "access_token_digest",
+             "refresh_token": "refresh_token_digest"},
+            batch_size, clear,
+        )
+        self.stdout.write(f"AuthToken: {migrated} filas migradas.")
+
+        migrated = self._backfill(
+            BlacklistedToken, {"token": "token_digest"}, batch_size, clear
+        )
+        self.stdout.write(f"BlacklistedToken: {migrated} filas migradas.")
+
+        self.stdout.write(self.style.SUCCESS(
+            "Listo. Cuando no queden filas pendientes puede desactivarse "
+            "TOKEN_DIGEST_DUAL_READ."
+        ))
+
+    def _backfill(self, model, columns, batch_size, clear):
+        """
+        Recorre la tabla por rangos de id para no mantener bloqueos largos.
+        """
+        plain_fields = list(columns)
+        digest_fields = list(columns.values())
+        pending = model.objects.exclude(**{f"{plain_fields[0]}__isnull": True})
+        if not clear:
+            pending = pending.filter(**{f"{digest_fields[0]}__isnull": True})
+
+        migrated = 0
+        last_id = 0
+        while True:
+            rows = list(
+                pending.filter(id__gt=last_id)
+                .order_by("id")
+                .only("id", *plain_fields)[:batch_size]
+            )
+            if not rows:
+                break
+            for row in rows:
+                for plain, digest in columns.items():
+                    value = getattr(row, plain)
+                    setattr(row, digest, hash_token(value) if value else None)
+                    if clear:
+                        setattr(row, plain, None)
+            update_fields = digest_fields + (plain_fields if clear else [])
+            with transaction.atomic():
+                model.objects.bulk_update(rows, update_fields)
+            migrated += len(rows)
+            last_id = rows[-1].id
+        return migrated
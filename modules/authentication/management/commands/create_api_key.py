@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from modules.authentication.api_keys import create_api_key
+from modules.manager.models import User
+
+
+class Command(BaseCommand):
+    help = "Crea una API key para un usuario de servicio y la muestra una única vez."
+
+    def add_arguments(self, parser):
+        parser.add_argument("email", help="Email del usuario al que pertenece la clave.")
+        parser.add_argument("--name", required=True)
+        parser.add_argument(
+            "--scope",
+            action="append",
+            dest="scopes",
+            default=[],
+            help='Scope "<recurso>:<read|write>" (repetible); "*" para todos.',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options["email"])
+        except User.DoesNotExist:
+            raise CommandError("Usuario no encontrado.")
+
+        api_key, raw_key = create_api_key(user, options["name"], options["scopes"])
+        self.stdout.write(self.style.SUCCESS(
+            f"API key '{api_key.name}' creada. Guárdala ahora, no se volverá a mostrar:"
+        ))
+        self.stdout.write(raw_key)
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from modules.authentication.mailer import (
+    drain_outbox,
+    OUTBOX_BATCH_SIZE,
+    OUTBOX_POLL_INTERVAL,
+)
+
+
+class Command(BaseCommand):
+    help = "Envía los correos pendientes del outbox."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=OUTBOX_BATCH_SIZE)
+        parser.add_argument(
+            "--interval", type=float, default=OUTBOX_POLL_INTERVAL,
+            help="Segundos entre sondeos del outbox.",
+        )
+        parser.add_argument(
+            "--once", action="store_true",
+            help="Vacía el outbox una vez y termina.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = drain_outbox(options["batch_size"])
+            if sent or failed:
+                self.stdout.write(f"{sent} correos enviados, {failed} fallidos.")
+            if options["once"]:
+                return
+            time.sleep(options["interval"])
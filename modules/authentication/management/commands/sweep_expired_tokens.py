@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from modules.authentication.sweeper import (
+    sweep,
+    SWEEPER_BATCH_SIZE,
+    SWEEPER_PAUSE,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Elimina por lotes AuthToken, BlacklistedToken, PasswordResetToken y "
+        "EmailVerification caducados."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=SWEEPER_BATCH_SIZE)
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=SWEEPER_PAUSE,
+            help="Segundos de espera entre lotes.",
+        )
+
+    def handle(self, *args, **options):
+        for item in sweep(options["batch_size"], options["pause"]):
+            size = item["table_bytes"]
+            self.stdout.write(
+                f"{item['model']}: {item['deleted']} filas borradas en "
+                f"{item['seconds']:.2f}s ({item['rows_per_second']:.0f} filas/s); "
+                f"quedan {item['remaining_rows']} filas"
+                + (f", {size} bytes" if size is not None else "")
+                + "."
+            )
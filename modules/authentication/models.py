@@ -1,59 +1,311 @@
-from django.db import models
+from django.db import connection, models, transaction
+from django.db.models import Q, sql
 from django.conf import settings
 from django.utils import timezone
 import datetime
 import uuid
 
+from modules.authentication.revocation import revocation_filter
+from modules.authentication.utils import hash_token, ACCESS_TOKEN_LIFETIME
+
+
+# Durante la transición los tokens antiguos siguen en las columnas en claro;
+# con TOKEN_DIGEST_DUAL_READ las búsquedas fallidas por digest se reintentan
+# contra ellas hasta que ``backfill_token_digests`` haya migrado todas las filas.
+TOKEN_DIGEST_DUAL_READ = getattr(settings, "TOKEN_DIGEST_DUAL_READ", True)
+
+EMAIL_VERIFICATION_LIFETIME = datetime.timedelta(days=1)
+PASSWORD_RESET_TOKEN_LIFETIME = datetime.timedelta(hours=24)
+
 
 class AuthToken(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL,
                              on_delete=models.CASCADE)
-    access_token = models.TextField(unique=True)
-    refresh_token = models.TextField(unique=True)
-    expires_at = models.DateTimeField()
+    # Columnas heredadas, solo para lectura dual durante la migración.
+    access_token = models.TextField(null=True, blank=True)
+    refresh_token = models.TextField(null=True, blank=True)
+    access_token_digest = models.CharField(
+        max_length=64, unique=True, null=True)
+    refresh_token_digest = models.CharField(
+        max_length=64, unique=True, null=True)
+    expires_at = models.DateTimeField(db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    device = models.CharField(max_length=100, blank=True)
+    # Identificador estable que envía el cliente: una sesión nueva del mismo
+    # dispositivo sustituye a la anterior. Vacío si el cliente no lo envía.
+    device_id = models.CharField(max_length=64, blank=True)
+    # Lo actualiza touch_session como mucho cada SESSION_TOUCH_INTERVAL.
+    last_seen_at = models.DateTimeField(default=timezone.now)
+    # Generación de sesiones del usuario cuando se emitió el token.
+    generation = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "-last_seen_at"]),
+            # Lectura dual: parciales, se vacían con --clear-plaintext.
+            models.Index(
+                fields=["access_token"],
+                condition=Q(access_token__isnull=False),
+                name="authtoken_legacy_access_idx"),
+            models.Index(
+                fields=["refresh_token"],
+                condition=Q(refresh_token__isnull=False),
+                name="authtoken_legacy_refresh_idx"),
+        ]
 
     def is_valid(self):
         return timezone.now() < self.expires_at
 
+    @classmethod
+    def issue(cls, user, access_token, refresh_token, expires_at, device="",
+              device_id=""):
+        return cls.objects.create(
+            user=user,
+            access_token_digest=hash_token(access_token),
+            refresh_token_digest=hash_token(refresh_token),
+            expires_at=expires_at,
+            device=device,
+            device_id=device_id,
+            generation=user.session_generation,
+        )
+
+    @classmethod
+    def _pop(cls, **filters):
+        """
+        Borra las sesiones que cumplen ``filters`` y las devuelve, con un
+        único ``DELETE ... RETURNING`` donde la base de datos lo soporta.
+        Dos peticiones concurrentes nunca obtienen la misma fila.
+        """
+        queryset = cls.objects.filter(**filters)
+        if not connection.features.can_return_columns_from_insert:
+            with transaction.atomic():
+                rows = list(queryset.select_for_update())
+                cls.objects.filter(pk__in=[row.pk for row in rows]).delete()
+            return rows
+
+        query = queryset.query.chain(sql.DeleteQuery)
+        delete_sql, params = query.get_compiler(connection=connection).as_sql()
+        columns = ", ".join(
+            connection.ops.quote_name(field.column)
+            for field in cls._meta.concrete_fields
+        )
+        return list(cls.objects.raw(f"{delete_sql} RETURNING {columns}", params))
+
+    @classmethod
+    def _pop_by(cls, field, token, **filters):
+        rows = cls._pop(**{f"{field}_digest": hash_token(token)}, **filters)
+        if not rows and TOKEN_DIGEST_DUAL_READ:
+            rows = cls._pop(**{field: token}, **filters)
+        return rows[0] if rows else None
+
+    @classmethod
+    def pop_by_access_token(cls, token, **filters):
+        return cls._pop_by("access_token", token, **filters)
+
+    @classmethod
+    def pop_by_refresh_token(cls, token, **filters):
+        return cls._pop_by("refresh_token", token, **filters)
+
+    @classmethod
+    def pop_user_session(cls, user, session_id):
+        rows = cls._pop(pk=session_id, user_id=user.pk)
+        return rows[0] if rows else None
+
+    @classmethod
+    def pop_device_sessions(cls, user, device_id):
+        return cls._pop(user_id=user.pk, device_id=device_id)
+
+    @classmethod
+    def pop_overflow_sessions(cls, user, keep):
+        """
+        Borra las sesiones menos recientes del usuario dejando ``keep``.
+        """
+        ids = list(
+            cls.objects.filter(user_id=user.pk)
+            .order_by("-last_seen_at")
+            .values_list("pk", flat=True)[keep:]
+        )
+        return cls._pop(pk__in=ids) if ids else []
+
+    @classmethod
+    def active_sessions(cls, user):
+        return cls.objects.filter(
+            user_id=user.pk,
+            generation=user.session_generation,
+            expires_at__gt=timezone.now(),
+        ).order_by("-last_seen_at")
+
     @classmethod
     def get_active_token(cls, user):
         return cls.objects.filter(user=user, expires_at__gt=timezone.now()).first()
 
+    def revocation_entries(self):
+        """
+        Pares ``(digest, caducidad)`` que hay que poner en la lista negra
+        para invalidar esta sesión: el refresh token y su access token.
+        """
+        access_expires_at = min(
+            self.expires_at, self.created_at + ACCESS_TOKEN_LIFETIME)
+        return [
+            (self.refresh_token_digest or hash_token(self.refresh_token),
+             self.expires_at),
+            (self.access_token_digest or hash_token(self.access_token),
+             access_expires_at),
+        ]
+
     def revoke(self):
-        BlacklistedToken.objects.create(
-            token=self.refresh_token, expires_at=self.expires_at
-        )
-        self.delete()
+        with transaction.atomic():
+            BlacklistedToken.revoke_sessions([self])
+            self.delete()
 
 
 class BlacklistedToken(models.Model):
-    token = models.TextField(unique=True)
-    expires_at = models.DateTimeField()
+    # Columna heredada, solo para lectura dual durante la migración.
+    token = models.TextField(null=True, blank=True)
+    token_digest = models.CharField(max_length=64, unique=True, null=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["token"], condition=Q(token__isnull=False),
+                name="blacklist_legacy_token_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        if adding:
+            revocation_filter.publish(
+                self.token_digest or hash_token(self.token))
+
+    @classmethod
+    def revoke_sessions(cls, sessions):
+        """
+        Pone en la lista negra los tokens aún vigentes de ``sessions`` con
+        un único INSERT.
+        """
+        now = timezone.now()
+        rows = [
+            cls(token_digest=digest, expires_at=expires_at)
+            for session in sessions
+            for digest, expires_at in session.revocation_entries()
+            if expires_at > now
+        ]
+        cls.objects.bulk_create(rows, ignore_conflicts=True)
+        for row in rows:
+            revocation_filter.publish(row.token_digest)
+        return rows
 
     @classmethod
     def is_blacklisted(cls, token):
-        return cls.objects.filter(token=token, expires_at__gt=timezone.now()).exists()
+        digest = hash_token(token)
+        # El filtro no da falsos negativos: solo se consulta la base de
+        # datos cuando el token podría estar revocado.
+        if not revocation_filter.might_contain(digest):
+            return False
+        live = cls.objects.filter(expires_at__gt=timezone.now())
+        if live.filter(token_digest=digest).exists():
+            return True
+        return TOKEN_DIGEST_DUAL_READ and live.filter(token=token).exists()
 
 
 class EmailVerification(models.Model):
     user = models.OneToOneField(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     token = models.CharField(max_length=255, default=uuid.uuid4)
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     is_verified = models.BooleanField(default=False)
 
     def is_valid(self):
 
-        return (timezone.now() - self.created_at).days < 1
+        return timezone.now() - self.created_at < EMAIL_VERIFICATION_LIFETIME
 
 
 class PasswordResetToken(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL,
                              on_delete=models.CASCADE)
     token = models.CharField(max_length=255, default=uuid.uuid4)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def is_valid(self):
+
+        return timezone.now() - self.created_at < PASSWORD_RESET_TOKEN_LIFETIME
+
+
+class OutboxEmail(models.Model):
+    """
+    Correo pendiente de envío. Se escribe en la misma transacción que el
+    cambio que lo origina y lo entrega en segundo plano ``mailer``.
+    """
+
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (SENDING, "Sending"),
+        (SENT, "Sent"),
+        (FAILED, "Failed"),
+    ]
+
+    subject = models.CharField(max_length=255)
+    template_name = models.CharField(max_length=255)
+    context = models.JSONField(default=dict)
+    recipient = models.EmailField()
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claimed_by = models.UUIDField(null=True, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+        ]
+
+    @classmethod
+    def enqueue(cls, subject, template_name, context, recipient):
+        email = cls.objects.create(
+            subject=subject,
+            template_name=template_name,
+            context=context,
+            recipient=recipient,
+        )
+        from modules.authentication.mailer import notify_outbox
+        transaction.on_commit(notify_outbox)
+        return email
+
+
+class APIKey(models.Model):
+    """
+    Clave de larga duración para clientes servicio a servicio. Se presenta
+    como ``<prefix>.<secret>``: el prefijo es público y sirve para buscarla
+    por índice; del secreto solo se guarda su HMAC.
+    """
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL,
+                             on_delete=models.CASCADE, related_name="api_keys")
+    name = models.CharField(max_length=100)
+    prefix = models.CharField(max_length=16, unique=True)
+    hashed_secret = models.CharField(max_length=64)
+    # Lista de scopes "<recurso>:<read|write>"; "*" da acceso a todo.
+    scopes = models.JSONField(default=list)
+    is_active = models.BooleanField(default=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    def __str__(self):
+        return f"{self.name} ({self.prefix})"
+
     def is_valid(self):
+        return self.is_active and (
+            self.expires_at is None or timezone.now() < self.expires_at)
 
-        return (timezone.now() - self.created_at).hours < 24
+    def has_scope(self, scope):
+        return "*" in self.scopes or scope in self.scopes
@@ -0,0 +1,39 @@
+from rest_framework.permissions import BasePermission, SAFE_METHODS
+
+from modules.authentication.models import APIKey
+
+
+class HasAPIKeyScope(BasePermission):
+    """
+    Si la petición se autenticó con una API key, exige el scope
+    ``<recurso>:read`` o ``<recurso>:write`` según el método (o
+    ``api_key_action`` de la vista). El recurso es ``api_key_scope`` de la
+    vista o, en los viewsets, su ``basename``.
+    Las peticiones autenticadas con JWT no se ven afectadas.
+    """
+
+    message = "La API key no tiene permiso para este recurso."
+
+    def has_permission(self, request, view):
+        if not isinstance(request.auth, APIKey):
+            return True
+        resource = getattr(view, "api_key_scope", None) or getattr(
+            view, "basename", None)
+        if not resource:
+            return False
+        action = getattr(view, "api_key_action", None) or (
+            "read" if request.method in SAFE_METHODS else "write")
+        return request.auth.has_scope(f"{resource}:{action}")
+
+
+class CanIntrospectTokens(HasAPIKeyScope):
+    """
+    Servicios con API key y scope ``introspection:read``, o usuarios staff.
+    """
+
+    message = "No tienes permiso para consultar el estado de tokens."
+
+    def has_permission(self, request, view):
+        if isinstance(request.auth, APIKey):
+            return super().has_permission(request, view)
+        return bool(request.user and request.user.is_staff)
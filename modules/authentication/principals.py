@@ -0,0 +1,93 @@
+import copy
+
+from django.conf import settings
+from django.core.cache import cache
+
+from modules.common.lru import LRUCache
+
+
+USER_CACHE_SIZE = getattr(settings, "USER_CACHE_SIZE", 2048)
+USER_CACHE_TTL = getattr(settings, "USER_CACHE_TTL", 5 * 60)
+USER_STAMP_KEY = "auth:user:{}:stamp"
+USER_GENERATION_KEY = "auth:user:{}:gen"
+
+_users = LRUCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+
+def _stamp(user):
+    return user.updated_date.timestamp() if user.updated_date else 0
+
+
+def get_cached_user(user_id):
+    """
+    Devuelve el usuario desde la caché del proceso si su ``updated_date``
+    coincide con el publicado en la caché compartida; si no, lo lee de la BD.
+    """
+    from modules.manager.models import User
+
+    key = USER_STAMP_KEY.format(user_id)
+    stamp = cache.get(key)
+    user = _users.get(str(user_id))
+    if user is not None and stamp is not None and _stamp(user) == stamp:
+        return copy.copy(user)
+
+    user = User.objects.get(id=user_id)
+    cache.add(key, _stamp(user), timeout=None)
+    _users.set(str(user_id), user)
+    return copy.copy(user)
+
+
+def invalidate_user(user):
+    """
+    Publica el nuevo ``updated_date`` y la generación de sesiones del usuario
+    para que todos los procesos descarten su copia. Llamar después de guardar.
+    """
+    _users.delete(str(user.id))
+    cache.set(USER_STAMP_KEY.format(user.id), _stamp(user), timeout=None)
+    cache.set(USER_GENERATION_KEY.format(user.id),
+              user.session_generation, timeout=None)
+
+
+def get_session_generation(user_id):
+    """
+    Generación de sesiones vigente del usuario, desde la caché compartida.
+    """
+    from modules.manager.models import User
+
+    key = USER_GENERATION_KEY.format(user_id)
+    generation = cache.get(key)
+    if generation is None:
+        generation = (
+            User.objects.filter(id=user_id)
+            .values_list("session_generation", flat=True)
+            .first()
+        )
+        if generation is None:
+            raise User.DoesNotExist()
+        cache.add(key, generation, timeout=None)
+    return generation
+
+
+class TokenPrincipal:
+    """
+    Usuario ligero construido a partir de los claims firmados del access token.
+    No toca la base de datos; pensado solo para peticiones de lectura.
+    """
+
+    is_anonymous = False
+    is_authenticated = True
+
+    def __init__(self, payload):
+        self.id = self.pk = payload["user_id"]
+        self.is_staff = payload["is_staff"]
+        self.is_active = payload["is_active"]
+        self.first_name = payload.get("first_name", "")
+        self.last_name = payload.get("last_name", "")
+        self.username = payload.get("username")
+        self.session_generation = payload.get("gen", 0)
+
+    def get_full_name(self):
+        return f"{self.first_name} {self.last_name}".strip()
+
+    def __str__(self):
+        return self.get_full_name() or str(self.id)
@@ -0,0 +1,141 @@
+import math
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from modules.authentication.utils import hash_token, forget_decoded_token
+
+
+REVOCATION_VERSION_KEY = getattr(
+    settings, "REVOCATION_VERSION_KEY", "auth:revocation:version")
+REVOCATION_ERROR_RATE = getattr(settings, "REVOCATION_ERROR_RATE", 0.01)
+REVOCATION_MIN_CAPACITY = getattr(settings, "REVOCATION_MIN_CAPACITY", 1024)
+# Cuántas versiones de retraso se recuperan desde la caché antes de
+# preferir una recarga completa desde la base de datos.
+REVOCATION_MAX_GAP = getattr(settings, "REVOCATION_MAX_GAP", 500)
+REVOCATION_LOG_TIMEOUT = getattr(settings, "REVOCATION_LOG_TIMEOUT", 60 * 60)
+
+
+class BloomFilter:
+    """
+    Filtro de Bloom sobre digests SHA-256 en hexadecimal: nunca da falsos
+    negativos.
+    """
+
+    def __init__(self, capacity, error_rate=REVOCATION_ERROR_RATE):
+        capacity = max(int(capacity), 1)
+        self.capacity = capacity
+        self.size = max(
+            int(-capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.hashes = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, digest):
+        h1 = int(digest[:16], 16)
+        h2 = int(digest[16:32], 16) | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, digest):
+        for pos in self._positions(digest):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, digest):
+        return all(
+            self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(digest)
+        )
+
+    def is_saturated(self):
+        return self.count >= self.capacity
+
+
+class RevocationFilter:
+    """
+    Filtro por proceso de tokens revocados.
+
+    Se carga desde BlacklistedToken la primera vez que se usa. Cada revocación
+    incrementa una versión en la caché compartida y deja su digest en
+    ``<version_key>:<version>``; el resto de procesos aplica esos digests al
+    detectar el cambio de versión y solo vuelve a la base de datos si se han
+    quedado demasiado atrás o la caché ha perdido alguna entrada.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._filter = None
+        self._version = None
+
+    def _rebuild(self, version):
+        from modules.authentication.models import BlacklistedToken
+
+        tokens = BlacklistedToken.objects.filter(expires_at__gt=timezone.now())
+        bloom = BloomFilter(max(tokens.count() * 2, REVOCATION_MIN_CAPACITY))
+        rows = tokens.values_list("token_digest", "token").iterator()
+        for digest, token in rows:
+            # Las filas aún sin migrar solo tienen el token en claro.
+            bloom.add(digest or hash_token(token))
+        self._filter = bloom
+        self._version = version
+
+    def _catch_up(self, version):
+        keys = [
+            f"{REVOCATION_VERSION_KEY}:{v}"
+            for v in range(self._version + 1, version + 1)
+        ]
+        if not keys or len(keys) > REVOCATION_MAX_GAP:
+            return False
+        digests = cache.get_many(keys)
+        if len(digests) != len(keys):
+            return False
+        for digest in digests.values():
+            self._filter.add(digest)
+            forget_decoded_token(digest)
+        self._version = version
+        return not self._filter.is_saturated()
+
+    def _sync(self):
+        version = cache.get(REVOCATION_VERSION_KEY, 0)
+        if self._filter is not None and version == self._version:
+            return
+        with self._lock:
+            if self._filter is not None and version == self._version:
+                return
+            if self._filter is None or not self._catch_up(version):
+                self._rebuild(version)
+
+    def might_contain(self, digest):
+        self._sync()
+        return digest in self._filter
+
+    def reset(self):
+        with self._lock:
+            self._filter = None
+            self._version = None
+
+    def publish(self, digest):
+        """
+        Propaga una revocación a todos los procesos cuando la transacción
+        en curso se confirma.
+        """
+        forget_decoded_token(digest)
+        transaction.on_commit(lambda: publish_revocation(digest))
+
+
+def publish_revocation(digest):
+    cache.add(REVOCATION_VERSION_KEY, 0, timeout=None)
+    try:
+        version = cache.incr(REVOCATION_VERSION_KEY)
+    except ValueError:
+        cache.set(REVOCATION_VERSION_KEY, 0, timeout=None)
+        version = cache.incr(REVOCATION_VERSION_KEY)
+    cache.set(f"{REVOCATION_VERSION_KEY}:{version}",
+              digest, timeout=REVOCATION_LOG_TIMEOUT)
+    return version
+
+
+revocation_filter = RevocationFilter()
@@ -1,6 +1,8 @@
 from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
 from modules.manager.models import User
+from modules.authentication.models import AuthToken
+from modules.authentication.utils import hash_token
 from django.contrib.auth import authenticate
 
 
@@ -13,12 +15,11 @@ class LoginSerializer(serializers.Serializer):
         password = data.get("password")
 
         if email and password:
+            # EmailAuthBackend ya rechaza a los usuarios inactivos: reciben
+            # el mismo error que unas credenciales incorrectas.
             user = authenticate(email=email, password=password)
 
             if user:
-                if not user.is_active:
-                    raise serializers.ValidationError(
-                        _("Usuario desactivado."))
                 return user
             else:
                 raise serializers.ValidationError(
@@ -28,6 +29,22 @@ class LoginSerializer(serializers.Serializer):
                 _("Email y contraseña requeridos."))
 
 
+class SessionSerializer(serializers.ModelSerializer):
+    current = serializers.SerializerMethodField()
+
+    class Meta:
+        model = AuthToken
+        fields = ["id", "device", "created_at", "last_seen_at", "expires_at", "current"]
+
+    def get_current(self, obj):
+        request = self.context.get("request")
+        token = getattr(request, "auth", None)
+        # Con una API key request.auth es un APIKey: ninguna sesión es la actual.
+        if not isinstance(token, str) or not token:
+            return False
+        return obj.access_token_digest == hash_token(token)
+
+
 class RefreshTokenSerializer(serializers.Serializer):
     refresh_token = serializers.CharField()
 
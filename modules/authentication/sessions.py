@@ -0,0 +1,136 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from modules.authentication.models import AuthToken, BlacklistedToken
+from modules.authentication.principals import get_cached_user, invalidate_user
+from modules.manager.models import User
+from modules.authentication.utils import (
+    generate_access_token,
+    generate_refresh_token,
+    hash_token,
+    REFRESH_TOKEN_LIFETIME,
+)
+
+
+MAX_SESSIONS_PER_USER = getattr(settings, "MAX_SESSIONS_PER_USER", 5)
+SESSION_TOUCH_INTERVAL = getattr(settings, "SESSION_TOUCH_INTERVAL", 5 * 60)
+SESSION_TOUCH_KEY = "auth:session:{}:seen"
+
+
+def device_label(request, data):
+    """
+    Nombre del dispositivo: el enviado por el cliente o, si no, su User-Agent.
+    """
+    label = data.get("device") or request.headers.get("User-Agent", "")
+    return str(label).strip()[:100]
+
+
+def client_device_id(data):
+    """
+    Identificador de dispositivo enviado por el cliente (``device_id``), o
+    cadena vacía. No se deduce del User-Agent: dos dispositivos iguales
+    tendrían el mismo.
+    """
+    value = data.get("device_id")
+    return str(value).strip()[:64] if value else ""
+
+
+def _issue(user, device, device_id=""):
+    access_token = generate_access_token(user)
+    refresh_token = generate_refresh_token()
+    AuthToken.issue(user, access_token, refresh_token,
+                    timezone.now() + REFRESH_TOKEN_LIFETIME, device=device,
+                    device_id=device_id)
+    # Recién emitida: last_seen_at ya es ahora.
+    cache.set(SESSION_TOUCH_KEY.format(hash_token(access_token)), True,
+              timeout=SESSION_TOUCH_INTERVAL)
+    return access_token, refresh_token
+
+
+def start_session(user, device="", device_id=""):
+    """
+    Abre una sesión nueva en una sola transacción. Si el cliente envía
+    ``device_id`` revoca la sesión previa de ese dispositivo; si se supera
+    ``MAX_SESSIONS_PER_USER``, las menos recientes del usuario.
+    """
+    with transaction.atomic():
+        revoked = (AuthToken.pop_device_sessions(user, device_id)
+                   if device_id else [])
+        revoked += AuthToken.pop_overflow_sessions(
+            user, MAX_SESSIONS_PER_USER - 1)
+        BlacklistedToken.revoke_sessions(revoked)
+        return _issue(user, device, device_id)
+
+
+def rotate_session(refresh_token):
+    """
+    Cambia un refresh token por un par nuevo. El borrado condicional de la
+    sesión hace que, ante refrescos concurrentes del mismo token, solo uno
+    lo consiga. Devuelve ``None`` si el token no existe, ha caducado o es de
+    una generación de sesiones anterior.
+    """
+    with transaction.atomic():
+        session = AuthToken.pop_by_refresh_token(refresh_token)
+        if session is None or not session.is_valid():
+            return None
+        user = get_cached_user(session.user_id)
+        if session.generation != user.session_generation:
+            return None
+        BlacklistedToken.revoke_sessions([session])
+        return _issue(user, session.device, session.device_id)
+
+
+def touch_session(access_token):
+    """
+    Actualiza ``last_seen_at`` de la sesión de ``access_token`` como mucho
+    una vez cada ``SESSION_TOUCH_INTERVAL`` segundos por sesión.
+    """
+    digest = hash_token(access_token)
+    if not cache.add(SESSION_TOUCH_KEY.format(digest), True,
+                     timeout=SESSION_TOUCH_INTERVAL):
+        return
+    AuthToken.objects.filter(access_token_digest=digest).update(
+        last_seen_at=timezone.now())
+
+
+def end_session(access_token, user_id):
+    """
+    Cierra la sesión a la que pertenece ``access_token``.
+    """
+    with transaction.atomic():
+        session = AuthToken.pop_by_access_token(access_token, user_id=user_id)
+        if session is not None:
+            BlacklistedToken.revoke_sessions([session])
+        return session
+
+
+def end_session_by_id(user, session_id):
+    """
+    Cierra una sesión concreta del usuario (p. ej. desde la lista de
+    dispositivos). Devuelve ``False`` si no existe.
+    """
+    with transaction.atomic():
+        session = AuthToken.pop_user_session(user, session_id)
+        if session is not None:
+            BlacklistedToken.revoke_sessions([session])
+        return session is not None
+
+
+def end_all_sessions(user):
+    """
+    Invalida todos los tokens del usuario incrementando su generación de
+    sesiones: un UPDATE y un DELETE, sin insertar nada en la lista negra.
+    Los access tokens ya emitidos dejan de valer porque su claim "gen" deja
+    de coincidir.
+    """
+    with transaction.atomic():
+        User.objects.filter(pk=user.pk).update(
+            session_generation=F("session_generation") + 1,
+            updated_date=timezone.now(),
+        )
+        AuthToken.objects.filter(user_id=user.pk).delete()
+    user.refresh_from_db(fields=["session_generation", "updated_date"])
+    invalidate_user(user)
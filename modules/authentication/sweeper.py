@@ -0,0 +1,129 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+
+from modules.authentication.models import (
+    AuthToken,
+    BlacklistedToken,
+    EmailVerification,
+    PasswordResetToken,
+    EMAIL_VERIFICATION_LIFETIME,
+    PASSWORD_RESET_TOKEN_LIFETIME,
+)
+
+
+logger = logging.getLogger(__name__)
+
+SWEEPER_BATCH_SIZE = getattr(settings, "TOKEN_SWEEPER_BATCH_SIZE", 1000)
+SWEEPER_PAUSE = getattr(settings, "TOKEN_SWEEPER_PAUSE", 0.05)
+SWEEPER_LOCK_KEY = "auth:sweeper:lock"
+
+
+def expired_querysets(now=None):
+    """
+    Filas caducadas por modelo, siempre sobre columnas indexadas.
+    """
+    now = now or timezone.now()
+    return [
+        (AuthToken, AuthToken.objects.filter(expires_at__lte=now)),
+        (BlacklistedToken, BlacklistedToken.objects.filter(expires_at__lte=now)),
+        (PasswordResetToken, PasswordResetToken.objects.filter(
+            created_at__lte=now - PASSWORD_RESET_TOKEN_LIFETIME)),
+        # Las verificaciones completadas se conservan como registro.
+        (EmailVerification, EmailVerification.objects.filter(
+            created_at__lte=now - EMAIL_VERIFICATION_LIFETIME, is_verified=False)),
+    ]
+
+
+def table_size(model):
+    """
+    Número de filas y, en PostgreSQL, tamaño en bytes de tabla e índices.
+    """
+    size = None
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_total_relation_size(%s)", [model._meta.db_table])
+            size = cursor.fetchone()[0]
+    return model.objects.count(), size
+
+
+def delete_in_batches(queryset, batch_size=SWEEPER_BATCH_SIZE, pause=SWEEPER_PAUSE):
+    """
+    Borra el queryset en lotes de ``batch_size`` ids, cada uno en su propia
+    transacción corta, haciendo una pausa entre lotes para no acaparar los
+    bloqueos de escritura.
+    """
+    deleted = 0
+    model = queryset.model
+    while True:
+        ids = list(queryset.order_by("pk").values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        with transaction.atomic():
+            count, _ = model.objects.filter(pk__in=ids).delete()
+        deleted += count
+        if len(ids) < batch_size:
+            return deleted
+        if pause:
+            time.sleep(pause)
+
+
+def sweep(batch_size=SWEEPER_BATCH_SIZE, pause=SWEEPER_PAUSE):
+    """
+    Elimina los tokens caducados y devuelve estadísticas por modelo.
+    """
+    stats = []
+    for model, queryset in expired_querysets():
+        started = time.monotonic()
+        deleted = delete_in_batches(queryset, batch_size, pause)
+        elapsed = time.monotonic() - started
+        rows, size = table_size(model)
+        stats.append({
+            "model": model.__name__,
+            "deleted": deleted,
+            "seconds": elapsed,
+            "rows_per_second": deleted / elapsed if elapsed else 0.0,
+            "remaining_rows": rows,
+            "table_bytes": size,
+        })
+    return stats
+
+
+def _run_periodically(interval):
+    while True:
+        time.sleep(interval)
+        # Solo un proceso barre en cada intervalo.
+        if not cache.add(SWEEPER_LOCK_KEY, 1, timeout=interval):
+            continue
+        try:
+            for item in sweep():
+                logger.info(
+                    "Sweeper %(model)s: %(deleted)d filas borradas "
+                    "(%(rows_per_second).0f filas/s), quedan %(remaining_rows)d.",
+                    item,
+                )
+        except Exception:
+            logger.exception("Error barriendo tokens caducados.")
+
+
+_runner = None
+
+
+def start_sweeper(interval):
+    """
+    Arranca el barrido periódico en un hilo demonio (una vez por proceso).
+    """
+    global _runner
+    if _runner is None:
+        _runner = threading.Thread(
+            target=_run_periodically, args=(interval,),
+            name="token-sweeper", daemon=True,
+        )
+        _runner.start()
+    return _runner
@@ -1,3 +1,1257 @@
-from django.test import TestCase
+import base64
+import datetime
+import hashlib
+import hmac
+from io import StringIO
+import json
+import threading
 
-# Create your tests here.
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+import time
+import uuid
+from unittest import mock
+
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import MD5PasswordHasher
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import (
+    AsyncRequestFactory,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from modules.authentication import api_keys, async_views
+from modules.authentication.api_keys import (
+    create_api_key,
+    resolve_api_key,
+    revoke_api_key,
+)
+from modules.authentication import mailer, models
+from modules.authentication.models import (
+    APIKey,
+    AuthToken,
+    BlacklistedToken,
+    EmailVerification,
+    OutboxEmail,
+    PasswordResetToken,
+)
+from modules.authentication.revocation import (
+    REVOCATION_VERSION_KEY,
+    BloomFilter,
+    RevocationFilter,
+    publish_revocation,
+    revocation_filter,
+)
+from modules.authentication.principals import (
+    USER_STAMP_KEY,
+    get_cached_user,
+    invalidate_user,
+)
+from modules.authentication.sessions import (
+    SESSION_TOUCH_KEY,
+    end_all_sessions,
+    end_session_by_id,
+    rotate_session,
+    start_session,
+)
+from modules.authentication.sweeper import delete_in_batches, sweep
+from modules.authentication.throttling import LoginIPThrottle
+from modules.authentication import utils
+from modules.authentication.hashing import HashingPool
+from modules.authentication.keys import KeyRing, get_key_ring
+from modules.authentication.utils import decode_access_token, hash_token
+from modules.common import lru
+from modules.manager.models import User
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class AuthViewsQueryCountTests(APITestCase):
+    """
+    Regresión de consultas de las vistas de autenticación.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="user@example.com", password="clave-segura", first_name="Ana",
+            is_staff=True)
+        for i in range(5):
+            start_session(cls.user, device=f"dispositivo {i}")
+
+    def setUp(self):
+        cache.clear()
+        revocation_filter.reset()
+        # El filtro de revocación se carga una vez por proceso.
+        revocation_filter.might_contain("0" * 64)
+        self.access_token, self.refresh_token = start_session(self.user, "tests")
+
+    def authenticate(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.access_token}")
+
+    def test_login(self):
+        with self.assertNumQueries(8):
+            response = self.client.post("/api/auth/login/", {
+                "email": "user@example.com", "password": "clave-segura",
+                "device_id": "tests",
+            }, format="json")
+        self.assertEqual(response.status_code, 200)
+
+    def test_refresh(self):
+        with self.assertNumQueries(6):
+            response = self.client.post(
+                "/api/auth/refresh/", {"refresh_token": self.refresh_token},
+                format="json")
+        self.assertEqual(response.status_code, 200)
+
+    def test_logout(self):
+        self.authenticate()
+        with self.assertNumQueries(5):
+            response = self.client.post("/api/auth/logout/")
+        self.assertEqual(response.status_code, 200)
+
+    def test_logout_all(self):
+        self.authenticate()
+        with self.assertNumQueries(6):
+            response = self.client.post("/api/auth/logout-all/")
+        self.assertEqual(response.status_code, 200)
+
+    def test_session_list(self):
+        self.authenticate()
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/auth/sessions/")
+        self.assertEqual(len(response.data), 5)
+
+    def test_session_delete(self):
+        self.authenticate()
+        session = AuthToken.objects.filter(device="dispositivo 4").first()
+        with self.assertNumQueries(5):
+            response = self.client.delete(f"/api/auth/sessions/{session.id}/")
+        self.assertEqual(response.status_code, 200)
+
+    def test_register(self):
+        with self.assertNumQueries(2):
+            response = self.client.post("/api/auth/register/", {
+                "email": "nuevo@example.com", "password": "clave-segura",
+                "first_name": "Nuevo", "last_name": "Usuario",
+            }, format="json")
+        self.assertEqual(response.status_code, 201)
+
+    def test_verify_email(self):
+        verification = EmailVerification.objects.create(user=self.user)
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                "/api/auth/verify-email/", {"token": verification.token})
+        self.assertEqual(response.status_code, 200)
+
+    def test_forgot_password(self):
+        with self.assertNumQueries(8):
+            response = self.client.post(
+                "/api/auth/forgot-password/", {"email": "user@example.com"},
+                format="json")
+        self.assertEqual(response.status_code, 200)
+
+    def test_reset_password(self):
+        reset = PasswordResetToken.objects.create(user=self.user)
+        with self.assertNumQueries(3):
+            response = self.client.post(
+                f"/api/auth/reset-password/{reset.token}/",
+                {"token": str(reset.token), "password": "otra-clave-segura"},
+                format="json")
+        self.assertEqual(response.status_code, 200)
+
+    def test_jwks(self):
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/auth/jwks.json")
+        self.assertEqual(response.status_code, 200)
+
+    def test_introspect_batch(self):
+        self.authenticate()
+        tokens = [self.access_token] + [
+            start_session(self.user, f"lote {i}")[0] for i in range(3)]
+        with self.assertNumQueries(1):
+            response = self.client.post(
+                "/api/auth/introspect/", {"tokens": tokens}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+    def test_hashing_stats(self):
+        self.authenticate()
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/auth/hashing-stats/")
+        self.assertEqual(response.status_code, 200)
+
+
+class SessionAPIKeyTests(APITestCase):
+    """
+    Gestión de sesiones con API keys: solo con el scope ``sessions``.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="user@example.com", password="x")
+        start_session(cls.user, "portátil")
+
+    def setUp(self):
+        cache.clear()
+
+    def use_api_key(self, *scopes):
+        _api_key, raw_key = create_api_key(self.user, "integración", scopes)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Api-Key {raw_key}")
+
+    def test_sessions_need_scope(self):
+        self.use_api_key("events:read", "events:write")
+        session = AuthToken.objects.get(user=self.user)
+        self.assertEqual(self.client.get("/api/auth/sessions/").status_code, 403)
+        self.assertEqual(
+            self.client.delete(f"/api/auth/sessions/{session.id}/").status_code, 403)
+        self.assertEqual(self.client.post("/api/auth/logout-all/").status_code, 403)
+        self.assertTrue(AuthToken.objects.filter(user=self.user).exists())
+
+    def test_list_with_scope(self):
+        self.use_api_key("sessions:read")
+        response = self.client.get("/api/auth/sessions/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 1)
+        self.assertFalse(response.data[0]["current"])
+        self.assertEqual(self.client.post("/api/auth/logout-all/").status_code, 403)
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class APIKeyTests(APITestCase):
+    """
+    ``Authorization: Api-Key <prefix>.<secret>``: resolución, rechazo y
+    caché por prefijo.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="user@example.com", password="x")
+        cls.staff = User.objects.create_user(
+            email="staff@example.com", password="x", is_staff=True)
+
+    def setUp(self):
+        cache.clear()
+        api_keys._resolved.clear()
+
+    def get(self, raw_key, url="/api/auth/sessions/"):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Api-Key {raw_key}")
+        return self.client.get(url)
+
+    def assertRejected(self, response):
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.data["detail"], "API key inválida o revocada.")
+
+    def test_resolves_key_and_user(self):
+        start_session(self.user, "portátil")
+        api_key, raw_key = create_api_key(self.user, "integración", ["sessions:read"])
+        self.assertEqual(api_key.hashed_secret, api_keys.hash_secret(
+            raw_key.partition(".")[2]))
+        response = self.get(raw_key)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 1)
+
+    def test_wrong_secret(self):
+        _api_key, raw_key = create_api_key(self.user, "integración", ["*"])
+        prefix = raw_key.partition(".")[0]
+        self.assertRejected(self.get(f"{prefix}.otro-secreto"))
+        self.assertRejected(self.get(prefix))
+        self.assertRejected(self.get("desconocido.secreto"))
+
+    def test_revoked_key(self):
+        api_key, raw_key = create_api_key(self.user, "integración", ["*"])
+        self.assertEqual(self.get(raw_key).status_code, 200)
+        # En este proceso la revocación se aplica al momento.
+        revoke_api_key(api_key)
+        self.assertRejected(self.get(raw_key))
+
+    def test_expired_key(self):
+        _api_key, raw_key = create_api_key(
+            self.user, "integración", ["*"],
+            expires_at=timezone.now() - datetime.timedelta(seconds=1))
+        self.assertRejected(self.get(raw_key))
+
+    def test_inactive_user(self):
+        user = User.objects.create_user(
+            email="baja@example.com", password="x", is_active=False)
+        _api_key, raw_key = create_api_key(user, "integración", ["*"])
+        self.assertRejected(self.get(raw_key))
+
+    def test_prefix_cache_ttl(self):
+        api_key, raw_key = create_api_key(self.user, "integración", ["*"])
+        self.assertIsNotNone(resolve_api_key(raw_key))
+        with self.assertNumQueries(0):
+            self.assertEqual(resolve_api_key(raw_key).pk, api_key.pk)
+        # Revocada desde otro proceso: sigue valiendo hasta que caduca la
+        # entrada cacheada.
+        APIKey.objects.filter(pk=api_key.pk).update(is_active=False)
+        self.assertIsNotNone(resolve_api_key(raw_key))
+        later = time.monotonic() + api_keys.API_KEY_CACHE_TTL + 1
+        with mock.patch.object(lru.time, "monotonic", return_value=later):
+            self.assertIsNone(resolve_api_key(raw_key))
+
+    def test_hashing_stats_need_scope(self):
+        _api_key, raw_key = create_api_key(self.staff, "monitor", ["events:read"])
+        self.assertEqual(self.get(raw_key, "/api/auth/hashing-stats/").status_code, 403)
+        _api_key, raw_key = create_api_key(self.staff, "monitor", ["hashing:read"])
+        self.assertEqual(self.get(raw_key, "/api/auth/hashing-stats/").status_code, 200)
+        # El scope no basta sin ser staff.
+        _api_key, raw_key = create_api_key(self.user, "monitor", ["hashing:read"])
+        self.assertEqual(self.get(raw_key, "/api/auth/hashing-stats/").status_code, 403)
+
+
+class SessionRotationRaceTests(TransactionTestCase):
+    """
+    Refrescos concurrentes del mismo refresh token: solo uno obtiene tokens.
+    """
+
+    workers = 6
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="user@example.com", password="x")
+        _access, self.refresh_token = start_session(self.user, "portátil")
+
+    def rotate(self, barrier, results, returning):
+        try:
+            features = connection.features
+            with mock.patch.object(
+                    features, "can_return_columns_from_insert",
+                    returning and features.can_return_columns_from_insert):
+                barrier.wait()
+                while True:
+                    try:
+                        results.append(rotate_session(self.refresh_token))
+                        return
+                    except OperationalError:
+                        # SQLite no espera a los bloqueos de la caché
+                        # compartida: se reintenta la transacción completa.
+                        time.sleep(0.01)
+        finally:
+            connection.close()
+
+    def race(self, returning=True):
+        barrier = threading.Barrier(self.workers)
+        results = []
+        threads = [
+            threading.Thread(target=self.rotate, args=(barrier, results, returning))
+            for _ in range(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(results), self.workers)
+        winners = [tokens for tokens in results if tokens is not None]
+        self.assertEqual(len(winners), 1)
+        self.assertEqual(AuthToken.objects.filter(user=self.user).count(), 1)
+        session = AuthToken.objects.get(user=self.user)
+        self.assertEqual(session.device, "portátil")
+        self.assertIsNotNone(rotate_session(winners[0][1]))
+
+    def test_delete_returning(self):
+        self.race()
+
+    def test_select_for_update_fallback(self):
+        self.race(returning=False)
+
+    def test_pop_is_a_single_statement(self):
+        with self.assertNumQueries(1):
+            session = AuthToken.pop_by_refresh_token(self.refresh_token)
+        self.assertEqual(session.user_id, self.user.pk)
+
+        _access, refresh_token = start_session(self.user, "móvil")
+        with mock.patch.object(
+                connection.features, "can_return_columns_from_insert", False):
+            session = AuthToken.pop_by_refresh_token(
+                refresh_token, user_id=self.user.pk)
+            self.assertEqual(session.device, "móvil")
+            self.assertIsNone(AuthToken.pop_by_refresh_token(refresh_token))
+        self.assertFalse(AuthToken.objects.filter(user=self.user).exists())
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class AsyncAuthViewsTests(TransactionTestCase):
+    """
+    Vistas ASGI de login, registro y reset: el trabajo corre en el pool de
+    hashing y, con el pool lleno, se responde 503.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="user@example.com", password="secreta1")
+        self.pool = HashingPool(workers=1, max_queue=0)
+        patcher = mock.patch.object(async_views, "hashing_pool", self.pool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.pool._executor.shutdown)
+
+    async def post(self, view, data, **kwargs):
+        body = data if isinstance(data, str) else json.dumps(data)
+        request = AsyncRequestFactory().post(
+            "/", body, content_type="application/json")
+        response = await view.as_view()(request, **kwargs)
+        return response.status_code, json.loads(response.content), response
+
+    async def test_login(self):
+        status, data, _response = await self.post(
+            async_views.AsyncLoginView,
+            {"email": "user@example.com", "password": "secreta1"})
+        self.assertEqual(status, 200)
+        self.assertEqual(set(data), {"access_token", "refresh_token"})
+        self.assertEqual(decode_access_token(data["access_token"])["user_id"],
+                         str(self.user.pk))
+        status, data, _response = await self.post(
+            async_views.AsyncLoginView,
+            {"email": "user@example.com", "password": "incorrecta"})
+        self.assertEqual(status, 400)
+        self.assertEqual(self.pool.stats()["completed"], 2)
+
+    async def test_invalid_json(self):
+        status, data, _response = await self.post(
+            async_views.AsyncLoginView, "{no es json")
+        self.assertEqual((status, data), (400, {"error": "JSON inválido"}))
+        self.assertEqual(self.pool.stats()["completed"], 0)
+
+    async def test_login_throttled(self):
+        with mock.patch.object(LoginIPThrottle, "allow_request", return_value=False), \
+                mock.patch.object(LoginIPThrottle, "wait", return_value=4.2):
+            status, _data, response = await self.post(
+                async_views.AsyncLoginView,
+                {"email": "user@example.com", "password": "secreta1"})
+        self.assertEqual((status, response["Retry-After"]), (429, "5"))
+        self.assertEqual(self.pool.stats()["completed"], 0)
+
+    async def test_register(self):
+        status, _data, _response = await self.post(
+            async_views.AsyncRegisterView,
+            {"email": "nuevo@example.com", "password": "secreta1"})
+        self.assertEqual(status, 201)
+        user = await User.objects.aget(email="nuevo@example.com")
+        self.assertTrue(user.check_password("secreta1"))
+
+    async def test_reset_password(self):
+        reset = await PasswordResetToken.objects.acreate(user=self.user)
+        status, _data, _response = await self.post(
+            async_views.AsyncResetPasswordView,
+            {"token": str(reset.token), "password": "otra-clave"},
+            token="ignorado")
+        self.assertEqual(status, 200)
+        await self.user.arefresh_from_db()
+        self.assertTrue(self.user.check_password("otra-clave"))
+        self.assertFalse(await PasswordResetToken.objects.filter(pk=reset.pk).aexists())
+        status, _data, _response = await self.post(
+            async_views.AsyncResetPasswordView,
+            {"token": str(reset.token), "password": "otra-clave"})
+        self.assertEqual(status, 400)
+
+    async def test_busy_when_pool_is_full(self):
+        release = threading.Event()
+        self.pool.submit(release.wait)
+        try:
+            with self.assertLogs("modules.authentication.hashing", "WARNING"):
+                status, data, response = await self.post(
+                    async_views.AsyncLoginView,
+                    {"email": "user@example.com", "password": "secreta1"})
+        finally:
+            release.set()
+        self.assertEqual(status, 503)
+        self.assertEqual(response["Retry-After"], "1")
+        self.assertIn("error", data)
+        self.assertEqual(self.pool.stats()["rejected"], 1)
+        self.assertFalse(await AuthToken.objects.aexists())
+
+
+class RevocationFilterTests(TestCase):
+    """
+    Filtro de Bloom de tokens revocados: sin falsos negativos, al día por el
+    registro de versiones y reconstruido desde la BD cuando hace falta.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="user@example.com", password="x")
+        revocation_filter.reset()
+        revocation_filter.might_contain("0" * 64)
+        # Otro proceso: su propio filtro, la misma caché compartida.
+        self.other = RevocationFilter()
+        self.other.might_contain("0" * 64)
+
+    def revoke(self, device):
+        access_token, refresh_token = start_session(self.user, device)
+        session = AuthToken.objects.get(access_token_digest=hash_token(access_token))
+        with self.captureOnCommitCallbacks(execute=True):
+            end_session_by_id(self.user, session.id)
+        return access_token, refresh_token
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        bloom = BloomFilter(100)
+        digests = [hash_token(str(i)) for i in range(300)]
+        for digest in digests:
+            bloom.add(digest)
+        self.assertTrue(all(digest in bloom for digest in digests))
+        self.assertTrue(bloom.is_saturated())
+
+    def test_revoked_tokens_are_seen_by_other_processes(self):
+        revoked = [self.revoke(f"dispositivo {i}") for i in range(3)]
+        # Se aplican desde el registro de versiones, sin ir a la BD.
+        with self.assertNumQueries(0):
+            for access_token, refresh_token in revoked:
+                self.assertTrue(self.other.might_contain(hash_token(access_token)))
+                self.assertTrue(self.other.might_contain(hash_token(refresh_token)))
+        for access_token, refresh_token in revoked:
+            self.assertTrue(BlacklistedToken.is_blacklisted(access_token))
+            self.assertTrue(BlacklistedToken.is_blacklisted(refresh_token))
+
+    def test_rebuilds_from_database_when_log_is_lost(self):
+        access_token, _refresh = self.revoke("portátil")
+        version = cache.get(REVOCATION_VERSION_KEY)
+        cache.delete(f"{REVOCATION_VERSION_KEY}:{version}")
+        with self.assertNumQueries(2):
+            self.assertTrue(self.other.might_contain(hash_token(access_token)))
+
+    def test_unrevoked_token_skips_the_database(self):
+        access_token, _refresh = start_session(self.user, "portátil")
+        with self.assertNumQueries(0):
+            self.assertFalse(BlacklistedToken.is_blacklisted(access_token))
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class TokenDigestMigrationTests(TestCase):
+    """
+    Filas anteriores a los digests: lectura dual sobre las columnas en claro
+    y migración con ``backfill_token_digests``.
+    """
+
+    def setUp(self):
+        cache.clear()
+        revocation_filter.reset()
+        self.user = User.objects.create_user(email="user@example.com", password="x")
+        self.expires_at = timezone.now() + datetime.timedelta(days=1)
+
+    def legacy_session(self, n):
+        return AuthToken.objects.create(
+            user=self.user, access_token=f"access-{n}",
+            refresh_token=f"refresh-{n}", expires_at=self.expires_at)
+
+    def backfill(self, *args):
+        out = StringIO()
+        call_command("backfill_token_digests", *args, stdout=out)
+        return out.getvalue()
+
+    def test_dual_read_finds_legacy_rows(self):
+        session = self.legacy_session(1)
+        BlacklistedToken.objects.create(token="revoked", expires_at=self.expires_at)
+        with mock.patch.object(models, "TOKEN_DIGEST_DUAL_READ", False):
+            self.assertIsNone(AuthToken.pop_by_refresh_token("refresh-1"))
+            self.assertFalse(BlacklistedToken.is_blacklisted("revoked"))
+        self.assertEqual(AuthToken.pop_by_refresh_token("refresh-1").pk, session.pk)
+        self.assertTrue(BlacklistedToken.is_blacklisted("revoked"))
+
+    def test_legacy_lookups_use_an_index(self):
+        cases = [
+            (AuthToken.objects.filter(access_token="x"),
+             "authtoken_legacy_access_idx"),
+            (AuthToken.objects.filter(refresh_token="x"),
+             "authtoken_legacy_refresh_idx"),
+            (BlacklistedToken.objects.filter(token="x"),
+             "blacklist_legacy_token_idx"),
+        ]
+        for queryset, index in cases:
+            with self.subTest(index=index):
+                self.assertIn(index, queryset.explain())
+
+    def test_backfill(self):
+        sessions = [self.legacy_session(n) for n in range(5)]
+        BlacklistedToken.objects.create(token="revoked", expires_at=self.expires_at)
+        output = self.backfill("--batch-size", "2")
+        self.assertIn("AuthToken: 5 filas migradas.", output)
+        self.assertIn("BlacklistedToken: 1 filas migradas.", output)
+        for session in sessions:
+            session.refresh_from_db()
+            self.assertEqual(session.access_token_digest,
+                             hash_token(session.access_token))
+            self.assertEqual(session.refresh_token_digest,
+                             hash_token(session.refresh_token))
+        # Lo ya migrado no se vuelve a procesar.
+        self.assertIn("AuthToken: 0 filas migradas.", self.backfill())
+        with mock.patch.object(models, "TOKEN_DIGEST_DUAL_READ", False):
+            self.assertEqual(
+                AuthToken.pop_by_access_token("access-3").pk, sessions[3].pk)
+            self.assertTrue(BlacklistedToken.is_blacklisted("revoked"))
+
+    def test_backfill_clear_plaintext(self):
+        self.legacy_session(1)
+        BlacklistedToken.objects.create(token="revoked", expires_at=self.expires_at)
+        self.backfill("--clear-plaintext")
+        self.assertFalse(AuthToken.objects.filter(access_token__isnull=False).exists())
+        self.assertFalse(AuthToken.objects.filter(refresh_token__isnull=False).exists())
+        self.assertFalse(BlacklistedToken.objects.filter(token__isnull=False).exists())
+        with mock.patch.object(models, "TOKEN_DIGEST_DUAL_READ", False):
+            self.assertIsNotNone(AuthToken.pop_by_refresh_token("refresh-1"))
+            self.assertTrue(BlacklistedToken.is_blacklisted("revoked"))
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class SweeperTests(TestCase):
+    """
+    Barrido de tokens caducados: por lotes y solo sobre filas caducadas.
+    """
+
+    def setUp(self):
+        self.now = timezone.now()
+        self.users = [
+            User.objects.create_user(email=f"user{i}@example.com", password="x")
+            for i in range(3)
+        ]
+
+    def sessions(self, count, expires_at):
+        start = AuthToken.objects.count()
+        AuthToken.objects.bulk_create([
+            AuthToken(user=self.users[0], expires_at=expires_at,
+                      access_token_digest=hash_token(f"access-{start + n}"),
+                      refresh_token_digest=hash_token(f"refresh-{start + n}"))
+            for n in range(count)
+        ])
+
+    def deletes(self, queryset, batch_size):
+        with CaptureQueriesContext(connection) as context:
+            deleted = delete_in_batches(queryset, batch_size, pause=0)
+        statements = [query["sql"] for query in context.captured_queries
+                      if query["sql"].startswith("DELETE")]
+        return deleted, len(statements)
+
+    def test_delete_in_batches(self):
+        self.sessions(5, self.now - datetime.timedelta(minutes=1))
+        self.sessions(2, self.now + datetime.timedelta(days=1))
+        expired = AuthToken.objects.filter(expires_at__lte=self.now)
+        self.assertEqual(self.deletes(expired, 2), (5, 3))
+        self.assertEqual(AuthToken.objects.count(), 2)
+
+    def test_delete_in_batches_exact_multiple(self):
+        self.sessions(4, self.now - datetime.timedelta(minutes=1))
+        self.assertEqual(self.deletes(AuthToken.objects.all(), 2), (4, 2))
+        self.assertEqual(self.deletes(AuthToken.objects.all(), 2), (0, 0))
+
+    def seed(self):
+        expired, live = (self.now - datetime.timedelta(minutes=1),
+                         self.now + datetime.timedelta(days=1))
+        self.sessions(3, expired)
+        self.sessions(1, live)
+        BlacklistedToken.objects.bulk_create([
+            BlacklistedToken(token_digest=hash_token("old"), expires_at=expired),
+            BlacklistedToken(token_digest=hash_token("new"), expires_at=live),
+        ])
+        old = self.now - datetime.timedelta(days=2)
+        PasswordResetToken.objects.create(user=self.users[0])
+        PasswordResetToken.objects.create(user=self.users[1])
+        PasswordResetToken.objects.filter(user=self.users[1]).update(created_at=old)
+        for user, verified in zip(self.users, (False, True, False)):
+            EmailVerification.objects.create(user=user, is_verified=verified)
+        # Caducadas: una pendiente y una completada (que se conserva).
+        EmailVerification.objects.filter(user__in=self.users[:2]).update(
+            created_at=old)
+
+    def test_sweep_deletes_only_expired_rows(self):
+        self.seed()
+        stats = {item["model"]: item for item in sweep(batch_size=2, pause=0)}
+        self.assertEqual(
+            {model: (item["deleted"], item["remaining_rows"])
+             for model, item in stats.items()},
+            {"AuthToken": (3, 1), "BlacklistedToken": (1, 1),
+             "PasswordResetToken": (1, 1), "EmailVerification": (1, 2)})
+        self.assertTrue(AuthToken.objects.filter(expires_at__gt=self.now).exists())
+        self.assertTrue(BlacklistedToken.objects.filter(
+            token_digest=hash_token("new")).exists())
+        self.assertTrue(PasswordResetToken.objects.filter(user=self.users[0]).exists())
+        self.assertFalse(EmailVerification.objects.filter(user=self.users[0]).exists())
+
+    def test_command_reports_counts(self):
+        self.seed()
+        out = StringIO()
+        call_command("sweep_expired_tokens", "--batch-size", "2", "--pause", "0",
+                     stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[0].startswith("AuthToken: 3 filas borradas en "))
+        self.assertTrue(lines[0].endswith("quedan 1 filas."))
+        self.assertTrue(lines[3].startswith("EmailVerification: 1 filas borradas"))
+        self.assertTrue(lines[3].endswith("quedan 2 filas."))
+
+
+class UserCacheTests(TestCase):
+    """
+    Caché de usuarios por proceso invalidada por ``updated_date``.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email="user@example.com", password="x", first_name="Ana")
+        invalidate_user(self.user)
+
+    def test_served_from_memory(self):
+        get_cached_user(self.user.id)
+        with self.assertNumQueries(0):
+            cached = get_cached_user(self.user.id)
+        self.assertEqual(cached.first_name, "Ana")
+        # Cada llamada recibe su propia copia.
+        cached.first_name = "Otra"
+        self.assertEqual(get_cached_user(self.user.id).first_name, "Ana")
+
+    def test_invalidated_when_updated_date_changes(self):
+        get_cached_user(self.user.id)
+        self.user.first_name = "Beatriz"
+        self.user.save()
+        invalidate_user(self.user)
+        with self.assertNumQueries(1):
+            self.assertEqual(get_cached_user(self.user.id).first_name, "Beatriz")
+
+    def test_stamp_from_another_process_discards_local_copy(self):
+        get_cached_user(self.user.id)
+        User.objects.filter(pk=self.user.pk).update(
+            is_active=False, updated_date=self.user.updated_date + datetime.timedelta(seconds=1))
+        # Otro proceso publica el nuevo updated_date sin tocar esta caché local.
+        self.user.refresh_from_db()
+        cache.set(USER_STAMP_KEY.format(self.user.id),
+                  self.user.updated_date.timestamp(), timeout=None)
+        self.assertFalse(get_cached_user(self.user.id).is_active)
+
+
+class FakeSMTPConnection:
+    """
+    Conexión de correo que falla al enviar a ``fail_for`` y, tras el primer
+    fallo, queda caída como una conexión SMTP cerrada por el servidor.
+    """
+
+    def __init__(self, outbox, fail_for=(), fail_open=False):
+        self.outbox = outbox
+        self.fail_for = set(fail_for)
+        self.fail_open = fail_open
+        self.broken = False
+
+    def open(self):
+        if self.fail_open:
+            raise OSError("Connection refused")
+
+    def close(self):
+        pass
+
+    def send_messages(self, messages):
+        for message in messages:
+            if self.broken or self.fail_for & set(message.to):
+                self.broken = True
+                raise OSError("Connection unexpectedly closed")
+            self.outbox.append(message)
+        return len(messages)
+
+
+class OutboxTests(TestCase):
+    """
+    Outbox de correo transaccional y su envío en segundo plano.
+    """
+
+    def setUp(self):
+        self.sent = []
+        self.connections = []
+
+    def enqueue(self, *recipients):
+        return [
+            OutboxEmail.objects.create(
+                subject="Hola", template_name="emails/verify_email.html",
+                context={"user": {"first_name": "Ana"}}, recipient=recipient)
+            for recipient in recipients
+        ]
+
+    def drain(self, **connection_kwargs):
+        def get_connection(**kwargs):
+            connection = FakeSMTPConnection(self.sent, **connection_kwargs)
+            self.connections.append(connection)
+            return connection
+
+        with mock.patch.object(mailer, "get_connection", get_connection), \
+                mock.patch.object(mailer.logger, "warning"):
+            return mailer.drain_outbox()
+
+    def test_reconnects_after_a_failed_send(self):
+        self.enqueue("a@example.com", "roto@example.com", "b@example.com")
+        self.assertEqual(self.drain(fail_for={"roto@example.com"}), (2, 1))
+        self.assertEqual(
+            sorted(message.to[0] for message in self.sent),
+            ["a@example.com", "b@example.com"])
+        self.assertEqual(len(self.connections), 2)
+        failed = OutboxEmail.objects.get(recipient="roto@example.com")
+        self.assertEqual((failed.status, failed.attempts), (OutboxEmail.PENDING, 1))
+
+    def test_connection_error_releases_claimed_rows(self):
+        self.enqueue("a@example.com", "b@example.com")
+        with self.assertRaises(OSError):
+            self.drain(fail_open=True)
+        for email in OutboxEmail.objects.all():
+            self.assertEqual(email.status, OutboxEmail.PENDING)
+            self.assertEqual(email.attempts, 0)
+            self.assertIsNone(email.claimed_by)
+        self.assertEqual(len(mailer.claim_batch()), 2)
+
+    def test_reset_email_is_committed_with_its_token(self):
+        user = User.objects.create_user(email="user@example.com", password="x")
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(
+                "/api/auth/forgot-password/", {"email": user.email}, format="json")
+        self.assertEqual(response.status_code, 200)
+        email = OutboxEmail.objects.get(recipient=user.email)
+        token = PasswordResetToken.objects.get(user=user).token
+        self.assertIn(str(token), email.context["reset_url"])
+        self.assertEqual(email.status, OutboxEmail.PENDING)
+        # Los workers solo se despiertan al confirmar la transacción.
+        self.assertEqual(callbacks, [mailer.notify_outbox])
+
+    def test_no_email_without_its_token(self):
+        user = User.objects.create_user(email="user@example.com", password="x")
+        with mock.patch.object(OutboxEmail.objects, "create",
+                               side_effect=OperationalError("disk full")):
+            with self.assertRaises(OperationalError):
+                self.client.post(
+                    "/api/auth/forgot-password/", {"email": user.email},
+                    format="json")
+        self.assertFalse(PasswordResetToken.objects.filter(user=user).exists())
+
+    def test_retry_with_backoff_until_failed(self):
+        email, = self.enqueue("roto@example.com")
+        start = timezone.now()
+        self.assertEqual(self.drain(fail_for={"roto@example.com"}), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), (OutboxEmail.PENDING, 1))
+        self.assertGreaterEqual(
+            email.next_attempt_at,
+            start + datetime.timedelta(seconds=mailer.OUTBOX_RETRY_BASE))
+        self.assertIn("unexpectedly closed", email.last_error)
+        # No se reintenta antes de tiempo.
+        self.assertEqual(mailer.claim_batch(), [])
+
+        for attempt in range(2, mailer.OUTBOX_MAX_ATTEMPTS + 1):
+            OutboxEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+            self.drain(fail_for={"roto@example.com"})
+            email.refresh_from_db()
+            self.assertEqual(email.attempts, attempt)
+        self.assertEqual(email.status, OutboxEmail.FAILED)
+        self.assertEqual(mailer.claim_batch(), [])
+
+    def test_backoff_doubles(self):
+        email, = self.enqueue("roto@example.com")
+        delays = []
+        for _ in range(3):
+            OutboxEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+            before = timezone.now()
+            self.drain(fail_for={"roto@example.com"})
+            email.refresh_from_db()
+            delays.append(round((email.next_attempt_at - before).total_seconds()))
+        base = mailer.OUTBOX_RETRY_BASE
+        self.assertEqual(delays, [base, base * 2, base * 4])
+
+    def test_stale_sending_rows_are_reclaimed(self):
+        stale, fresh = self.enqueue("viejo@example.com", "nuevo@example.com")
+        now = timezone.now()
+        OutboxEmail.objects.filter(pk=stale.pk).update(
+            status=OutboxEmail.SENDING, claimed_by=uuid.uuid4(),
+            claimed_at=now - mailer.OUTBOX_CLAIM_TIMEOUT - datetime.timedelta(seconds=1))
+        OutboxEmail.objects.filter(pk=fresh.pk).update(
+            status=OutboxEmail.SENDING, claimed_by=uuid.uuid4(), claimed_at=now)
+        self.assertEqual(self.drain(), (1, 0))
+        self.assertEqual([message.to for message in self.sent], [["viejo@example.com"]])
+        fresh.refresh_from_db()
+        self.assertEqual(fresh.status, OutboxEmail.SENDING)
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class ThrottleTests(APITestCase):
+    """
+    Token buckets de login, refresh y forgot-password.
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def login(self, email="user@example.com"):
+        return self.client.post(
+            "/api/auth/login/", {"email": email, "password": "incorrecta"},
+            format="json")
+
+    def test_login_email_bucket(self):
+        # login_email: 5/min
+        for _ in range(5):
+            self.assertEqual(self.login().status_code, 400)
+        response = self.login()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(int(response["Retry-After"]), 12)
+        # Otro email tiene su propio cubo; el email se normaliza.
+        self.assertEqual(self.login("otro@example.com").status_code, 400)
+        self.assertEqual(self.login(" USER@example.com").status_code, 429)
+
+    def test_bucket_refills(self):
+        now = time.time()
+        with mock.patch("modules.authentication.throttling.time.time",
+                        return_value=now):
+            for _ in range(5):
+                self.login()
+            self.assertEqual(self.login().status_code, 429)
+        with mock.patch("modules.authentication.throttling.time.time",
+                        return_value=now + 12):
+            self.assertEqual(self.login().status_code, 400)
+            self.assertEqual(self.login().status_code, 429)
+
+    def test_refresh_token_bucket(self):
+        # refresh_token: 5/min por prefijo del token
+        for _ in range(5):
+            response = self.client.post(
+                "/api/auth/refresh/", {"refresh_token": "desconocido"}, format="json")
+            self.assertEqual(response.status_code, 401)
+        response = self.client.post(
+            "/api/auth/refresh/", {"refresh_token": "desconocido"}, format="json")
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class EmailAuthBackendTests(APITestCase):
+    """
+    Login por email en una sola pasada.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="user@example.com", password="clave-segura")
+
+    def setUp(self):
+        cache.clear()
+
+    def login(self, email="user@example.com", password="clave-segura"):
+        return self.client.post(
+            "/api/auth/login/", {"email": email, "password": password},
+            format="json")
+
+    def test_inactive_user_gets_the_generic_error(self):
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        response = self.login()
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.data["non_field_errors"], ["Credenciales incorrectas."])
+        self.assertEqual(
+            self.login(password="incorrecta").data, response.data)
+
+    def count_hashes(self, email, password):
+        with mock.patch.object(
+                MD5PasswordHasher, "encode", autospec=True,
+                side_effect=MD5PasswordHasher.encode) as encode:
+            with self.assertNumQueries(1):
+                user = authenticate(email=email, password=password)
+        return user, encode.call_count
+
+    def test_valid_credentials(self):
+        user, hashes = self.count_hashes("user@example.com", "clave-segura")
+        self.assertEqual((user, hashes), (self.user, 1))
+
+    def test_inactive_user_is_rejected(self):
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        user, _hashes = self.count_hashes("user@example.com", "clave-segura")
+        self.assertIsNone(user)
+
+    def test_unknown_email_costs_one_hash(self):
+        # Mismo trabajo que una contraseña incorrecta: una consulta y un hash.
+        self.assertEqual(
+            self.count_hashes("nadie@example.com", "clave-segura"), (None, 1))
+        self.assertEqual(
+            self.count_hashes("user@example.com", "incorrecta"), (None, 1))
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class SessionDeviceTests(APITestCase):
+    """
+    Sesiones por dispositivo y su ``last_seen_at``.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="user@example.com", password="clave-segura")
+
+    def setUp(self):
+        cache.clear()
+        revocation_filter.reset()
+        revocation_filter.might_contain("0" * 64)
+
+    def login(self, **extra):
+        response = self.client.post("/api/auth/login/", {
+            "email": "user@example.com", "password": "clave-segura", **extra,
+        }, format="json", HTTP_USER_AGENT="Mozilla/5.0 (iPhone)")
+        self.assertEqual(response.status_code, 200)
+        return response.data["access_token"]
+
+    def test_same_user_agent_keeps_both_sessions(self):
+        self.login()
+        self.login()
+        self.assertEqual(
+            list(AuthToken.objects.values_list("device", flat=True)),
+            ["Mozilla/5.0 (iPhone)"] * 2)
+
+    def test_same_device_id_replaces_the_session(self):
+        first = self.login(device_id="a1")
+        self.login(device_id="b2")
+        self.login(device_id="a1")
+        self.assertEqual(
+            sorted(AuthToken.objects.values_list("device_id", flat=True)),
+            ["a1", "b2"])
+        self.assertFalse(AuthToken.objects.filter(
+            access_token_digest=hash_token(first)).exists())
+
+    def test_rotation_keeps_the_device_id(self):
+        _access, refresh_token = start_session(self.user, "portátil", "a1")
+        rotate_session(refresh_token)
+        self.assertEqual(AuthToken.objects.get().device_id, "a1")
+
+    def test_last_seen_is_bumped_at_most_once_per_interval(self):
+        access_token = self.login()
+        session = AuthToken.objects.get()
+        issued = session.last_seen_at
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token}")
+        # Recién emitida no hace falta actualizarla: carga del usuario y lista.
+        with self.assertNumQueries(2):
+            self.client.get("/api/auth/sessions/")
+
+        # Pasado el intervalo, un UPDATE y después nada hasta el siguiente.
+        cache.delete(SESSION_TOUCH_KEY.format(hash_token(access_token)))
+        with self.assertNumQueries(2):
+            self.client.get("/api/auth/sessions/")
+        with self.assertNumQueries(1):
+            self.client.get("/api/auth/sessions/")
+        session.refresh_from_db()
+        self.assertGreater(session.last_seen_at, issued)
+
+
+class DecodedTokenCacheTests(APITestCase):
+    """
+    Caché de payloads JWT verificados: nunca sirve tokens revocados ni
+    caducados.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="user@example.com", password="x")
+
+    def setUp(self):
+        cache.clear()
+        utils._decoded_tokens.clear()
+        revocation_filter.reset()
+        self.access_token, _refresh = start_session(self.user, "portátil")
+
+    def test_verified_once(self):
+        with mock.patch.object(
+                type(get_key_ring()), "decode", autospec=True,
+                side_effect=type(get_key_ring()).decode) as decode:
+            payload = decode_access_token(self.access_token)
+            self.assertEqual(decode_access_token(self.access_token), payload)
+        self.assertEqual(decode.call_count, 1)
+
+    def test_revoked_token_is_dropped(self):
+        decode_access_token(self.access_token)
+        digest = hash_token(self.access_token)
+        session = AuthToken.objects.get(access_token_digest=digest)
+        with self.captureOnCommitCallbacks(execute=True):
+            end_session_by_id(self.user, session.id)
+        self.assertIsNone(utils._decoded_tokens.get(digest))
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.access_token}")
+        response = self.client.get("/api/auth/sessions/")
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.data["detail"], "Token inválido o revocado.")
+
+    def test_revocation_from_another_process_drops_the_entry(self):
+        revocation_filter.might_contain("0" * 64)
+        decode_access_token(self.access_token)
+        digest = hash_token(self.access_token)
+        # Otro proceso solo deja la revocación en el registro de versiones.
+        publish_revocation(digest)
+        self.assertTrue(revocation_filter.might_contain(digest))
+        self.assertIsNone(utils._decoded_tokens.get(digest))
+
+    def test_expired_token_is_not_served(self):
+        exp = int(time.time()) + 1
+        token = get_key_ring().encode(
+            dict(decode_access_token(self.access_token), exp=exp))
+        decode_access_token(token)
+        time.sleep(exp - time.time() + 0.05)
+        with self.assertRaises(jwt.ExpiredSignatureError):
+            decode_access_token(token)
+
+
+def ed25519_pem_pair():
+    private_key = Ed25519PrivateKey.generate()
+    private_pem = private_key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption())
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo)
+    return private_pem, public_pem
+
+
+class KeyRingTests(SimpleTestCase):
+    """
+    Anillo de claves de firma: rotación, verificación con claves antiguas y
+    rechazo de tokens HS256 que se hacen pasar por claves asimétricas.
+    """
+
+    payload = {"user_id": "1", "exp": int(time.time()) + 600}
+
+    def setUp(self):
+        self.old_private, self.old_public = ed25519_pem_pair()
+        self.new_private, _new_public = ed25519_pem_pair()
+        self.old_ring = KeyRing([
+            {"kid": "2026-04", "algorithm": "EdDSA", "private_key": self.old_private},
+        ])
+        self.ring = KeyRing([
+            {"kid": "2026-10", "algorithm": "EdDSA", "private_key": self.new_private},
+            {"kid": "2026-04", "algorithm": "EdDSA", "public_key": self.old_public},
+        ])
+
+    def test_rotation(self):
+        old_token = self.old_ring.encode(self.payload)
+        new_token = self.ring.encode(self.payload)
+        self.assertEqual(jwt.get_unverified_header(new_token)["kid"], "2026-10")
+        # El token firmado antes de rotar sigue verificando con su kid.
+        self.assertEqual(self.ring.decode(old_token)["user_id"], "1")
+        self.assertEqual(self.ring.decode(new_token)["user_id"], "1")
+        # La clave retirada ya no puede verificar tokens de la nueva.
+        with self.assertRaises(jwt.InvalidTokenError):
+            self.old_ring.decode(new_token)
+
+    def test_jwks_publishes_only_public_keys(self):
+        keys = self.ring.jwks()["keys"]
+        self.assertEqual([key["kid"] for key in keys], ["2026-10", "2026-04"])
+        self.assertTrue(all("d" not in key for key in keys))
+
+    def forge_hs256(self, secret, kid):
+        # PyJWT se niega a usar un PEM como secreto HMAC: se firma a mano.
+        segments = [
+            base64.urlsafe_b64encode(json.dumps(part).encode()).rstrip(b"=")
+            for part in ({"alg": "HS256", "typ": "JWT", "kid": kid}, self.payload)
+        ]
+        signing_input = b".".join(segments)
+        signature = hmac.new(secret, signing_input, hashlib.sha256).digest()
+        return (signing_input + b"." + base64.urlsafe_b64encode(
+            signature).rstrip(b"=")).decode()
+
+    def test_hs256_with_forged_kid_is_rejected(self):
+        # Firmado con SECRET_KEY o con la clave pública como secreto HMAC,
+        # declarando el kid de una clave asimétrica.
+        for secret in (settings.SECRET_KEY.encode(), self.old_public):
+            with self.assertRaises(jwt.InvalidTokenError):
+                self.ring.decode(self.forge_hs256(secret, "2026-04"))
+
+    def test_unknown_kid_is_rejected(self):
+        token = KeyRing([{"kid": "otra", "private_key": ed25519_pem_pair()[0]}]).encode(
+            self.payload)
+        with self.assertRaises(jwt.InvalidTokenError):
+            self.ring.decode(token)
+
+    def test_legacy_hs256_without_kid(self):
+        token = jwt.encode(self.payload, settings.SECRET_KEY, algorithm="HS256")
+        with override_settings(JWT_ACCEPT_LEGACY_HS256=True):
+            self.assertEqual(self.ring.decode(token)["user_id"], "1")
+        with override_settings(JWT_ACCEPT_LEGACY_HS256=False):
+            with self.assertRaises(jwt.InvalidTokenError):
+                self.ring.decode(token)
+
+
+class IntrospectionTests(APITestCase):
+    """
+    Introspección RFC 7662: ``active: false`` para todo lo que
+    ``JWTAuthentication`` rechazaría.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="user@example.com", password="x")
+        cls.staff = User.objects.create_user(
+            email="staff@example.com", password="x", is_staff=True)
+
+    def setUp(self):
+        cache.clear()
+        utils._decoded_tokens.clear()
+        revocation_filter.reset()
+        self.access_token, _refresh = start_session(self.user, "portátil")
+        _api_key, raw_key = create_api_key(
+            self.staff, "pasarela", ["introspection:read"])
+        self.client.credentials(HTTP_AUTHORIZATION=f"Api-Key {raw_key}")
+
+    def introspect(self, token):
+        response = self.client.post(
+            "/api/auth/introspect/", {"token": token}, format="json")
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_active_token(self):
+        response = self.introspect(self.access_token)
+        self.assertTrue(response.data["active"])
+        self.assertEqual(response.data["sub"], str(self.user.id))
+        self.assertIn("private", response["Cache-Control"])
+
+    def test_revoked_token(self):
+        session = AuthToken.objects.get(
+            access_token_digest=hash_token(self.access_token))
+        with self.captureOnCommitCallbacks(execute=True):
+            end_session_by_id(self.user, session.id)
+        self.assertEqual(self.introspect(self.access_token).data, {"active": False})
+
+    def test_logged_out_everywhere(self):
+        end_all_sessions(self.user)
+        self.assertEqual(self.introspect(self.access_token).data, {"active": False})
+
+    def test_expired_token(self):
+        payload = dict(decode_access_token(self.access_token),
+                       exp=int(time.time()) - 1)
+        token = get_key_ring().encode(payload)
+        self.assertEqual(self.introspect(token).data, {"active": False})
+
+    def test_foreign_tokens(self):
+        payload = decode_access_token(self.access_token)
+        foreign = [
+            jwt.encode(payload, "otro-secreto", algorithm="HS256"),
+            KeyRing([{"kid": "ajena", "private_key": ed25519_pem_pair()[0]}]).encode(
+                payload),
+            "no-es-un-jwt",
+        ]
+        response = self.client.post(
+            "/api/auth/introspect/", {"tokens": foreign}, format="json")
+        self.assertEqual(response.data["results"], [{"active": False}] * 3)
+
+    def test_batch_keeps_order_and_shortest_max_age(self):
+        response = self.client.post(
+            "/api/auth/introspect/",
+            {"tokens": ["no-es-un-jwt", self.access_token]}, format="json")
+        self.assertEqual(
+            [result["active"] for result in response.data["results"]],
+            [False, True])
+        self.assertIn("max-age=60", response["Cache-Control"])
+
+    def test_needs_scope_or_staff(self):
+        _api_key, raw_key = create_api_key(self.staff, "otra", ["events:read"])
+        self.client.credentials(HTTP_AUTHORIZATION=f"Api-Key {raw_key}")
+        response = self.client.post(
+            "/api/auth/introspect/", {"token": self.access_token}, format="json")
+        self.assertEqual(response.status_code, 403)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.access_token}")
+        response = self.client.post(
+            "/api/auth/introspect/", {"token": self.access_token}, format="json")
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,103 @@
+import time
+
+from django.core.cache import cache as default_cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from modules.authentication.utils import hash_token
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Token bucket guardado en la caché de Django. La tasa se lee de
+    ``DEFAULT_THROTTLE_RATES[scope]`` con el formato de DRF ("5/min"): el
+    cubo admite ráfagas de ese tamaño y se rellena de forma continua.
+
+    Las subclases indican qué identifica al cliente en ``get_ident_key``;
+    si devuelve ``None`` la petición no se limita.
+    """
+
+    scope = None
+    cache = default_cache
+    cache_format = "throttle:%(scope)s:%(ident)s"
+    durations = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+    def __init__(self):
+        rate = api_settings.DEFAULT_THROTTLE_RATES[self.scope]
+        num, period = rate.split("/")
+        self.capacity = int(num)
+        self.period = self.durations[period[0]]
+        self.refill_rate = self.capacity / self.period
+        self.wait_seconds = None
+
+    def get_ident_key(self, request):
+        return self.get_ident(request)
+
+    def get_data(self, request):
+        data = getattr(request, "data", None)
+        return data if hasattr(data, "get") else {}
+
+    def allow_request(self, request, view):
+        ident = self.get_ident_key(request)
+        if ident is None:
+            return True
+
+        key = self.cache_format % {"scope": self.scope, "ident": ident}
+        now = time.time()
+        tokens, updated = self.cache.get(key, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - updated) * self.refill_rate)
+        if tokens < 1:
+            self.wait_seconds = (1 - tokens) / self.refill_rate
+            return False
+
+        self.cache.set(key, (tokens - 1, now), timeout=self.period)
+        return True
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class FieldThrottle(TokenBucketThrottle):
+    """
+    Limita por el valor (normalizado y con hash) de un campo del cuerpo.
+    """
+
+    field = None
+    prefix_length = None
+
+    def get_ident_key(self, request):
+        value = self.get_data(request).get(self.field)
+        if not isinstance(value, str) or not value.strip():
+            return None
+        value = value.strip().lower()
+        if self.prefix_length:
+            value = value[:self.prefix_length]
+        return hash_token(value)[:32]
+
+
+class LoginIPThrottle(TokenBucketThrottle):
+    scope = "login_ip"
+
+
+class LoginEmailThrottle(FieldThrottle):
+    scope = "login_email"
+    field = "email"
+
+
+class RefreshIPThrottle(TokenBucketThrottle):
+    scope = "refresh_ip"
+
+
+class RefreshTokenThrottle(FieldThrottle):
+    scope = "refresh_token"
+    field = "refresh_token"
+    prefix_length = 8
+
+
+class ForgotPasswordIPThrottle(TokenBucketThrottle):
+    scope = "forgot_password_ip"
+
+
+class ForgotPasswordEmailThrottle(FieldThrottle):
+    scope = "forgot_password_email"
+    field = "email"
@@ -1,5 +1,6 @@
 # apps/authentication/urls.py
 
+from django.conf import settings
 from django.urls import path
 from modules.authentication.views import LoginView, RefreshTokenView, LogoutView
 from modules.authentication.views import (
@@ -7,17 +8,41 @@ from modules.authentication.views import (
     VerifyEmailView,
     ForgotPasswordView,
     ResetPasswordView,
+    HashingPoolStatsView,
+    SessionListView,
+    SessionDetailView,
+    LogoutAllView,
+    JWKSView,
+    IntrospectView,
 )
 
+# Bajo ASGI las vistas que calculan hashes usan el pool de hashing
+if getattr(settings, "ASYNC_AUTH_VIEWS", False):
+    from modules.authentication import async_views
+
+    login_view = async_views.AsyncLoginView.as_view()
+    register_view = async_views.AsyncRegisterView.as_view()
+    reset_password_view = async_views.AsyncResetPasswordView.as_view()
+else:
+    login_view = LoginView.as_view()
+    register_view = RegisterView.as_view()
+    reset_password_view = ResetPasswordView.as_view()
+
 urlpatterns = [
     # Iniciar sesión
-    path("login/", LoginView.as_view(), name="auth-login"),
+    path("login/", login_view, name="auth-login"),
     # Refrescar token de acceso
     path("refresh/", RefreshTokenView.as_view(), name="auth-refresh"),
     # Cerrar sesión
     path("logout/", LogoutView.as_view(), name="auth-logout"),
+    # Cerrar sesión en todos los dispositivos
+    path("logout-all/", LogoutAllView.as_view(), name="auth-logout-all"),
+    # Sesiones abiertas por dispositivo
+    path("sessions/", SessionListView.as_view(), name="auth-sessions"),
+    path("sessions/<int:id>/", SessionDetailView.as_view(),
+         name="auth-session-detail"),
     # Registrarse
-    path("register/", RegisterView.as_view(), name="auth-register"),
+    path("register/", register_view, name="auth-register"),
     # email para verificar
     path("verify-email/", VerifyEmailView.as_view(), name="auth-verify-email"),
     #
@@ -26,7 +51,14 @@ urlpatterns = [
     # Resetear contrasena
     path(
         "reset-password/<str:token>/",
-        ResetPasswordView.as_view(),
+        reset_password_view,
         name="auth-reset-password",
     ),
+    # Claves públicas para verificar tokens fuera de esta API
+    path("jwks.json", JWKSView.as_view(), name="auth-jwks"),
+    # Estado de tokens para otros servicios (RFC 7662)
+    path("introspect/", IntrospectView.as_view(), name="auth-introspect"),
+    # Métricas del pool de hashing
+    path("hashing-stats/", HashingPoolStatsView.as_view(),
+         name="auth-hashing-stats"),
 ]
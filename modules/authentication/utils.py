@@ -1,61 +1,108 @@
-import jwt
+import hashlib
+import time
 import uuid
 from django.conf import settings
 from django.utils.timezone import now, timedelta
 
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
+from modules.common.lru import LRUCache
+from modules.authentication.keys import get_key_ring
 
 
+ACCESS_TOKEN_LIFETIME = timedelta(minutes=15)
+REFRESH_TOKEN_LIFETIME = timedelta(days=7)
+
+# Payloads ya verificados por digest del token, hasta su "exp".
+_decoded_tokens = LRUCache(
+    maxsize=getattr(settings, "JWT_DECODE_CACHE_SIZE", 4096))
+
 def generate_access_token(user):
     payload = {
         "user_id": str(user.id),
-        "exp": now() + timedelta(minutes=15),
+        # Claims para el modo "claims-only" de JWTAuthentication
+        "is_staff": user.is_staff,
+        "is_active": user.is_active,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+        # Generación de sesiones: "cerrar sesión en todos los dispositivos"
+        # la incrementa e invalida todos los tokens anteriores
+        "gen": user.session_generation,
+        # Identificador único: dos tokens del mismo usuario emitidos en el
+        # mismo segundo no deben coincidir
+        "jti": uuid.uuid4().hex,
+        "exp": now() + ACCESS_TOKEN_LIFETIME,
         "iat": now(),
     }
-    return jwt.encode(payload, settings.SECRET_KEY, algorithm="HS256")
+    return get_key_ring().encode(payload)
+
+
+def decode_access_token(token):
+    """
+    ``jwt.decode`` con caché: un mismo access token se verifica una vez y
+    las siguientes peticiones reutilizan el payload hasta que caduca.
+    Lanza las mismas excepciones que ``jwt.decode``.
+    """
+    digest = hash_token(token)
+    payload = _decoded_tokens.get(digest)
+    if payload is not None:
+        return payload
+
+    payload = get_key_ring().decode(token)
+    ttl = payload["exp"] - time.time() if "exp" in payload else None
+    if ttl is None or ttl > 0:
+        _decoded_tokens.set(digest, payload, ttl=ttl)
+    return payload
+
+
+def forget_decoded_token(digest):
+    _decoded_tokens.delete(digest)
 
 
 def generate_refresh_token():
     return str(uuid.uuid4())
 
 
+def hash_token(token):
+    """Digest SHA-256 (64 caracteres hex) con el que se guardan los tokens."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
 # apps/authentication/utils.py
 
 
+def _user_context(user):
+    return {
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+        "email": user.email,
+    }
+
+
 def send_verification_email(user, token):
-    subject = "Confirma tu correo electrónico"
-    verification_url = f"{settings.FRONTEND_URL}/verify-email/?token={token}"
+    """
+    Encola el correo de verificación en el outbox; lo envía ``mailer``.
+    """
+    from modules.authentication.models import OutboxEmail
 
-    html_message = render_to_string(
-        "emails/verify_email.html", {"user": user,
-                                     "verification_url": verification_url}
-    )
-    plain_message = strip_tags(html_message)
-
-    send_mail(
-        subject=subject,
-        message=plain_message,
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[user.email],
-        html_message=html_message,
+    verification_url = f"{settings.FRONTEND_URL}/verify-email/?token={token}"
+    OutboxEmail.enqueue(
+        subject="Confirma tu correo electrónico",
+        template_name="emails/verify_email.html",
+        context={"user": _user_context(user),
+                 "verification_url": verification_url},
+        recipient=user.email,
     )
 
 
 def send_password_reset_email(user, token):
-    subject = "Restablece tu contraseña"
-    reset_url = f"{settings.FRONTEND_URL}/reset-password/?token={token}"
+    """
+    Encola el correo de restablecimiento en el outbox; lo envía ``mailer``.
+    """
+    from modules.authentication.models import OutboxEmail
 
-    html_message = render_to_string(
-        "emails/reset_password.html", {"user": user, "reset_url": reset_url}
-    )
-    plain_message = strip_tags(html_message)
-
-    send_mail(
-        subject=subject,
-        message=plain_message,
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[user.email],
-        html_message=html_message,
+    reset_url = f"{settings.FRONTEND_URL}/reset-password/?token={token}"
+    OutboxEmail.enqueue(
+        subject="Restablece tu contraseña",
+        template_name="emails/reset_password.html",
+        context={"user": _user_context(user), "reset_url": reset_url},
+        recipient=user.email,
     )
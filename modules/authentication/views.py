@@ -1,10 +1,13 @@
-import jwt
 from django.conf import settings
+from django.db import transaction
 from modules.manager.models import User
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
+from django.utils.cache import patch_cache_control
 from .serializers import (
+    SessionSerializer,
     LoginSerializer,
     RefreshTokenSerializer,
     RegisterSerializer,
@@ -13,14 +16,33 @@ from .serializers import (
     ResetPasswordSerializer,
 )
 from .utils import (
-    generate_access_token,
-    generate_refresh_token,
+    decode_access_token,
     send_verification_email,
     send_password_reset_email,
 )
 from .models import AuthToken, BlacklistedToken, EmailVerification, PasswordResetToken
-from django.utils import timezone
-from datetime import timedelta
+from .principals import invalidate_user
+from .hashing import hashing_pool
+from .keys import get_key_ring
+from .introspection import introspect, introspect_many, INTROSPECTION_MAX_BATCH
+from .permissions import CanIntrospectTokens, HasAPIKeyScope
+from .throttling import (
+    LoginIPThrottle,
+    LoginEmailThrottle,
+    RefreshIPThrottle,
+    RefreshTokenThrottle,
+    ForgotPasswordIPThrottle,
+    ForgotPasswordEmailThrottle,
+)
+from .sessions import (
+    start_session,
+    rotate_session,
+    end_session,
+    end_session_by_id,
+    end_all_sessions,
+    device_label,
+    client_device_id,
+)
 
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
@@ -35,6 +57,15 @@ login_request_body = openapi.Schema(
         "password": openapi.Schema(
             type=openapi.TYPE_STRING, description="Contraseña del usuario"
         ),
+        "device": openapi.Schema(
+            type=openapi.TYPE_STRING,
+            description="Nombre del dispositivo (por defecto, el User-Agent)",
+        ),
+        "device_id": openapi.Schema(
+            type=openapi.TYPE_STRING,
+            description="Identificador estable del dispositivo: un nuevo "
+                        "login con el mismo sustituye a su sesión anterior",
+        ),
     },
     required=["email", "password"],
 )
@@ -51,31 +82,23 @@ login_responses = {
         ),
     ),
     400: openapi.Response("Error en credenciales"),
+    429: openapi.Response("Demasiados intentos"),
 }
 
 
 @swagger_auto_schema(request_body=login_request_body, responses=login_responses)
 class LoginView(APIView):
+    throttle_classes = [LoginIPThrottle, LoginEmailThrottle]
+
     def post(self, request):
         serializer = LoginSerializer(data=request.data)
         if serializer.is_valid():
             user = serializer.validated_data
 
-            # Revocar cualquier sesión activa
-            active_token = AuthToken.get_active_token(user)
-            if active_token:
-                active_token.revoke()
-
-            access_token = generate_access_token(user)
-            refresh_token = generate_refresh_token()
-            expires_at = timezone.now() + timedelta(days=7)
-
-            AuthToken.objects.create(
-                user=user,
-                access_token=access_token,
-                refresh_token=refresh_token,
-                expires_at=expires_at,
-            )
+            # Revocar la sesión previa de este dispositivo y abrir una nueva
+            access_token, refresh_token = start_session(
+                user, device_label(request, request.data),
+                client_device_id(request.data))
 
             return Response(
                 {"access_token": access_token, "refresh_token": refresh_token},
@@ -106,11 +129,14 @@ refresh_responses = {
         ),
     ),
     401: openapi.Response("Token inválido o revocado"),
+    429: openapi.Response("Demasiados intentos"),
 }
 
 
 @swagger_auto_schema(request_body=refresh_request_body, responses=refresh_responses)
 class RefreshTokenView(APIView):
+    throttle_classes = [RefreshIPThrottle, RefreshTokenThrottle]
+
     def post(self, request):
         serializer = RefreshTokenSerializer(data=request.data)
         if serializer.is_valid():
@@ -122,25 +148,13 @@ class RefreshTokenView(APIView):
                     status=status.HTTP_401_UNAUTHORIZED,
                 )
 
-            token_obj = AuthToken.objects.filter(
-                refresh_token=refresh_token).first()
-            if not token_obj or not token_obj.is_valid():
+            tokens = rotate_session(refresh_token)
+            if tokens is None:
                 return Response(
                     {"error": "Refresh token inválido o expirado"},
                     status=status.HTTP_401_UNAUTHORIZED,
                 )
-
-            new_access_token = generate_access_token(token_obj.user)
-            new_refresh_token = generate_refresh_token()
-            new_expires_at = timezone.now() + timedelta(days=7)
-
-            token_obj.revoke()
-            AuthToken.objects.create(
-                user=token_obj.user,
-                access_token=new_access_token,
-                refresh_token=new_refresh_token,
-                expires_at=new_expires_at,
-            )
+            new_access_token, new_refresh_token = tokens
 
             return Response(
                 {"access_token": new_access_token,
@@ -171,14 +185,8 @@ class LogoutView(APIView):
 
         token = auth_header.split(" ")[1]
         try:
-            payload = jwt.decode(
-                token, settings.SECRET_KEY, algorithms=["HS256"])
-            user = User.objects.get(id=payload["user_id"])
-
-            token_obj = AuthToken.objects.filter(
-                access_token=token, user=user).first()
-            if token_obj:
-                token_obj.revoke()
+            payload = decode_access_token(token)
+            end_session(token, payload["user_id"])
 
             return Response(
                 {"detail": "Sesión cerrada exitosamente."}, status=status.HTTP_200_OK
@@ -187,6 +195,58 @@ class LogoutView(APIView):
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
+@swagger_auto_schema(
+    operation_description="Lista las sesiones abiertas del usuario por dispositivo",
+    responses={200: SessionSerializer(many=True)},
+)
+class SessionListView(APIView):
+    permission_classes = [IsAuthenticated, HasAPIKeyScope]
+    api_key_scope = "sessions"
+
+    def get(self, request):
+        sessions = AuthToken.active_sessions(request.user)
+        serializer = SessionSerializer(
+            sessions, many=True, context={"request": request})
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+@swagger_auto_schema(
+    operation_description="Cierra una sesión concreta del usuario",
+    responses={
+        200: openapi.Response("Sesión cerrada"),
+        404: openapi.Response("Sesión no encontrada"),
+    },
+)
+class SessionDetailView(APIView):
+    permission_classes = [IsAuthenticated, HasAPIKeyScope]
+    api_key_scope = "sessions"
+
+    def delete(self, request, id):
+        if not end_session_by_id(request.user, id):
+            return Response(
+                {"error": "Sesión no encontrada"}, status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(
+            {"detail": "Sesión cerrada exitosamente."}, status=status.HTTP_200_OK
+        )
+
+
+@swagger_auto_schema(
+    operation_description="Cierra la sesión en todos los dispositivos",
+    responses={200: openapi.Response("Sesiones cerradas")},
+)
+class LogoutAllView(APIView):
+    permission_classes = [IsAuthenticated, HasAPIKeyScope]
+    api_key_scope = "sessions"
+
+    def post(self, request):
+        end_all_sessions(request.user)
+        return Response(
+            {"detail": "Sesión cerrada en todos los dispositivos."},
+            status=status.HTTP_200_OK,
+        )
+
+
 register_request_body = openapi.Schema(
     type=openapi.TYPE_OBJECT,
     properties={
@@ -253,7 +313,7 @@ class VerifyEmailView(APIView):
         if serializer.is_valid():
             token = serializer.validated_data["token"]
             verification = EmailVerification.objects.filter(
-                token=token).first()
+                token=token).select_related("user").first()
 
             if not verification or not verification.is_valid():
                 return Response(
@@ -265,6 +325,7 @@ class VerifyEmailView(APIView):
             verification.save()
             verification.user.is_active = True
             verification.user.save()
+            invalidate_user(verification.user)
 
             return Response(
                 {"detail": "Correo verificado correctamente"}, status=status.HTTP_200_OK
@@ -285,6 +346,7 @@ forgot_password_request_body = openapi.Schema(
 forgot_password_responses = {
     200: openapi.Response("Se ha enviado un enlace a tu correo."),
     404: openapi.Response("Usuario no encontrado"),
+    429: openapi.Response("Demasiados intentos"),
 }
 
 
@@ -292,16 +354,20 @@ forgot_password_responses = {
     request_body=forgot_password_request_body, responses=forgot_password_responses
 )
 class ForgotPasswordView(APIView):
+    throttle_classes = [ForgotPasswordIPThrottle, ForgotPasswordEmailThrottle]
+
     def post(self, request):
         serializer = ForgotPasswordSerializer(data=request.data)
         if serializer.is_valid():
             email = serializer.validated_data["email"]
             try:
                 user = User.objects.get(email=email)
-                reset_token, created = PasswordResetToken.objects.get_or_create(
-                    user=user
-                )
-                send_password_reset_email(user, reset_token.token)
+                # El token y el correo en el outbox se confirman juntos.
+                with transaction.atomic():
+                    reset_token, created = PasswordResetToken.objects.get_or_create(
+                        user=user
+                    )
+                    send_password_reset_email(user, reset_token.token)
                 return Response(
                     {"detail": "Se ha enviado un enlace a tu correo."},
                     status=status.HTTP_200_OK,
@@ -332,13 +398,15 @@ reset_password_responses = {
     request_body=reset_password_request_body, responses=reset_password_responses
 )
 class ResetPasswordView(APIView):
-    def post(self, request):
+    def post(self, request, token=None):
+        # La ruta incluye el token, pero se usa el del cuerpo.
         serializer = ResetPasswordSerializer(data=request.data)
         if serializer.is_valid():
             token = serializer.validated_data["token"]
             password = serializer.validated_data["password"]
 
-            reset_obj = PasswordResetToken.objects.filter(token=token).first()
+            reset_obj = PasswordResetToken.objects.filter(
+                token=token).select_related("user").first()
 
             if not reset_obj or not reset_obj.is_valid():
                 return Response(
@@ -349,6 +417,7 @@ class ResetPasswordView(APIView):
             user = reset_obj.user
             user.set_password(password)
             user.save()
+            invalidate_user(user)
 
             reset_obj.delete()
 
@@ -357,3 +426,86 @@ class ResetPasswordView(APIView):
                 status=status.HTTP_200_OK,
             )
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+@swagger_auto_schema(
+    operation_description="Profundidad de cola y duración de las tareas del pool de hashing",
+)
+class HashingPoolStatsView(APIView):
+    permission_classes = [IsAdminUser, HasAPIKeyScope]
+    api_key_scope = "hashing"
+
+    def get(self, request):
+        return Response(hashing_pool.stats(), status=status.HTTP_200_OK)
+
+
+@swagger_auto_schema(
+    operation_description="Claves públicas (JWKS) para verificar los access tokens",
+)
+class JWKSView(APIView):
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        response = Response(get_key_ring().jwks(), status=status.HTTP_200_OK)
+        patch_cache_control(
+            response, public=True,
+            max_age=getattr(settings, "JWKS_MAX_AGE", 300),
+        )
+        return response
+
+
+introspect_request_body = openapi.Schema(
+    type=openapi.TYPE_OBJECT,
+    properties={
+        "token": openapi.Schema(
+            type=openapi.TYPE_STRING, description="Access token a consultar"
+        ),
+        "tokens": openapi.Schema(
+            type=openapi.TYPE_ARRAY,
+            items=openapi.Schema(type=openapi.TYPE_STRING),
+            description="Lote de access tokens (respuesta en el mismo orden)",
+        ),
+    },
+)
+
+
+@swagger_auto_schema(
+    operation_description=(
+        "Introspección de tokens (RFC 7662). Acepta un token o un lote; "
+        "Cache-Control indica cuánto puede cachearse la respuesta."
+    ),
+    request_body=introspect_request_body,
+    responses={
+        200: openapi.Response("Estado de los tokens"),
+        400: openapi.Response("Petición inválida"),
+    },
+)
+class IntrospectView(APIView):
+    permission_classes = [CanIntrospectTokens]
+    api_key_scope = "introspection"
+    api_key_action = "read"
+
+    def post(self, request):
+        data = request.data
+        if "tokens" in data:
+            tokens = (data.getlist("tokens") if hasattr(data, "getlist")
+                      else data["tokens"])
+            if not isinstance(tokens, list) or len(tokens) > INTROSPECTION_MAX_BATCH:
+                return Response(
+                    {"error": f"'tokens' debe ser una lista de como mucho "
+                              f"{INTROSPECTION_MAX_BATCH} tokens."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            results, max_age = introspect_many(tokens)
+            response = Response({"results": results}, status=status.HTTP_200_OK)
+        elif "token" in data:
+            result, max_age = introspect(data["token"])
+            response = Response(result, status=status.HTTP_200_OK)
+        else:
+            return Response(
+                {"error": "Token no proporcionado"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        patch_cache_control(response, private=True, max_age=max_age)
+        return response
@@ -0,0 +1,176 @@
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+
+AUTOCOMPLETE_LIMIT = getattr(settings, "AUTOCOMPLETE_LIMIT", 10)
+AUTOCOMPLETE_MAX_LIMIT = getattr(settings, "AUTOCOMPLETE_MAX_LIMIT", 50)
+# Segundos que se conserva cada cambio del diario y cambios como máximo que
+# un worker reaplica antes de preferir reconstruir el índice entero.
+AUTOCOMPLETE_JOURNAL_TTL = getattr(settings, "AUTOCOMPLETE_JOURNAL_TTL", 3600)
+AUTOCOMPLETE_MAX_REPLAY = getattr(settings, "AUTOCOMPLETE_MAX_REPLAY", 1000)
+
+VERSION_KEY = "autocomplete:{}:version"
+CHANGE_KEY = "autocomplete:{}:change:{}"
+
+_indexes = {}
+
+
+def normalize(text):
+    """
+    Clave de comparación: sin mayúsculas ni acentos y con los espacios
+    colapsados.
+    """
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(text.casefold().split())
+
+
+class PrefixIndex:
+    """
+    Nombres de un modelo en una lista ordenada por su clave normalizada; un
+    prefijo se resuelve con ``bisect`` y se leen las entradas siguientes
+    mientras empiecen por él.
+
+    Vive en memoria de cada worker y se construye en la primera consulta.
+    Las escrituras suben un contador de versión compartido en la caché y
+    dejan allí el cambio (``pk`` y nombre, o ``None`` si el registro ya no
+    debe aparecer); antes de cada consulta el worker aplica los cambios que
+    le faltan, o reconstruye el índice si son demasiados o alguno caducó.
+    """
+
+    def __init__(self, model, field="name"):
+        self.model = model
+        self.field = field
+        self.label = model._meta.label
+        self.version = None
+        self.keys = []
+        self.entries = []
+        self.by_pk = {}
+        self.lock = threading.Lock()
+
+    def get_queryset(self):
+        return self.model._default_manager.filter(is_active=True)
+
+    def document(self, instance):
+        if not instance.is_active:
+            return None
+        return getattr(instance, self.field)
+
+    def current_version(self):
+        return cache.get_or_set(
+            VERSION_KEY.format(self.label), _initial_version, None)
+
+    def build(self):
+        version = self.current_version()
+        rows = sorted(
+            (normalize(name), pk, name)
+            for pk, name in self.get_queryset().values_list(
+                "pk", self.field).iterator(chunk_size=10_000)
+        )
+        self.keys = [(key, pk) for key, pk, _name in rows]
+        self.entries = [(pk, name) for _key, pk, name in rows]
+        self.by_pk = {pk: key for key, pk, _name in rows}
+        self.version = version
+
+    def apply(self, pk, name):
+        key = self.by_pk.pop(pk, None)
+        if key is not None:
+            index = bisect_left(self.keys, (key, pk))
+            del self.keys[index]
+            del self.entries[index]
+        if name is not None:
+            key = normalize(name)
+            index = bisect_left(self.keys, (key, pk))
+            self.keys.insert(index, (key, pk))
+            self.entries.insert(index, (pk, name))
+            self.by_pk[pk] = key
+
+    def refresh(self):
+        version = self.current_version()
+        if self.version == version:
+            return
+        if self.version is None or not (
+                0 < version - self.version <= AUTOCOMPLETE_MAX_REPLAY):
+            self.build()
+            return
+        keys = [CHANGE_KEY.format(self.label, v)
+                for v in range(self.version + 1, version + 1)]
+        changes = cache.get_many(keys)
+        if len(changes) != len(keys):
+            self.build()
+            return
+        for key in keys:
+            self.apply(*changes[key])
+        self.version = version
+
+    def search(self, prefix, limit=AUTOCOMPLETE_LIMIT):
+        """
+        Hasta ``limit`` pares ``(pk, nombre)`` cuyo nombre empieza por
+        ``prefix``, en orden alfabético.
+        """
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        with self.lock:
+            self.refresh()
+            index = bisect_left(self.keys, (prefix,))
+            results = []
+            while (index < len(self.keys) and len(results) < limit
+                   and self.keys[index][0].startswith(prefix)):
+                results.append(self.entries[index])
+                index += 1
+        return results
+
+
+def _initial_version():
+    # Si la caché pierde el contador, el nuevo queda lejos del que conocen
+    # los workers y estos reconstruyen en lugar de creerse al día.
+    return time.time_ns() // 1_000_000
+
+
+def _record_change(index, pk, name):
+    key = VERSION_KEY.format(index.label)
+    try:
+        version = cache.incr(key)
+    except ValueError:
+        cache.add(key, _initial_version(), None)
+        version = cache.incr(key)
+    cache.set(CHANGE_KEY.format(index.label, version), (pk, name),
+              AUTOCOMPLETE_JOURNAL_TTL)
+
+
+def _saved(sender, instance, **kwargs):
+    index = _indexes[sender]
+    change = (instance.pk, index.document(instance))
+    transaction.on_commit(lambda: _record_change(index, *change))
+
+
+def _deleted(sender, instance, **kwargs):
+    index = _indexes[sender]
+    pk = instance.pk
+    transaction.on_commit(lambda: _record_change(index, pk, None))
+
+
+def track_autocomplete(*models, field="name"):
+    """
+    Registra ``models`` en el autocompletado por prefijo de ``field``; se
+    llama desde ``ready()`` de su app. Solo se indexan los registros con
+    ``is_active``.
+    """
+    for model in models:
+        _indexes[model] = PrefixIndex(model, field)
+        post_save.connect(_saved, sender=model,
+                          dispatch_uid=f"autocomplete.save.{model._meta.label}")
+        post_delete.connect(_deleted, sender=model,
+                            dispatch_uid=f"autocomplete.delete.{model._meta.label}")
+
+
+def autocomplete(model, prefix, limit=AUTOCOMPLETE_LIMIT):
+    return _indexes[model].search(prefix, limit)
@@ -2,19 +2,28 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.backends import ModelBackend
 
 
-class EmailAdminAuthBackend(ModelBackend):
+class EmailAuthBackend(ModelBackend):
     """
-    Backend para permitir login en el admin usando email y contraseña.
+    Backend único de login por email y contraseña (API y admin).
+
+    Hace una sola consulta y como mucho un hash: si el email no existe se
+    calcula igualmente un hash de relleno para que el coste no delate qué
+    cuentas existen. ``check_password`` actualiza el hash guardado cuando
+    cambia el hasher preferido o sus iteraciones.
     """
 
-    def authenticate(self, request, username=None, password=None, **kwargs):
+    def authenticate(self, request, username=None, password=None, email=None, **kwargs):
         UserModel = get_user_model()
+        email = email or username or kwargs.get(UserModel.USERNAME_FIELD)
+        if email is None or password is None:
+            return None
 
         try:
-            user = UserModel.objects.get(email=username)
-            if user.check_password(password):
-                return user
+            user = UserModel._default_manager.get_by_natural_key(email)
         except UserModel.DoesNotExist:
+            UserModel().set_password(password)
             return None
 
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
         return None
@@ -0,0 +1,115 @@
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models.signals import post_delete, post_save
+
+
+COUNT_CACHE_TTL = getattr(settings, "COUNT_CACHE_TTL", 30)
+# Por encima de estas filas estimadas se sirve la estimación del
+# planificador en lugar de un COUNT(*) exacto (None = contar siempre).
+COUNT_ESTIMATE_THRESHOLD = getattr(settings, "COUNT_ESTIMATE_THRESHOLD", 100_000)
+COUNT_VERSION_KEY = "count:{}:version"
+
+# Modelos cuyos totales se cachean: solo para ellos se conectan señales,
+# porque un receptor de post_delete impide los borrados rápidos en bloque.
+_tracked = set()
+
+
+def _initial_version():
+    # Si la caché pierde el contador, el nuevo no vuelve a un valor ya usado
+    # y los totales guardados con él no se sirven.
+    return time.time_ns() // 1_000_000
+
+
+def _version(model):
+    return cache.get_or_set(
+        COUNT_VERSION_KEY.format(model._meta.label), _initial_version, None)
+
+
+def track_counts(*models):
+    """
+    Activa la caché de totales de ``models``; se llama desde ``ready()`` de
+    su app. Cualquier ``save()`` o ``delete()`` invalida sus totales.
+    """
+    for model in models:
+        _tracked.add(model)
+        post_save.connect(_invalidate, sender=model,
+                          dispatch_uid=f"counts.save.{model._meta.label}")
+        post_delete.connect(_invalidate, sender=model,
+                            dispatch_uid=f"counts.delete.{model._meta.label}")
+
+
+def _invalidate(sender, **kwargs):
+    invalidate_counts(sender)
+
+
+def invalidate_counts(model):
+    """
+    Descarta los totales cacheados de ``model``.
+    """
+    key = COUNT_VERSION_KEY.format(model._meta.label)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, _initial_version(), None)
+        cache.incr(key)
+
+
+def count_cache_key(model, scope, params):
+    """
+    Clave de un total: modelo, versión vigente y los parámetros de filtro
+    normalizados (ordenados y sin los de paginación). ``None`` si el modelo
+    no tiene la caché activada.
+    """
+    if model not in _tracked:
+        return None
+    normalized = json.dumps(
+        [scope, sorted((key, sorted(values)) for key, values in params.items())],
+        separators=(",", ":"),
+    )
+    digest = hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+    return f"count:{model._meta.label}:{_version(model)}:{digest}"
+
+
+def estimate_count(queryset):
+    """
+    Filas estimadas por el planificador para ``queryset``, o ``None`` si la
+    base de datos no ofrece una estimación útil (solo PostgreSQL la da).
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    sql, params = queryset.order_by().values("pk").query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def count_rows(queryset, key=None):
+    """
+    Devuelve ``(total, exacto)``. El total se cachea ``COUNT_CACHE_TTL``
+    segundos bajo ``key``; en tablas grandes es una estimación.
+    """
+    if key is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    estimate = None
+    if COUNT_ESTIMATE_THRESHOLD is not None:
+        estimate = estimate_count(queryset)
+    if estimate is not None and estimate >= COUNT_ESTIMATE_THRESHOLD:
+        result = (estimate, False)
+    else:
+        result = (queryset.count(), True)
+
+    if key is not None:
+        cache.set(key, result, COUNT_CACHE_TTL)
+    return result
@@ -0,0 +1,97 @@
+import logging
+import re
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+# Listas "IN (%s, %s, ...)" de cualquier longitud cuentan como la misma forma.
+_IN_LIST = re.compile(r"\(\s*%s(?:\s*,\s*%s)*\s*\)")
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def query_shape(sql):
+    return _IN_LIST.sub("(%s...)", " ".join(sql.split()))
+
+
+def repeated_shapes(queries, threshold):
+    """
+    Formas de consulta que se repiten al menos ``threshold`` veces: el
+    rastro típico de un N+1.
+    """
+    counts = Counter(query_shape(sql) for sql in queries)
+    return {shape: n for shape, n in counts.items() if n >= threshold}
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+
+class QueryBudgetMiddleware:
+    """
+    Middleware de desarrollo: registra el SQL de cada petición, detecta
+    consultas repetidas (N+1) y comprueba el presupuesto del endpoint
+    (``QUERY_BUDGETS["<MÉTODO> <view_name>"]``, ``QUERY_BUDGETS[view_name]``
+    o ``QUERY_BUDGET_DEFAULT``). Con
+    ``QUERY_BUDGET_ACTION = "raise"`` un exceso lanza
+    ``QueryBudgetExceeded``; con ``"log"`` solo deja un aviso. Añade la
+    cabecera ``X-Query-Count``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, "QUERY_BUDGET_ENABLED", settings.DEBUG)
+        self.budgets = getattr(settings, "QUERY_BUDGETS", {})
+        self.default_budget = getattr(settings, "QUERY_BUDGET_DEFAULT", None)
+        self.repeat_threshold = getattr(settings, "QUERY_BUDGET_REPEAT_THRESHOLD", 5)
+        self.action = getattr(settings, "QUERY_BUDGET_ACTION", "log")
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+
+        response["X-Query-Count"] = str(len(recorder.queries))
+        self.check(request, recorder.queries)
+        return response
+
+    def get_budget(self, request):
+        match = getattr(request, "resolver_match", None)
+        if match is not None:
+            for key in (f"{request.method} {match.view_name}", match.view_name):
+                if key in self.budgets:
+                    return self.budgets[key]
+        return self.default_budget
+
+    def check(self, request, queries):
+        problems = []
+        budget = self.get_budget(request)
+        if budget is not None and len(queries) > budget:
+            problems.append(
+                f"{len(queries)} consultas, presupuesto {budget}")
+        for shape, count in repeated_shapes(queries, self.repeat_threshold).items():
+            problems.append(f"posible N+1 ({count} veces): {shape[:200]}")
+        if not problems:
+            return
+
+        message = f"{request.method} {request.path}: " + "; ".join(problems)
+        if self.action == "raise":
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
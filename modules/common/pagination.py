@@ -0,0 +1,294 @@
+import datetime
+import json
+from base64 import b64decode, b64encode
+from functools import cached_property, partial
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.utils.urls import replace_query_param
+
+from modules.common.counts import count_cache_key, count_rows
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """
+    Fechas con microsegundos: ``DjangoJSONEncoder`` los recorta a
+    milisegundos y el cursor dejaría de apuntar al registro exacto.
+    """
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class EstimatedPage(Page):
+    """
+    Página de un total estimado: si hay siguiente se sabe por la fila extra
+    leída, no por el número de páginas.
+    """
+
+    def __init__(self, object_list, number, paginator, has_more):
+        super().__init__(object_list, number, paginator)
+        self.has_more = has_more
+
+    def has_next(self):
+        return self.has_more
+
+
+class CachedCountPaginator(Paginator):
+    """
+    ``Paginator`` cuyo total sale de ``count_rows``: cacheado por clave y
+    estimado en tablas grandes. Con un total estimado no se rechazan páginas
+    por encima de ``num_pages``.
+    """
+
+    def __init__(self, *args, count_key=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.count_key = count_key
+        self.count_exact = True
+
+    @cached_property
+    def count(self):
+        count, self.count_exact = count_rows(self.object_list, self.count_key)
+        return count
+
+    def validate_number(self, number):
+        self.count  # Resolver el total fija count_exact.
+        if self.count_exact:
+            return super().validate_number(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(self.error_messages["invalid_page"])
+        if number < 1:
+            raise EmptyPage(self.error_messages["min_page"])
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if self.count_exact:
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage(self.error_messages["no_results"])
+        return EstimatedPage(
+            rows[:self.per_page], number, self, len(rows) > self.per_page)
+
+
+class CachedCountPagination(PageNumberPagination):
+    """
+    Paginación por número de página sin ``COUNT(*)`` en cada petición: el
+    total se cachea por vista, parámetros de filtro y tipo de cliente (en
+    los modelos registrados con ``track_counts``), se invalida al escribir en el modelo
+    y en tablas grandes es la estimación del planificador. ``count_exact``
+    indica si el total es exacto.
+    """
+
+    page_size_query_param = "page_size"
+    max_page_size = getattr(settings, "MAX_PAGE_SIZE", 100)
+    ignored_query_params = ("page", "page_size", "cursor", "format")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = {
+            key: request.query_params.getlist(key)
+            for key in request.query_params
+            if key not in self.ignored_query_params
+        }
+        # Los filtros dependen de quién pregunta (p. ej. solo el staff ve los
+        # eventos inactivos), igual que en ``ResponseCacheMixin``.
+        audience = "staff" if request.user.is_staff else "user"
+        scope = f"{type(view).__module__}.{type(view).__qualname__}:{audience}"
+        self.django_paginator_class = partial(
+            CachedCountPaginator,
+            count_key=count_cache_key(queryset.model, scope, params),
+        )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return Response({
+            "count": self.page.paginator.count,
+            "count_exact": self.page.paginator.count_exact,
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"]["count_exact"] = {
+            "type": "boolean",
+            "example": True,
+        }
+        return response_schema
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Paginación por keyset con cursor opaco. El orden lo fija
+    ``keyset_ordering`` de la vista (p. ej. ``("start_date", "id")``) y el
+    cursor guarda los valores de esos campos en el último registro de la
+    página, así que cada página es un ``WHERE (a, b) > (x, y) LIMIT n`` sin
+    ``COUNT(*)`` ni ``OFFSET``. La lista debe terminar en un campo único y no
+    nulo (normalmente ``id``); en los campos que admiten nulos los ``NULL``
+    cuentan como el valor más pequeño (primeros en orden ascendente) y el
+    cursor los guarda como ``null``.
+
+    Las peticiones con ``?page=`` se sirven con ``page_number_class`` para
+    no romper a los clientes que ya paginan por número de página, igual que
+    las que traen alguno de los ``page_number_params`` de la vista
+    (parámetros que cambian el orden, como una búsqueda por relevancia).
+    """
+
+    page_size_query_param = "page_size"
+    max_page_size = getattr(settings, "MAX_PAGE_SIZE", 100)
+    ordering = ("id",)
+    page_number_class = CachedCountPagination
+    invalid_cursor_message = "Cursor inválido."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.fallback = None
+        if self.page_number_class is not None and any(
+                param in request.query_params for param in (
+                    self.page_number_class.page_query_param,
+                    *getattr(view, "page_number_params", ()))):
+            self.fallback = self.page_number_class()
+            return self.fallback.paginate_queryset(queryset, request, view)
+
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.model = queryset.model
+        self.ordering = self.get_ordering(request, queryset, view)
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor.get("r"))
+
+        queryset = queryset.order_by(*(
+            self.order_expression(name, desc != reverse)
+            for name, desc in self.ordering
+        ))
+        if cursor is not None:
+            queryset = queryset.filter(self.keyset_filter(cursor["p"], reverse))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+
+        self.page = results
+        return self.page
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, "keyset_ordering", None) or self.ordering
+        return [(name.lstrip("-"), name.startswith("-")) for name in ordering]
+
+    def is_nullable(self, name):
+        return self.model._meta.get_field(name).null
+
+    def order_expression(self, name, desc):
+        if not self.is_nullable(name):
+            return ("-" if desc else "") + name
+        # NULLS FIRST/LAST explícito: cada BD los coloca por defecto en un
+        # extremo distinto.
+        if desc:
+            return F(name).desc(nulls_last=True)
+        return F(name).asc(nulls_first=True)
+
+    def compare(self, name, value, lookup):
+        """
+        ``name <lookup> value`` con ``lookup`` en ``gt``/``gte``/``lt``/
+        ``lte``, tomando ``NULL`` como el menor de los valores.
+        """
+        if not self.is_nullable(name):
+            return Q(**{f"{name}__{lookup}": value})
+        if value is None:
+            return {
+                "gt": Q(**{f"{name}__isnull": False}),
+                "gte": Q(),
+                "lt": Q(pk__in=[]),
+                "lte": Q(**{f"{name}__isnull": True}),
+            }[lookup]
+        if lookup in ("lt", "lte"):
+            return Q(**{f"{name}__{lookup}": value}) | Q(**{f"{name}__isnull": True})
+        return Q(**{f"{name}__{lookup}": value})
+
+    def keyset_filter(self, values, reverse):
+        """
+        ``(a, b, ...) > (x, y, ...)`` expresado con ``Q``; el primer campo
+        lleva además una cota simple para que la BD pueda usar el índice.
+        """
+        keyset = Q()
+        equal = Q()
+        for (name, desc), value in zip(self.ordering, values):
+            lookup = "lt" if desc != reverse else "gt"
+            keyset |= equal & self.compare(name, value, lookup)
+            equal &= Q(**{f"{name}__isnull": True} if value is None else {name: value})
+        name, desc = self.ordering[0]
+        lookup = "lte" if desc != reverse else "gte"
+        return self.compare(name, values[0], lookup) & keyset
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            cursor = json.loads(b64decode(encoded.encode("ascii")))
+            values = list(cursor["p"])
+            if len(values) != len(self.ordering) or any(
+                    value is None and not self.is_nullable(name)
+                    for (name, _desc), value in zip(self.ordering, values)):
+                raise ValueError
+            cursor["p"] = [
+                self.model._meta.get_field(name).to_python(value)
+                for (name, _desc), value in zip(self.ordering, values)
+            ]
+            return cursor
+        except (TypeError, ValueError, KeyError, FieldDoesNotExist,
+                ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, instance, reverse):
+        values = [
+            getattr(instance, self.model._meta.get_field(name).attname)
+            for name, _desc in self.ordering
+        ]
+        data = json.dumps({"p": values, "r": int(reverse)},
+                          cls=CursorEncoder, separators=(",", ":"))
+        encoded = b64encode(data.encode("utf-8")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        if self.fallback is not None:
+            return self.fallback.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_html_context(self):
+        if self.fallback is not None:
+            return self.fallback.get_html_context()
+        return super().get_html_context()
@@ -0,0 +1,105 @@
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+
+def _walk(model, source_attrs):
+    """
+    Recorre ``source_attrs`` sobre los campos del modelo. Devuelve
+    ``(relaciones, columna, muchos)``: la ruta de relaciones atravesadas, la
+    columna final (o ``None`` si termina en una relación) y si alguna es
+    a-muchos. Lanza ``FieldDoesNotExist`` si el source no es un campo.
+    """
+    path = []
+    for index, attr in enumerate(source_attrs):
+        field = model._meta.get_field(attr)
+        last = index == len(source_attrs) - 1
+        if not field.is_relation:
+            return path, attr, False
+        if field.many_to_many or field.one_to_many:
+            return path + [attr], None, True
+        if last:
+            return path, field.attname, False
+        path.append(attr)
+        model = field.related_model
+    return path, None, False
+
+
+@lru_cache(maxsize=None)
+def _field_names(serializer_class):
+    return frozenset(serializer_class().fields)
+
+
+# ``fields`` llega ya recortado a los campos del serializer, pero sus
+# combinaciones siguen dependiendo del cliente: se acota el tamaño.
+@lru_cache(maxsize=256)
+def _plan(serializer_class, model, fields):
+    declared = getattr(getattr(serializer_class, "Meta", None), "related_fields", {})
+    select, prefetch = set(), set()
+    only = {model._meta.pk.attname}
+    defer = True
+
+    for name, field in serializer_class().fields.items():
+        if field.write_only or (fields is not None and name not in fields):
+            continue
+        if name in declared:
+            for relation in declared[name]:
+                (prefetch if _is_many(model, relation) else select).add(relation)
+            defer = False
+            continue
+        if field.source == "*":
+            defer = False
+            continue
+        nested = isinstance(field, serializers.BaseSerializer)
+        try:
+            path, column, many = _walk(model, field.source_attrs)
+        except FieldDoesNotExist:
+            # Propiedad o método del modelo: no se sabe qué columnas lee.
+            defer = False
+            continue
+
+        if many:
+            prefetch.add("__".join(path))
+            continue
+        if nested and column is not None and column != field.source_attrs[-1]:
+            # Serializer anidado sobre una relación a-uno: se carga entera.
+            path = path + [field.source_attrs[-1]]
+            column = None
+        if path:
+            select.add("__".join(path))
+            only.update("__".join(path[:i + 1]) for i in range(len(path)))
+        if column is not None:
+            only.add("__".join(path + [column]))
+
+    return tuple(sorted(select)), tuple(sorted(prefetch)), (
+        tuple(sorted(only)) if defer else None)
+
+
+def _is_many(model, relation):
+    try:
+        return _walk(model, relation.split("__"))[2]
+    except FieldDoesNotExist:
+        return True
+
+
+def plan_queryset(queryset, serializer_class, fields=None, extra=()):
+    """
+    Aplica ``select_related``, ``prefetch_related`` y ``only()`` según los
+    campos que va a leer ``serializer_class`` (o solo ``fields``, si se
+    piden algunos). Las relaciones se deducen del ``source`` de cada campo;
+    los que no se pueden deducir (``SerializerMethodField``) las declaran en
+    ``Meta.related_fields = {"campo": ["relacion", ...]}``. Si algún campo
+    puede leer columnas desconocidas no se aplica ``only()``. ``extra`` son
+    columnas que la vista necesita además (p. ej. las del orden).
+    """
+    if fields is not None:
+        fields = frozenset(fields) & _field_names(serializer_class)
+    select, prefetch, only = _plan(serializer_class, queryset.model, fields)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    if only is not None:
+        queryset = queryset.only(*only, *extra)
+    return queryset
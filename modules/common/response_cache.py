@@ -0,0 +1,118 @@
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+
+RESPONSE_CACHE_ENABLED = getattr(settings, "RESPONSE_CACHE_ENABLED", True)
+# Segundos por defecto y por vista (``RESPONSE_CACHE_TTLS["<view_name>"]``,
+# 0 desactiva la caché de esa vista).
+RESPONSE_CACHE_TTL = getattr(settings, "RESPONSE_CACHE_TTL", 60)
+RESPONSE_CACHE_TTLS = getattr(settings, "RESPONSE_CACHE_TTLS", {})
+# Recalculo único: vida máxima del candado y cuánto espera el resto de
+# peticiones a que el primero termine antes de calcular por su cuenta.
+RESPONSE_CACHE_LOCK_TIMEOUT = getattr(settings, "RESPONSE_CACHE_LOCK_TIMEOUT", 10)
+RESPONSE_CACHE_WAIT = getattr(settings, "RESPONSE_CACHE_WAIT", 2)
+RESPONSE_CACHE_POLL_INTERVAL = 0.05
+
+VERSION_KEY = "response:{}:version"
+METRICS_KEY = "response:metrics:{}:{}"
+OUTCOMES = ("hit", "miss", "wait")
+
+
+def _initial_version():
+    # Si la caché pierde un contador, el nuevo no coincide con el anterior
+    # y las respuestas guardadas con él no vuelven a servirse.
+    return time.time_ns() // 1_000_000
+
+
+def _incr(key, initial):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, initial, None)
+        return cache.incr(key)
+
+
+def model_versions(models):
+    keys = [VERSION_KEY.format(model._meta.label) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _initial_version(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def invalidate_responses(*models):
+    """
+    Sube la versión de ``models``: las respuestas cacheadas que dependen de
+    ellos dejan de servirse. Se repite al confirmar la transacción para
+    descartar lo que otra petición haya cacheado con los datos anteriores.
+    """
+    def bump():
+        for model in models:
+            _incr(VERSION_KEY.format(model._meta.label), _initial_version())
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def response_cache_key(view_name, parts):
+    normalized = json.dumps(parts, separators=(",", ":"), sort_keys=True,
+                            default=str)
+    digest = hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+    return f"response:{view_name}:{digest}"
+
+
+def get_ttl(view_name):
+    return RESPONSE_CACHE_TTLS.get(view_name, RESPONSE_CACHE_TTL)
+
+
+def record(view_name, outcome):
+    _incr(METRICS_KEY.format(view_name, outcome), 0)
+
+
+def response_cache_metrics(view_name):
+    """
+    Contadores de aciertos (``hit``), fallos (``miss``) y peticiones que
+    esperaron al recalculo de otra (``wait``) de ``view_name``.
+    """
+    keys = {outcome: METRICS_KEY.format(view_name, outcome) for outcome in OUTCOMES}
+    values = cache.get_many(keys.values())
+    return {outcome: values.get(key, 0) for outcome, key in keys.items()}
+
+
+def cached_response(key, ttl, compute):
+    """
+    Devuelve ``(respuesta, resultado)``. Con la clave en caché se sirve sin
+    llamar a ``compute``; si no, la calcula una sola petición (candado con
+    ``cache.add``) y el resto espera hasta ``RESPONSE_CACHE_WAIT`` segundos
+    a que aparezca. Solo se cachean las respuestas 200.
+    """
+    data = cache.get(key)
+    if data is not None:
+        return Response(data), "hit"
+
+    lock = f"{key}:lock"
+    if not cache.add(lock, 1, RESPONSE_CACHE_LOCK_TIMEOUT):
+        deadline = time.monotonic() + RESPONSE_CACHE_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(RESPONSE_CACHE_POLL_INTERVAL)
+            data = cache.get(key)
+            if data is not None:
+                return Response(data), "wait"
+        lock = None
+
+    try:
+        response = compute()
+        if response.status_code == 200:
+            cache.set(key, response.data, ttl)
+    finally:
+        if lock is not None:
+            cache.delete(lock)
+    return response, "miss"
@@ -1,3 +1,4 @@
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
 
 
@@ -8,3 +9,35 @@ class AuditableSerializerMixin(serializers.ModelSerializer):
     updated_by = serializers.CharField(read_only=True)
     deleted_date = serializers.DateTimeField(read_only=True)
     deleted_by = serializers.CharField(read_only=True)
+
+
+class UniqueConstraintSerializerMixin:
+    """
+    Deja la unicidad a las constraints de la base de datos en lugar de
+    comprobarla antes con ``exists()``: el ``IntegrityError`` de una
+    constraint de ``unique_constraint_errors`` (nombre -> ``(campo,
+    mensaje)``) se devuelve como ``ValidationError`` de ese campo.
+    """
+
+    unique_constraint_errors = {}
+
+    def create(self, validated_data):
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError as exc:
+            self.raise_unique_error(exc)
+
+    def update(self, instance, validated_data):
+        try:
+            with transaction.atomic():
+                return super().update(instance, validated_data)
+        except IntegrityError as exc:
+            self.raise_unique_error(exc)
+
+    def raise_unique_error(self, exc):
+        message = str(exc)
+        for constraint, (field, error) in self.unique_constraint_errors.items():
+            if constraint in message:
+                raise serializers.ValidationError({field: [error]})
+        raise exc
@@ -1,3 +1,165 @@
-from django.test import TestCase
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from rest_framework.response import Response
+
+from modules.common import counts, prefetch, response_cache
+
+from modules.common.middleware import (
+    QueryBudgetExceeded,
+    QueryBudgetMiddleware,
+    repeated_shapes,
+)
+from modules.common.pagination import CachedCountPaginator
+from modules.manager.models import User
+from modules.manager.serializers.user import UserListSerializer
+
+
+class RepeatedShapesTests(SimpleTestCase):
+    def test_in_lists_of_any_length_share_a_shape(self):
+        queries = [
+            'SELECT * FROM "t" WHERE "id" IN (%s)',
+            'SELECT * FROM "t" WHERE "id" IN (%s, %s, %s)',
+            'SELECT * FROM "t" WHERE "id" = %s',
+        ]
+        self.assertEqual(
+            repeated_shapes(queries, 2),
+            {'SELECT * FROM "t" WHERE "id" IN (%s...)': 2},
+        )
+
+
+class QueryBudgetMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(6):
+            User.objects.create(email=f"user{i}@example.com", first_name=f"U{i}")
+
+    def n_plus_one_view(self, request):
+        for user_id in User.objects.values_list("id", flat=True):
+            User.objects.get(id=user_id)
+        return HttpResponse()
+
+    @override_settings(QUERY_BUDGET_ENABLED=True, QUERY_BUDGET_ACTION="raise")
+    def test_raises_on_n_plus_one(self):
+        middleware = QueryBudgetMiddleware(self.n_plus_one_view)
+        with self.assertRaises(QueryBudgetExceeded):
+            middleware(RequestFactory().get("/"))
+
+    @override_settings(QUERY_BUDGET_ENABLED=True, QUERY_BUDGET_ACTION="log")
+    def test_logs_and_reports_query_count(self):
+        middleware = QueryBudgetMiddleware(self.n_plus_one_view)
+        with self.assertLogs("modules.common.middleware", "WARNING"):
+            response = middleware(RequestFactory().get("/"))
+        self.assertEqual(response["X-Query-Count"], "7")
+
+    @override_settings(QUERY_BUDGET_ENABLED=True, QUERY_BUDGET_DEFAULT=0,
+                       QUERY_BUDGET_ACTION="raise")
+    def test_budget(self):
+        middleware = QueryBudgetMiddleware(
+            lambda request: HttpResponse(User.objects.count()))
+        with self.assertRaises(QueryBudgetExceeded):
+            middleware(RequestFactory().get("/"))
+
+
+class CachedResponseTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_single_flight(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return Response({"ok": True})
+
+        # Otra petición tiene el candado y deja el resultado al poco.
+        cache.add("k:lock", 1)
+        timer = threading.Timer(0.1, cache.set, ("k", {"ok": True}))
+        timer.start()
+        response, outcome = response_cache.cached_response("k", 60, compute)
+        timer.join()
+        self.assertEqual((response.data, outcome, calls), ({"ok": True}, "wait", []))
+
+    def test_computes_after_waiting_and_skips_errors(self):
+        cache.add("k:lock", 1)
+        with mock.patch.object(response_cache, "RESPONSE_CACHE_WAIT", 0.1):
+            response, outcome = response_cache.cached_response(
+                "k", 60, lambda: Response({"error": "x"}, status=400))
+        self.assertEqual((response.status_code, outcome), (400, "miss"))
+        self.assertIsNone(cache.get("k"))
+
+
+class CountCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(5):
+            User.objects.create(email=f"user{i}@example.com")
+
+    def setUp(self):
+        cache.clear()
+
+    def count(self):
+        queryset = User.objects.all()
+        key = counts.count_cache_key(User, "tests", {"q": ["x"]})
+        return counts.count_rows(queryset, key)
+
+    def test_write_invalidates_cached_count(self):
+        self.assertEqual(self.count(), (5, True))
+        with self.assertNumQueries(0):
+            self.assertEqual(self.count(), (5, True))
+        User.objects.create(email="new@example.com")
+        self.assertEqual(self.count(), (6, True))
+        User.objects.filter(email="new@example.com").delete()
+        self.assertEqual(self.count(), (5, True))
+
+    def test_lost_version_does_not_reuse_old_keys(self):
+        version_key = counts.COUNT_VERSION_KEY.format(User._meta.label)
+        counts.invalidate_counts(User)
+        before = cache.get(version_key)
+        cache.delete(version_key)
+        time.sleep(0.01)
+        counts.invalidate_counts(User)
+        self.assertGreater(cache.get(version_key), before)
+
+    def test_estimate_above_threshold(self):
+        with mock.patch.object(counts, "COUNT_ESTIMATE_THRESHOLD", 1_000), \
+                mock.patch.object(counts, "estimate_count",
+                                  return_value=250_000) as estimate:
+            self.assertEqual(self.count(), (250_000, False))
+            estimate.reset_mock()
+            self.assertEqual(self.count(), (250_000, False))
+        estimate.assert_not_called()
+
+    def test_estimate_below_threshold_counts(self):
+        with mock.patch.object(counts, "COUNT_ESTIMATE_THRESHOLD", 1_000), \
+                mock.patch.object(counts, "estimate_count", return_value=900):
+            self.assertEqual(self.count(), (5, True))
+
+    def test_estimated_pages_are_not_bounded_by_the_estimate(self):
+        queryset = User.objects.order_by("id")
+        with mock.patch.object(counts, "COUNT_ESTIMATE_THRESHOLD", 1), \
+                mock.patch.object(counts, "estimate_count", return_value=2):
+            paginator = CachedCountPaginator(queryset, 2)
+            page = paginator.page(2)
+        self.assertFalse(paginator.count_exact)
+        self.assertEqual(len(page), 2)
+        self.assertTrue(page.has_next())
+        self.assertFalse(paginator.page(3).has_next())
+
+
+class PlanQuerysetTests(SimpleTestCase):
+    def test_unknown_fields_share_a_plan(self):
+        prefetch._plan.cache_clear()
+        plans = {
+            str(prefetch.plan_queryset(
+                User.objects.all(), UserListSerializer,
+                fields={"email", name}).query)
+            for name in ("bogus1", "bogus2", "bogus3")
+        }
+        self.assertEqual(len(plans), 1)
+        self.assertEqual(prefetch._plan.cache_info().currsize, 1)
+        self.assertIsNotNone(prefetch._plan.cache_info().maxsize)
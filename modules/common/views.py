@@ -3,6 +3,26 @@ from rest_framework.exceptions import PermissionDenied
 from rest_framework import viewsets
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.decorators import action
+from drf_yasg import openapi as oa
+from drf_yasg.utils import swagger_auto_schema
+
+from modules.common.autocomplete import (
+    AUTOCOMPLETE_LIMIT,
+    AUTOCOMPLETE_MAX_LIMIT,
+    autocomplete,
+)
+from modules.common.prefetch import plan_queryset
+from modules.common.response_cache import (
+    RESPONSE_CACHE_ENABLED,
+    cached_response,
+    get_ttl,
+    invalidate_responses,
+    model_versions,
+    record,
+    response_cache_key,
+)
 
 
 def get_user_fullname(user):
@@ -12,7 +32,130 @@ def get_user_fullname(user):
     return full_name or user.username
 
 
-class BaseModelViewSet(viewsets.ModelViewSet):
+class PrefetchPlannerMixin:
+    """
+    En lecturas, prepara el queryset con ``plan_queryset`` según el
+    serializer de la acción y admite ``?fields=a,b`` para devolver solo
+    esos campos (y leer solo sus columnas).
+    """
+
+    fields_query_param = "fields"
+
+    def get_requested_fields(self):
+        request = getattr(self, "request", None)
+        if request is None or request.method not in SAFE_METHODS:
+            return None
+        value = request.query_params.get(self.fields_query_param)
+        if not value:
+            return None
+        return {name.strip() for name in value.split(",") if name.strip()}
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        request = getattr(self, "request", None)
+        if request is None or request.method not in SAFE_METHODS:
+            return queryset
+        extra = [name.lstrip("-") for name in getattr(self, "keyset_ordering", ())]
+        return plan_queryset(
+            queryset, self.get_serializer_class(),
+            fields=self.get_requested_fields(), extra=extra,
+        )
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fields = self.get_requested_fields()
+        if fields is not None:
+            target = getattr(serializer, "child", serializer)
+            for name in set(target.fields) - fields:
+                target.fields.pop(name)
+        return serializer
+
+
+class ResponseCacheMixin:
+    """
+    Cachea las respuestas de ``list`` y ``retrieve`` por endpoint, parámetros
+    de la petición, permisos del cliente y versión de los modelos de los que
+    dependen (``response_cache_models``; por defecto el del queryset). Las
+    escrituras de la vista llaman a ``invalidate_response_cache()`` en sus
+    ``perform_*``. Añade la cabecera ``X-Cache`` (HIT, MISS o WAIT).
+    """
+
+    response_cache_models = None
+
+    def get_response_cache_models(self):
+        return self.response_cache_models or (self.queryset.model,)
+
+    def invalidate_response_cache(self):
+        invalidate_responses(*self.get_response_cache_models())
+
+    def get_response_cache_key(self, request, view_name):
+        params = sorted(
+            (key, sorted(request.query_params.getlist(key)))
+            for key in request.query_params
+        )
+        permissions = sorted(type(permission).__name__
+                             for permission in self.get_permissions())
+        # Lo que ve cada cliente depende de sus permisos (p. ej. el staff
+        # puede listar eventos inactivos).
+        audience = "staff" if request.user.is_staff else "user"
+        return response_cache_key(view_name, [
+            request.get_host(), request.path, params, permissions, audience,
+            model_versions(self.get_response_cache_models()),
+        ])
+
+    def cached(self, request, compute):
+        view_name = request.resolver_match.view_name
+        ttl = get_ttl(view_name)
+        if not RESPONSE_CACHE_ENABLED or not ttl:
+            return compute()
+        response, outcome = cached_response(
+            self.get_response_cache_key(request, view_name), ttl, compute)
+        record(view_name, outcome)
+        response["X-Cache"] = outcome.upper()
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached(
+            request, lambda: super(ResponseCacheMixin, self).list(
+                request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached(
+            request, lambda: super(ResponseCacheMixin, self).retrieve(
+                request, *args, **kwargs))
+
+
+class AutocompleteMixin:
+    """
+    Acción ``GET <recurso>/autocomplete/?q=<prefijo>&limit=<n>``: nombres
+    que empiezan por el prefijo, servidos desde el índice en memoria de
+    ``modules.common.autocomplete`` (el modelo debe estar registrado con
+    ``track_autocomplete``).
+    """
+
+    @swagger_auto_schema(
+        operation_description="Names starting with the given prefix.",
+        manual_parameters=[
+            oa.Parameter("q", oa.IN_QUERY, type=oa.TYPE_STRING, required=True),
+            oa.Parameter("limit", oa.IN_QUERY, type=oa.TYPE_INTEGER),
+        ],
+    )
+    @action(detail=False, methods=["get"])
+    def autocomplete(self, request, *args, **kwargs):
+        try:
+            limit = int(request.query_params.get("limit", AUTOCOMPLETE_LIMIT))
+        except ValueError:
+            limit = AUTOCOMPLETE_LIMIT
+        limit = min(max(limit, 1), AUTOCOMPLETE_MAX_LIMIT)
+        matches = autocomplete(
+            self.queryset.model, request.query_params.get("q", ""), limit)
+        return Response(
+            {"results": [{"id": pk, "name": name} for pk, name in matches]},
+            status=status.HTTP_200_OK,
+        )
+
+
+class BaseModelViewSet(PrefetchPlannerMixin, viewsets.ModelViewSet):
     def perform_create(self, serializer):
         request = self.request
         user = request.user
@@ -4,3 +4,18 @@ from django.apps import AppConfig
 class EventsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'modules.events'
+
+    def ready(self):
+        from django.db.models.signals import post_migrate
+
+        from modules.common.autocomplete import track_autocomplete
+        from modules.common.counts import track_counts
+        from modules.events.models.models import Category, Event
+        from modules.events.search import create_search_index
+
+        # Totales cacheados en la paginación por número de página
+        track_counts(Event, Category)
+        # Autocompletado por prefijo del nombre (/autocomplete/)
+        track_autocomplete(Event, Category)
+        # La tabla del índice de búsqueda no es un modelo: se crea tras migrate
+        post_migrate.connect(create_search_index, sender=self)
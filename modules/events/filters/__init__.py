@@ -0,0 +1,2 @@
+from modules.events.filters.event import EventFilter
+from modules.events.filters.search import EventSearchFilter
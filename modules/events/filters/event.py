@@ -0,0 +1,52 @@
+import datetime
+
+from django.db.models import Q
+from django_filters import rest_framework as filters
+from modules.events.models.models import Event
+
+
+class NumberInFilter(filters.BaseInFilter, filters.NumberFilter):
+    pass
+
+
+class EventFilter(filters.FilterSet):
+    """Filter for Event model."""
+    # Solapamiento: eventos en curso en algún momento entre date_from y date_to
+    # (días completos) o entre datetime_from y datetime_to; ambos sobre
+    # start_at/end_at para usar un único índice.
+    date_from = filters.DateFilter(method='filter_date_from')
+    date_to = filters.DateFilter(method='filter_date_to')
+    datetime_from = filters.IsoDateTimeFilter(field_name='end_at', lookup_expr='gte')
+    datetime_to = filters.IsoDateTimeFilter(field_name='start_at', lookup_expr='lte')
+    price_min = filters.NumberFilter(field_name='price', lookup_expr='gte')
+    price_max = filters.NumberFilter(field_name='price', lookup_expr='lte')
+    free = filters.BooleanFilter(method='filter_free')
+    category = NumberInFilter(field_name='category_id', lookup_expr='in')
+    is_active = filters.BooleanFilter(field_name='is_active')
+
+    class Meta:
+        model = Event
+        fields = ['date_from', 'date_to', 'datetime_from', 'datetime_to',
+                  'price_min', 'price_max', 'free', 'category', 'is_active']
+
+    def filter_date_from(self, queryset, name, value):
+        return queryset.filter(
+            end_at__gte=Event.combine_datetime(value, datetime.time.min))
+
+    def filter_date_to(self, queryset, name, value):
+        next_day = value + datetime.timedelta(days=1)
+        return queryset.filter(
+            start_at__lt=Event.combine_datetime(next_day, datetime.time.min))
+
+    def filter_free(self, queryset, name, value):
+        free = Q(price__isnull=True) | Q(price=0)
+        return queryset.filter(free if value else ~free)
+
+    def filter_queryset(self, queryset):
+        # Solo el staff puede pedir eventos dados de baja (?is_active=false);
+        # sin el parámetro se listan los activos.
+        user = getattr(self.request, 'user', None)
+        if (not getattr(user, 'is_staff', False)
+                or self.form.cleaned_data.get('is_active') is None):
+            queryset = queryset.filter(is_active=True)
+        return super().filter_queryset(queryset)
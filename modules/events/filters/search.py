@@ -0,0 +1,20 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework.filters import SearchFilter
+
+from modules.events.search import search_events
+
+
+class EventSearchFilter(SearchFilter):
+    """
+    ``?q=`` sobre el índice de texto completo de eventos. Los resultados
+    van ordenados por relevancia, así que la vista debe paginarlos por
+    número de página (``page_number_params`` de ``KeysetPagination``).
+    """
+    search_param = 'q'
+    search_description = _('Texto a buscar en nombre, ubicación y descripción.')
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, '').strip()
+        if not text:
+            return queryset
+        return search_events(queryset, text).order_by('-search_rank', 'id')
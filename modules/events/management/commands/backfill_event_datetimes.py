@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from modules.events.models.models import Event
+
+
+class Command(BaseCommand):
+    help = (
+        "Rellena start_at y end_at de los eventos a partir de sus fechas y "
+        "horas, por lotes (p. ej. tras bulk_create o update(), que no pasan "
+        "por Event.save())."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Eventos por lote y transacción (1000 por defecto).",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Recalcula todos los eventos, no solo los que no los tienen.",
+        )
+
+    def handle(self, *args, **options):
+        events = Event.objects.order_by("pk").only(
+            "id", "start_date", "start_time", "end_date", "end_time",
+            "start_at", "end_at")
+        if not options["all"]:
+            events = events.filter(Q(start_at__isnull=True) | Q(end_at__isnull=True))
+
+        updated = 0
+        last = 0
+        while True:
+            batch = list(events.filter(pk__gt=last)[:options["batch_size"]])
+            if not batch:
+                break
+            changed = []
+            for event in batch:
+                computed = event.compute_datetimes()
+                if computed != (event.start_at, event.end_at):
+                    event.start_at, event.end_at = computed
+                    changed.append(event)
+            # Cada lote se escribe en su propia transacción
+            Event.objects.bulk_update(changed, ["start_at", "end_at"])
+            updated += len(changed)
+            last = batch[-1].pk
+
+        self.stdout.write(self.style.SUCCESS(f"{updated} eventos actualizados."))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from modules.events.models.models import Event
+from modules.events.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Regenera el índice de búsqueda de eventos (p. ej. tras bulk_create o "
+        "update() sobre eventos, que no pasan por Event.save())."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Eventos indexados por lote (1000 por defecto).",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            indexed = rebuild_search_index(
+                Event.objects.all(), batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"{indexed} eventos indexados."))
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Q
+
+from modules.events.models.models import Category
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula active_events_count y total_events_count de cada categoría "
+        "y corrige los que se hayan desviado (p. ej. tras bulk_create o "
+        "update() sobre eventos, que no pasan por Event.save())."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Solo informa de las diferencias, sin corregirlas.",
+        )
+
+    def handle(self, *args, **options):
+        categories = Category.objects.annotate(
+            actual_active=Count("events", filter=Q(events__is_active=True)),
+            actual_total=Count("events"),
+        ).only("id", "name", "active_events_count", "total_events_count")
+
+        fixed = 0
+        for category in categories.iterator():
+            if (category.active_events_count == category.actual_active
+                    and category.total_events_count == category.actual_total):
+                continue
+            fixed += 1
+            self.stdout.write(
+                f"{category.name}: activos {category.active_events_count} -> "
+                f"{category.actual_active}, total {category.total_events_count} "
+                f"-> {category.actual_total}"
+            )
+            if not options["dry_run"]:
+                Category.objects.filter(pk=category.pk).update(
+                    active_events_count=category.actual_active,
+                    total_events_count=category.actual_total,
+                )
+
+        verb = "con diferencias" if options["dry_run"] else "corregidas"
+        self.stdout.write(self.style.SUCCESS(f"{fixed} categorías {verb}."))
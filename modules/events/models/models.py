@@ -1,14 +1,19 @@
-from django.db import models
+import datetime
+
+from django.db import models, transaction
+from django.db.models import F, Q
+from django.db.models.functions import Greatest, Lower
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator
 from django.core.exceptions import ValidationError
 from modules.common.models import AuditableMixins
+from modules.events import search
 
 
 class Category(AuditableMixins):
     name = models.CharField(
         max_length=255,
-        unique=True,
         help_text=_("Nombre de la categoría")
     )
     description = models.TextField(
@@ -17,20 +22,46 @@ class Category(AuditableMixins):
     )
     is_active = models.BooleanField(default=True, help_text=_(
         "Indica si la categoría está activa"), null=False, blank=False)
+    # Contadores desnormalizados que mantiene Event.save()/delete(); el
+    # comando reconcile_category_counts corrige cualquier desviación.
+    active_events_count = models.PositiveIntegerField(
+        default=0, editable=False,
+        help_text=_("Número de eventos activos de la categoría"))
+    total_events_count = models.PositiveIntegerField(
+        default=0, editable=False,
+        help_text=_("Número total de eventos de la categoría"))
 
     class Meta:
         verbose_name = _('Category')
         verbose_name_plural = _('Categories')
         ordering = ['name']
+        constraints = [
+            # Nombre único sin distinguir mayúsculas
+            models.UniqueConstraint(
+                Lower('name'), name='events_category_name_ci_unique'),
+        ]
+        indexes = [
+            # Orden de la paginación por keyset
+            models.Index(fields=['name', 'id']),
+        ]
 
     def __str__(self):
         return self.name
 
+    @classmethod
+    def adjust_event_counts(cls, category_id, total=0, active=0):
+        # Acotados a 0: un contador desviado no debe impedir escribir el
+        # evento (reconcile_category_counts lo corrige después).
+        if total or active:
+            cls.objects.filter(pk=category_id).update(
+                total_events_count=Greatest(F('total_events_count') + total, 0),
+                active_events_count=Greatest(F('active_events_count') + active, 0),
+            )
+
 
 class Event(AuditableMixins):
     name = models.CharField(
         max_length=255,
-        unique=True,
         help_text=_("Nombre del evento")
     )
     description = models.TextField(
@@ -67,28 +98,135 @@ class Event(AuditableMixins):
     )
     is_active = models.BooleanField(default=True, help_text=_(
         "Indica si la categoría está activa"), null=False, blank=False)
+    # Fecha y hora combinadas que mantiene save(), para filtrar y ordenar por
+    # ventanas de tiempo con un solo índice. Nulas solo en filas creadas sin
+    # pasar por save(): backfill_event_datetimes las rellena.
+    start_at = models.DateTimeField(
+        null=True, editable=False,
+        help_text=_("Inicio del evento (start_date + start_time)"))
+    end_at = models.DateTimeField(
+        null=True, editable=False,
+        help_text=_("Fin del evento (end_date + end_time)"))
 
     class Meta:
         verbose_name = _('Event')
         verbose_name_plural = _('Events')
         ordering = ['name']
+        constraints = [
+            # Nombre único sin distinguir mayúsculas
+            models.UniqueConstraint(
+                Lower('name'), name='events_event_name_ci_unique'),
+        ]
         indexes = [
             models.Index(fields=['start_date', 'end_date']),
-            models.Index(fields=['category']),
+            # Orden de la paginación por keyset
+            models.Index(fields=['start_at', 'id']),
+            # Predicados de EventFilter sobre eventos activos
+            models.Index(
+                fields=['end_at', 'start_at'], condition=Q(is_active=True),
+                name='events_active_dates_idx'),
+            models.Index(
+                fields=['price'], condition=Q(is_active=True),
+                name='events_active_price_idx'),
+            models.Index(
+                fields=['category', 'start_at', 'id'],
+                condition=Q(is_active=True),
+                name='events_active_category_idx'),
         ]
 
+    # Campos que afectan al índice de búsqueda (modules.events.search)
+    SEARCH_FIELDS = {'name', 'location', 'description', 'is_active'}
+    # Campos de los que se calculan start_at y end_at
+    SCHEDULE_FIELDS = {'start_date', 'start_time', 'end_date', 'end_time'}
+
     def __str__(self):
         return f'{self.name} ({self.start_date})'
 
+    @staticmethod
+    def combine_datetime(day, time):
+        """
+        Fecha y hora locales (``TIME_ZONE``) como datetime con zona, o
+        ``None`` si falta alguna.
+        """
+        if day is None or time is None:
+            return None
+        return timezone.make_aware(
+            datetime.datetime.combine(day, time), timezone.get_default_timezone())
+
+    def compute_datetimes(self):
+        return (self.combine_datetime(self.start_date, self.start_time),
+                self.combine_datetime(self.end_date, self.end_time))
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._counted_state = instance._current_count_state()
+        return instance
+
+    def _current_count_state(self):
+        if {'category_id', 'is_active'} <= self.__dict__.keys():
+            return (self.category_id, self.is_active)
+        return None
+
+    def _stored_count_state(self):
+        state = getattr(self, '_counted_state', None)
+        if state is None:
+            state = Event.objects.filter(pk=self.pk).values_list(
+                'category_id', 'is_active').first()
+        return state
+
+    def _update_category_counts(self, old, new):
+        """
+        Aplica a los contadores de las categorías el paso de ``old`` a
+        ``new`` (pares ``(category_id, is_active)``; ``None`` si el evento
+        no existía o deja de existir).
+        """
+        if old is not None and new is not None and old[0] == new[0]:
+            Category.adjust_event_counts(new[0], active=int(new[1]) - int(old[1]))
+            return
+        if old is not None:
+            Category.adjust_event_counts(old[0], total=-1, active=-int(old[1]))
+        if new is not None:
+            Category.adjust_event_counts(new[0], total=1, active=int(new[1]))
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or self.SCHEDULE_FIELDS & set(update_fields):
+            self.start_at, self.end_at = self.compute_datetimes()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'start_at', 'end_at'}
+        with transaction.atomic():
+            old = None if self._state.adding else self._stored_count_state()
+            super().save(*args, **kwargs)
+            new = (self.category_id, self.is_active)
+            if old is not None and update_fields is not None:
+                # Lo que no se ha guardado sigue como estaba en la BD.
+                new = (
+                    new[0] if {'category', 'category_id'} & set(update_fields) else old[0],
+                    new[1] if 'is_active' in update_fields else old[1],
+                )
+            self._update_category_counts(old, new)
+            if update_fields is None or self.SEARCH_FIELDS & set(update_fields):
+                search.index_event(self, active=new[1])
+        self._counted_state = new
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            old = self._stored_count_state()
+            pk, using = self.pk, self._state.db
+            result = super().delete(*args, **kwargs)
+            self._update_category_counts(old, None)
+            search.unindex_events([pk], using=using)
+        return result
+
     def clean(self):
         if self.start_date and self.end_date and self.start_date > self.end_date:
             raise ValidationError({
                 'end_date': _('La fecha de inicio no puede ser posterior a la fecha de fin.')
             })
 
-        if (self.start_time and self.end_time and
-            self.start_date == self.end_date and
-                self.start_time > self.end_time):
+        start_at, end_at = self.compute_datetimes()
+        if start_at and end_at and start_at > end_at:
             raise ValidationError({
                 'end_time': _('La hora de inicio no puede ser posterior a la hora de fin.')
             })
@@ -0,0 +1,238 @@
+"""
+Búsqueda de texto completo sobre eventos.
+
+El índice vive en una tabla aparte, ``events_event_search``, que no es un
+modelo: una tabla virtual FTS5 en SQLite y una tabla con ``tsvector`` e
+índice GIN en PostgreSQL. Se crea tras ``migrate`` (señal ``post_migrate``)
+y ``Event.save()``/``delete()`` la mantienen al día fila a fila; solo se
+indexan eventos activos. ``rebuild_search_index`` la regenera entera (tras
+cargas con ``bulk_create`` o ``update()``, que no pasan por ``save()``).
+"""
+import re
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+
+SEARCH_TABLE = 'events_event_search'
+# Configuración de texto de PostgreSQL (stemming y stopwords)
+SEARCH_CONFIG = getattr(settings, 'SEARCH_CONFIG', 'spanish')
+# Las palabras que sobren se ignoran
+MAX_SEARCH_TERMS = getattr(settings, 'MAX_SEARCH_TERMS', 16)
+
+_WORD = re.compile(r'\w+')
+
+
+def search_terms(text):
+    """
+    Palabras de la búsqueda del usuario. Solo se conservan caracteres de
+    palabra, así que la sintaxis de consulta de la BD nunca llega a ella.
+    """
+    return _WORD.findall(text or '')[:MAX_SEARCH_TERMS]
+
+
+def _pk_column(queryset):
+    meta = queryset.model._meta
+    return f'{meta.db_table}.{meta.pk.column}'
+
+
+def _document(event):
+    return (event.name, event.location or '', event.description or '')
+
+
+class SQLiteSearchBackend:
+    """
+    FTS5 con ``rowid`` = ``Event.id``. Cada término busca por prefijo y la
+    relevancia es BM25 con más peso para el nombre que para la ubicación y
+    la descripción.
+    """
+
+    weights = (10.0, 3.0, 1.0)
+
+    def create(self, cursor):
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} '
+            f'USING fts5(name, location, description, '
+            f"tokenize='unicode61 remove_diacritics 2')")
+
+    def clear(self, cursor):
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+
+    def upsert(self, cursor, rows):
+        cursor.executemany(
+            f'INSERT OR REPLACE INTO {SEARCH_TABLE} '
+            f'(rowid, name, location, description) VALUES (%s, %s, %s, %s)',
+            rows)
+
+    def remove(self, cursor, ids):
+        cursor.executemany(
+            f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [(pk,) for pk in ids])
+
+    def search(self, queryset, terms):
+        match = ' '.join(f'"{term}"*' for term in terms)
+        weights = ', '.join(str(weight) for weight in self.weights)
+        matches = RawSQL(
+            f'SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s',
+            [match])
+        # FTS5 resuelve MATCH con rowid = ? sin recorrer el índice, así que
+        # la relevancia por fila es una búsqueda puntual.
+        rank = RawSQL(
+            # bm25() es negativo y menor cuanto más relevante
+            f'SELECT -bm25({SEARCH_TABLE}, {weights}) FROM {SEARCH_TABLE} '
+            f'WHERE {SEARCH_TABLE} MATCH %s '
+            f'AND {SEARCH_TABLE}.rowid = {_pk_column(queryset)}',
+            [match], output_field=FloatField())
+        return queryset.filter(pk__in=matches).annotate(search_rank=rank)
+
+
+class PostgreSQLSearchBackend:
+    """
+    ``tsvector`` precalculado con pesos (A nombre, B ubicación,
+    C descripción), índice GIN y ``ts_rank`` como relevancia. La clave
+    foránea borra el documento junto con el evento.
+    """
+
+    def create(self, cursor):
+        cursor.execute(
+            f'CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ('
+            f'event_id bigint PRIMARY KEY REFERENCES events_event (id) '
+            f'ON DELETE CASCADE, '
+            f'document tsvector NOT NULL)')
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_document_idx '
+            f'ON {SEARCH_TABLE} USING gin (document)')
+
+    def clear(self, cursor):
+        cursor.execute(f'TRUNCATE {SEARCH_TABLE}')
+
+    def upsert(self, cursor, rows):
+        cursor.executemany(
+            f'INSERT INTO {SEARCH_TABLE} (event_id, document) VALUES (%s, '
+            f"setweight(to_tsvector(%s::regconfig, %s), 'A') || "
+            f"setweight(to_tsvector(%s::regconfig, %s), 'B') || "
+            f"setweight(to_tsvector(%s::regconfig, %s), 'C')) "
+            f'ON CONFLICT (event_id) DO UPDATE SET document = EXCLUDED.document',
+            [(pk, SEARCH_CONFIG, name, SEARCH_CONFIG, location,
+              SEARCH_CONFIG, description)
+             for pk, name, location, description in rows])
+
+    def remove(self, cursor, ids):
+        cursor.execute(
+            f'DELETE FROM {SEARCH_TABLE} WHERE event_id = ANY(%s)', [list(ids)])
+
+    def search(self, queryset, terms):
+        query = ' & '.join(f'{term}:*' for term in terms)
+        matches = RawSQL(
+            f'SELECT event_id FROM {SEARCH_TABLE} '
+            f'WHERE document @@ to_tsquery(%s::regconfig, %s)',
+            [SEARCH_CONFIG, query])
+        rank = RawSQL(
+            f'SELECT ts_rank(document, to_tsquery(%s::regconfig, %s)) '
+            f'FROM {SEARCH_TABLE} '
+            f'WHERE {SEARCH_TABLE}.event_id = {_pk_column(queryset)}',
+            [SEARCH_CONFIG, query], output_field=FloatField())
+        return queryset.filter(pk__in=matches).annotate(search_rank=rank)
+
+
+class FallbackSearchBackend:
+    """
+    Otras bases de datos: sin índice, ``icontains`` por término y sin
+    relevancia.
+    """
+
+    def create(self, cursor):
+        pass
+
+    def clear(self, cursor):
+        pass
+
+    def upsert(self, cursor, rows):
+        pass
+
+    def remove(self, cursor, ids):
+        pass
+
+    def search(self, queryset, terms):
+        for term in terms:
+            queryset = queryset.filter(
+                Q(name__icontains=term) | Q(location__icontains=term)
+                | Q(description__icontains=term))
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+BACKENDS = {
+    'sqlite': SQLiteSearchBackend(),
+    'postgresql': PostgreSQLSearchBackend(),
+}
+
+
+def get_backend(using):
+    return BACKENDS.get(connections[using].vendor, FallbackSearchBackend())
+
+
+def create_search_index(using='default', **kwargs):
+    """
+    Crea la tabla del índice si no existe. Receptor de ``post_migrate``.
+    """
+    with connections[using].cursor() as cursor:
+        get_backend(using).create(cursor)
+
+
+def index_event(event, active=None):
+    """
+    Indexa ``event`` si está activo (``active`` si se indica) o lo quita
+    del índice si no.
+    """
+    using = event._state.db
+    active = event.is_active if active is None else active
+    with connections[using].cursor() as cursor:
+        if active:
+            get_backend(using).upsert(cursor, [(event.pk, *_document(event))])
+        else:
+            get_backend(using).remove(cursor, [event.pk])
+
+
+def unindex_events(ids, using='default'):
+    with connections[using].cursor() as cursor:
+        get_backend(using).remove(cursor, ids)
+
+
+def rebuild_search_index(queryset, batch_size=1000):
+    """
+    Vacía el índice y vuelve a indexar los eventos activos de ``queryset``
+    por lotes de ``batch_size``. Devuelve cuántos se han indexado.
+    """
+    using = queryset.db
+    backend = get_backend(using)
+    rows = queryset.filter(is_active=True).order_by('pk').values_list(
+        'pk', 'name', 'location', 'description')
+    indexed = 0
+    with connections[using].cursor() as cursor:
+        backend.create(cursor)
+        backend.clear(cursor)
+        last = None
+        while True:
+            batch = rows.filter(pk__gt=last) if last is not None else rows
+            batch = [
+                (pk, name, location or '', description or '')
+                for pk, name, location, description in batch[:batch_size]
+            ]
+            if not batch:
+                break
+            backend.upsert(cursor, batch)
+            indexed += len(batch)
+            last = batch[-1][0]
+    return indexed
+
+
+def search_events(queryset, text):
+    """
+    Eventos de ``queryset`` que contienen todas las palabras de ``text``
+    (por prefijo), anotados con ``search_rank`` (mayor es más relevante).
+    """
+    terms = search_terms(text)
+    if not terms:
+        return queryset.none()
+    return get_backend(queryset.db).search(queryset, terms)
@@ -1,19 +1,29 @@
 from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
-from modules.common.serializer import AuditableSerializerMixin
+from modules.common.serializer import AuditableSerializerMixin, UniqueConstraintSerializerMixin
 from modules.events.models.models import Category, Event
 
 
 # Serializadores para Category
 class CategoryListSerializer(AuditableSerializerMixin):
+    events_count = serializers.IntegerField(
+        source='active_events_count', read_only=True)
+    total_events_count = serializers.IntegerField(read_only=True)
+
     class Meta:
         model = Category
-        fields = ['id', 'name', 'description',
-                  'created_date', 'updated_date', 'is_active']
+        fields = ['id', 'name', 'description', 'events_count',
+                  'total_events_count', 'created_date', 'updated_date',
+                  'is_active']
+
 
+class CategoryCreateSerializer(UniqueConstraintSerializerMixin, AuditableSerializerMixin):
+    unique_constraint_errors = {
+        'events_category_name_ci_unique': (
+            'name', _("Ya existe una categoría con este nombre.")),
+    }
 
-class CategoryCreateSerializer(AuditableSerializerMixin):
     class Meta:
         model = Category
         fields = ['name', 'description', 'is_active']
@@ -33,16 +43,10 @@ class CategoryCreateSerializer(AuditableSerializerMixin):
                 _("La descripción debe tener al menos 10 caracteres."))
         return value.strip() if value else value
 
-    def validate(self, attrs):
-        name = attrs.get('name')
-        if Category.objects.filter(name__iexact=name).exists():
-            raise serializers.ValidationError({
-                'name': _("Ya existe una categoría con este nombre.")
-            })
-        return attrs
 
+class CategoryUpdateSerializer(UniqueConstraintSerializerMixin, AuditableSerializerMixin):
+    unique_constraint_errors = CategoryCreateSerializer.unique_constraint_errors
 
-class CategoryUpdateSerializer(AuditableSerializerMixin):
     class Meta:
         model = Category
         fields = ['name', 'description', 'is_active']
@@ -54,12 +58,6 @@ class CategoryUpdateSerializer(AuditableSerializerMixin):
         if len(value.strip()) < 3:
             raise serializers.ValidationError(
                 _("El nombre debe tener al menos 3 caracteres."))
-
-        # Verificar unicidad excluyendo el objeto actual
-        instance = self.instance
-        if Category.objects.filter(name__iexact=value).exclude(pk=instance.pk).exists():
-            raise serializers.ValidationError(
-                _("Ya existe una categoría con este nombre."))
         return value.strip()
 
     def validate_description(self, value):
@@ -72,14 +70,13 @@ class CategoryUpdateSerializer(AuditableSerializerMixin):
 
 
 class CategoryDetailSerializer(AuditableSerializerMixin):
-    events_count = serializers.SerializerMethodField()
+    events_count = serializers.IntegerField(
+        source='active_events_count', read_only=True)
+    total_events_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Category
         fields = [
-            'id', 'name', 'description', 'events_count',
+            'id', 'name', 'description', 'events_count', 'total_events_count',
             'created_date', 'updated_date', 'is_active'
         ]
-
-    def get_events_count(self, obj):
-        return obj.events.count()
@@ -1,9 +1,38 @@
 from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
-from modules.common.serializer import AuditableSerializerMixin
+from modules.common.serializer import AuditableSerializerMixin, UniqueConstraintSerializerMixin
 from modules.events.models.models import Event
 
 
+def validate_schedule(attrs, instance=None):
+    """
+    Comprueba que el evento no termina antes de empezar. En las
+    actualizaciones parciales los campos que no llegan se toman de
+    ``instance``.
+    """
+    values = {
+        name: attrs.get(name, getattr(instance, name, None))
+        for name in Event.SCHEDULE_FIELDS
+    }
+    start_date, end_date = values['start_date'], values['end_date']
+
+    # Validar fechas
+    if start_date and end_date and start_date > end_date:
+        raise serializers.ValidationError({
+            'end_date': _("La fecha de inicio no puede ser posterior a la fecha de finalización.")
+        })
+
+    # Validar fecha y hora combinadas
+    start_at = Event.combine_datetime(start_date, values['start_time'])
+    end_at = Event.combine_datetime(end_date, values['end_time'])
+    if start_at and end_at and start_at > end_at:
+        raise serializers.ValidationError({
+            'end_time': _("La hora de inicio no puede ser posterior a la hora de finalización.")
+        })
+
+    return attrs
+
+
 class EventListSerializer(AuditableSerializerMixin):
     category_name = serializers.CharField(
         source='category.name', read_only=True)
@@ -12,7 +41,7 @@ class EventListSerializer(AuditableSerializerMixin):
         model = Event
         fields = [
             'id', 'name', 'description', 'start_date', 'end_date',
-            'location', 'price', 'category', 'category_name',
+            'start_at', 'end_at', 'location', 'price', 'category', 'category_name',
             'created_date', 'updated_date', 'is_active'
         ]
 
@@ -26,11 +55,17 @@ class EventDetailSerializer(AuditableSerializerMixin):
         fields = [
             'id', 'name', 'description', 'capacity', 'category', 'category_name',
             'start_date', 'end_date', 'start_time', 'end_time',
+            'start_at', 'end_at',
             'location', 'price', 'created_date', 'updated_date', 'is_active'
         ]
 
 
-class EventCreateSerializer(AuditableSerializerMixin):
+class EventCreateSerializer(UniqueConstraintSerializerMixin, AuditableSerializerMixin):
+    unique_constraint_errors = {
+        'events_event_name_ci_unique': (
+            'name', _("Ya existe un evento con este nombre.")),
+    }
+
     class Meta:
         model = Event
         fields = [
@@ -103,35 +138,12 @@ class EventCreateSerializer(AuditableSerializerMixin):
         return value
 
     def validate(self, attrs):
-        start_date = attrs.get('start_date')
-        end_date = attrs.get('end_date')
-        start_time = attrs.get('start_time')
-        end_time = attrs.get('end_time')
-        name = attrs.get('name')
-
-        # Validar fechas
-        if start_date and end_date and start_date > end_date:
-            raise serializers.ValidationError({
-                'end_date': _("La fecha de inicio no puede ser posterior a la fecha de finalización.")
-            })
-
-        # Validar horas si las fechas son iguales
-        if (start_date and end_date and start_time and end_time and
-                start_date == end_date and start_time > end_time):
-            raise serializers.ValidationError({
-                'end_time': _("La hora de inicio no puede ser posterior a la hora de finalización.")
-            })
-
-        # Validar unicidad del nombre
-        if Event.objects.filter(name__iexact=name).exists():
-            raise serializers.ValidationError({
-                'name': _("Ya existe un evento con este nombre.")
-            })
-
-        return attrs
-
-
-class EventUpdateSerializer(AuditableSerializerMixin):
+        return validate_schedule(attrs, self.instance)
+
+
+class EventUpdateSerializer(UniqueConstraintSerializerMixin, AuditableSerializerMixin):
+    unique_constraint_errors = EventCreateSerializer.unique_constraint_errors
+
     class Meta:
         model = Event
         fields = [
@@ -147,12 +159,6 @@ class EventUpdateSerializer(AuditableSerializerMixin):
         if len(value.strip()) < 5:
             raise serializers.ValidationError(
                 _("El nombre debe tener al menos 5 caracteres."))
-
-        # Verificar unicidad excluyendo el objeto actual
-        instance = self.instance
-        if Event.objects.filter(name__iexact=value).exclude(pk=instance.pk).exists():
-            raise serializers.ValidationError(
-                _("Ya existe un evento con este nombre."))
         return value.strip()
 
     def validate_description(self, value):
@@ -210,30 +216,4 @@ class EventUpdateSerializer(AuditableSerializerMixin):
         return value
 
     def validate(self, attrs):
-        start_date = attrs.get('start_date')
-        end_date = attrs.get('end_date')
-        start_time = attrs.get('start_time')
-        end_time = attrs.get('end_time')
-        name = attrs.get('name')
-        instance = self.instance
-
-        # Validar fechas
-        if start_date and end_date and start_date > end_date:
-            raise serializers.ValidationError({
-                'end_date': _("La fecha de inicio no puede ser posterior a la fecha de finalización.")
-            })
-
-        # Validar horas si las fechas son iguales
-        if (start_date and end_date and start_time and end_time and
-                start_date == end_date and start_time > end_time):
-            raise serializers.ValidationError({
-                'end_time': _("La hora de inicio no puede ser posterior a la hora de finalización.")
-            })
-
-        # Validar unicidad del nombre excluyendo el objeto actual
-        if Event.objects.filter(name__iexact=name).exclude(pk=instance.pk).exists():
-            raise serializers.ValidationError({
-                'name': _("Ya existe un evento con este nombre.")
-            })
-
-        return attrs
+        return validate_schedule(attrs, self.instance)
@@ -1,3 +1,612 @@
-from django.test import TestCase
+import datetime
+from io import StringIO
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from modules.common.response_cache import response_cache_metrics
+from modules.events.filters import EventFilter
+from modules.events.models.models import Category, Event
+from modules.manager.models import User
+
+
+class EventListQueryCountTests(APITestCase):
+    """
+    El listado de eventos no debe hacer una consulta por fila (N+1).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="staff@example.com", password="x", is_staff=True)
+        categories = [
+            Category.objects.create(name=f"Categoría {i}") for i in range(3)]
+        day = datetime.date(2025, 1, 1)
+        Event.objects.bulk_create([
+            Event(
+                name=f"Evento {i}", category=categories[i % 3],
+                start_date=day, end_date=day,
+                start_time=datetime.time(9), end_time=datetime.time(10),
+            )
+            for i in range(30)
+        ])
+        call_command("backfill_event_datetimes", stdout=StringIO())
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries), response
+
+    def test_list_query_count_does_not_depend_on_page_size(self):
+        small, _ = self.count_queries("/api/events/?page_size=5")
+        large, response = self.count_queries("/api/events/?page_size=30")
+        self.assertEqual(len(response.data["results"]), 30)
+        self.assertEqual(small, large)
+        self.assertEqual(large, 1)
+
+    def test_page_number_list_query_count_does_not_depend_on_page_size(self):
+        small, _ = self.count_queries("/api/events/?page=1&page_size=5")
+        cache.clear()
+        large, _ = self.count_queries("/api/events/?page=1&page_size=30")
+        self.assertEqual(small, large)
+
+    def test_requested_fields(self):
+        _, response = self.count_queries(
+            "/api/events/?fields=id,category_name&page_size=2")
+        self.assertEqual(
+            set(response.data["results"][0]), {"id", "category_name"})
+
+
+class QueryCountTestCase(APITestCase):
+    """
+    Base de las pruebas de regresión de consultas: datos sembrados y un
+    usuario staff autenticado sin pasar por JWT.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="admin@example.com", password="x", is_staff=True)
+        cls.category = Category.objects.create(
+            name="Conciertos", description="Música en directo todo el año")
+        for i in range(1, 3):
+            Category.objects.create(name=f"Categoría {i}")
+        day = datetime.date(2025, 1, 1)
+        Event.objects.bulk_create([
+            Event(
+                name=f"Evento {i}", category=cls.category,
+                description="Descripción suficientemente larga",
+                capacity=100, start_date=day, end_date=day,
+                start_time=datetime.time(9), end_time=datetime.time(10),
+            )
+            for i in range(20)
+        ])
+        # bulk_create no pasa por Event.save(): se cuadran los contadores y
+        # se rellenan start_at/end_at.
+        call_command("reconcile_category_counts", stdout=StringIO())
+        call_command("backfill_event_datetimes", stdout=StringIO())
+        cls.event = Event.objects.order_by("id").first()
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+
+class EventViewSetQueryCountTests(QueryCountTestCase):
+    payload = {
+        "name": "Festival de verano",
+        "description": "Tres días de conciertos al aire libre",
+        "capacity": 500,
+        "start_date": "2025-07-01",
+        "end_date": "2025-07-03",
+        "start_time": "10:00",
+        "end_time": "23:00",
+        "location": "Parque central",
+        "price": "25.00",
+    }
+
+    def test_list(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get("/api/events/").status_code, 200)
+
+    def test_list_page_number(self):
+        with self.assertNumQueries(2):
+            self.client.get("/api/events/?page=2")
+        # El total queda en caché.
+        with self.assertNumQueries(1):
+            self.client.get("/api/events/?page=1")
+
+    def test_retrieve(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(f"/api/events/{self.event.id}/")
+        self.assertEqual(response.status_code, 200)
+
+    def test_create(self):
+        payload = dict(self.payload, category=self.category.id)
+        with self.assertNumQueries(8):
+            response = self.client.post("/api/events/", payload, format="json")
+        self.assertEqual(response.status_code, 201)
+
+    def test_update(self):
+        payload = dict(self.payload, category=self.category.id)
+        with self.assertNumQueries(8):
+            response = self.client.put(
+                f"/api/events/{self.event.id}/", payload, format="json")
+        self.assertEqual(response.status_code, 200)
+
+    def test_partial_update(self):
+        with self.assertNumQueries(7):
+            response = self.client.patch(
+                f"/api/events/{self.event.id}/", {"location": "Sala 2"},
+                format="json")
+        self.assertEqual(response.status_code, 200)
+
+    def test_create_duplicate_name_ignores_case(self):
+        payload = dict(self.payload, name="EVENTO 1", category=self.category.id)
+        response = self.client.post("/api/events/", payload, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("name", response.data["error"])
+
+    def test_destroy(self):
+        with self.assertNumQueries(6):
+            response = self.client.delete(f"/api/events/{self.event.id}/")
+        self.assertEqual(response.status_code, 200)
+
+
+class CategoryViewSetQueryCountTests(QueryCountTestCase):
+    def test_list(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get("/api/categories/").status_code, 200)
+
+    def test_list_page_number(self):
+        with self.assertNumQueries(2):
+            self.client.get("/api/categories/?page=1")
+
+    def test_retrieve(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(f"/api/categories/{self.category.id}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["events_count"], 20)
+
+    def test_create(self):
+        with self.assertNumQueries(3):
+            response = self.client.post(
+                "/api/categories/",
+                {"name": "Teatro", "description": "Obras y monólogos"},
+                format="json")
+        self.assertEqual(response.status_code, 201)
+
+    def test_update(self):
+        with self.assertNumQueries(4):
+            response = self.client.put(
+                f"/api/categories/{self.category.id}/",
+                {"name": "Conciertos en vivo", "description": "Música en directo"},
+                format="json")
+        self.assertEqual(response.status_code, 200)
+
+    def test_partial_update(self):
+        with self.assertNumQueries(4):
+            response = self.client.patch(
+                f"/api/categories/{self.category.id}/",
+                {"description": "Solo música en directo"}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+    def test_update_duplicate_name_ignores_case(self):
+        response = self.client.patch(
+            f"/api/categories/{self.category.id}/", {"name": "categoría 1"},
+            format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("name", response.data["error"])
+
+    def test_destroy(self):
+        with self.assertNumQueries(2):
+            response = self.client.delete(f"/api/categories/{self.category.id}/")
+        self.assertEqual(response.status_code, 200)
+
+
+class CategoryEventCountTests(APITestCase):
+    """
+    Contadores desnormalizados de eventos por categoría.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.music = Category.objects.create(name="Música")
+        cls.theatre = Category.objects.create(name="Teatro")
+
+    def create_event(self, name, category):
+        day = datetime.date(2025, 1, 1)
+        return Event.objects.create(
+            name=name, category=category, start_date=day, end_date=day,
+            start_time=datetime.time(9), end_time=datetime.time(10))
+
+    def assertCounts(self, category, active, total):
+        category.refresh_from_db()
+        self.assertEqual(
+            (category.active_events_count, category.total_events_count),
+            (active, total))
+
+    def test_create_soft_delete_and_restore(self):
+        event = self.create_event("Concierto", self.music)
+        self.create_event("Recital", self.music)
+        self.assertCounts(self.music, 2, 2)
+
+        event.is_active = False
+        event.save()
+        self.assertCounts(self.music, 1, 2)
+
+        event = Event.objects.get(pk=event.pk)
+        event.is_active = True
+        event.save(update_fields=["is_active"])
+        self.assertCounts(self.music, 2, 2)
+
+    def test_category_change_and_delete(self):
+        event = self.create_event("Concierto", self.music)
+        event.category = self.theatre
+        event.save()
+        self.assertCounts(self.music, 0, 0)
+        self.assertCounts(self.theatre, 1, 1)
+
+        Event.objects.get(pk=event.pk).delete()
+        self.assertCounts(self.theatre, 0, 0)
+
+    def test_soft_delete_with_drifted_counter(self):
+        event = self.create_event("Concierto", self.music)
+        Category.objects.filter(pk=self.music.pk).update(
+            active_events_count=0, total_events_count=0)
+        staff = User.objects.create_user(
+            email="staff@example.com", password="x", is_staff=True)
+        self.client.force_authenticate(staff)
+        response = self.client.delete(f"/api/events/{event.id}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertCounts(self.music, 0, 0)
+
+        Event.objects.get(pk=event.pk).delete()
+        self.assertCounts(self.music, 0, 0)
+
+    def test_reconcile(self):
+        self.create_event("Concierto", self.music)
+        Category.objects.filter(pk=self.music.pk).update(
+            active_events_count=7, total_events_count=7)
+        call_command("reconcile_category_counts", stdout=StringIO())
+        self.assertCounts(self.music, 1, 1)
+
+
+class EventFilterTests(APITestCase):
+    """
+    EventFilter: resultados y uso de los índices parciales (EXPLAIN).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="user@example.com", password="x")
+        cls.staff = User.objects.create_user(
+            email="staff@example.com", password="x", is_staff=True)
+        cls.music = Category.objects.create(name="Música")
+        cls.theatre = Category.objects.create(name="Teatro")
+        day = datetime.date(2025, 1, 1)
+        for i in range(30):
+            Event.objects.create(
+                name=f"Evento {i}", category=cls.music if i % 2 else cls.theatre,
+                start_date=day + datetime.timedelta(days=i),
+                end_date=day + datetime.timedelta(days=i + 2),
+                start_time=datetime.time(9), end_time=datetime.time(10),
+                price=i or None, is_active=i != 29,
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def names(self, params):
+        params = dict(params, page_size=100)
+        response = self.client.get("/api/events/", params)
+        self.assertEqual(response.status_code, 200)
+        return {event["name"] for event in response.data["results"]}
+
+    def explain(self, params):
+        request = RequestFactory().get("/")
+        request.user = self.user
+        return EventFilter(params, queryset=Event.objects.all(), request=request).qs.explain()
+
+    def test_date_overlap(self):
+        self.assertEqual(
+            self.names({"date_from": "2025-01-10", "date_to": "2025-01-11"}),
+            {"Evento 7", "Evento 8", "Evento 9", "Evento 10"})
+
+    def test_datetime_window(self):
+        # Eventos de 9:00 del día i a 10:00 del día i + 2
+        self.assertEqual(
+            self.names({"datetime_from": "2025-01-12T10:30:00Z",
+                        "datetime_to": "2025-01-12T12:00:00Z"}),
+            {"Evento 10", "Evento 11"})
+        self.assertEqual(
+            self.names({"datetime_from": "2025-01-12T09:30:00Z",
+                        "datetime_to": "2025-01-12T09:30:00Z"}),
+            {"Evento 9", "Evento 10", "Evento 11"})
+
+    def test_price_range_and_free(self):
+        self.assertEqual(
+            self.names({"price_min": "3", "price_max": "5"}),
+            {"Evento 3", "Evento 4", "Evento 5"})
+        self.assertEqual(self.names({"free": "true"}), {"Evento 0"})
+        self.assertEqual(len(self.names({"free": "false"})), 28)
+
+    def test_category_set(self):
+        self.assertEqual(len(self.names({"category": f"{self.music.id}"})), 14)
+        self.assertEqual(
+            len(self.names({"category": f"{self.music.id},{self.theatre.id}"})), 29)
+
+    def test_inactive_only_for_staff(self):
+        self.assertEqual(self.names({"is_active": "false"}), set())
+        self.client.force_authenticate(self.staff)
+        self.assertEqual(self.names({"is_active": "false"}), {"Evento 29"})
+
+    def test_inactive_count_not_shared_with_users(self):
+        # El total cacheado para el staff no se sirve a otros clientes.
+        url = "/api/events/?is_active=false&page=1"
+        self.client.force_authenticate(self.staff)
+        self.assertEqual(self.client.get(url).data["count"], 1)
+        self.client.force_authenticate(self.user)
+        response = self.client.get(url)
+        self.assertEqual(response.data["count"], 0)
+        self.assertEqual(response.data["results"], [])
+
+    def test_indexes_are_used(self):
+        cases = [
+            ({"date_from": "2025-01-10", "date_to": "2025-01-11"},
+             "events_active_dates_idx"),
+            ({"datetime_from": "2025-01-10T12:00:00Z"}, "events_active_dates_idx"),
+            ({"price_min": "3", "price_max": "5"}, "events_active_price_idx"),
+            ({"category": f"{self.music.id}"}, "events_active_category_idx"),
+        ]
+        for params, index in cases:
+            with self.subTest(index=index):
+                self.assertIn(index, self.explain(params))
+
+
+class EventSearchTests(APITestCase):
+    """
+    ?q= sobre el índice de texto completo y su sincronización con Event.save().
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="user@example.com", password="x")
+        cls.category = Category.objects.create(name="Música")
+        cls.jazz = cls.create_event(
+            "Concierto de jazz", location="Auditorio", description="Música en directo")
+        cls.festival = cls.create_event(
+            "Festival de verano", description="Jazz, blues y conciertos")
+        cls.create_event("Obra de teatro", description="Comedia")
+
+    @classmethod
+    def create_event(cls, name, **kwargs):
+        day = datetime.date(2025, 1, 1)
+        return Event.objects.create(
+            name=name, category=cls.category, start_date=day, end_date=day,
+            start_time=datetime.time(9), end_time=datetime.time(10), **kwargs)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def search(self, q, **params):
+        response = self.client.get("/api/events/", dict(params, q=q))
+        self.assertEqual(response.status_code, 200)
+        return [event["name"] for event in response.data["results"]]
+
+    def test_ranked_and_paginated(self):
+        # El nombre pesa más que la descripción.
+        self.assertEqual(
+            self.search("jazz"), ["Concierto de jazz", "Festival de verano"])
+        response = self.client.get("/api/events/", {"q": "jazz", "page_size": 1})
+        self.assertEqual(response.data["count"], 2)
+        self.assertIsNotNone(response.data["next"])
+
+    def test_prefix_accents_and_all_terms(self):
+        self.assertEqual(self.search("musica"), ["Concierto de jazz"])
+        self.assertEqual(len(self.search("concier")), 2)
+        self.assertEqual(self.search("jazz verano"), ["Festival de verano"])
+        self.assertEqual(self.search('"); DROP'), [])
+
+    def test_index_follows_updates_and_soft_delete(self):
+        self.festival.name = "Ciclo de blues"
+        self.festival.save()
+        self.assertEqual(self.search("verano"), [])
+        self.assertEqual(self.search("ciclo"), ["Ciclo de blues"])
+
+        self.client.force_authenticate(
+            User.objects.create_user(email="staff@example.com", password="x",
+                                     is_staff=True))
+        self.client.delete(f"/api/events/{self.jazz.id}/")
+        self.assertEqual(self.search("jazz"), ["Ciclo de blues"])
+
+        Event.objects.get(pk=self.jazz.pk).delete()
+        self.assertEqual(self.search("auditorio"), [])
+
+    def test_rebuild(self):
+        Event.objects.filter(pk=self.jazz.pk).update(name="Recital de piano")
+        call_command("rebuild_search_index", stdout=StringIO())
+        self.assertEqual(self.search("piano"), ["Recital de piano"])
+
+
+class AutocompleteTests(APITestCase):
+    """
+    /autocomplete/ desde el índice en memoria y su refresco incremental.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="user@example.com", password="x")
+        cls.music = Category.objects.create(name="Música")
+        Category.objects.create(name="Museos")
+        Category.objects.create(name="Teatro")
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def names(self, url, q, **params):
+        response = self.client.get(url, dict(params, q=q))
+        self.assertEqual(response.status_code, 200)
+        return [item["name"] for item in response.data["results"]]
+
+    def test_prefix_ignores_case_and_accents(self):
+        url = "/api/categories/autocomplete/"
+        self.assertEqual(self.names(url, "MUS"), ["Museos", "Música"])
+        self.assertEqual(self.names(url, "musi"), ["Música"])
+        self.assertEqual(self.names(url, "mu", limit=1), ["Museos"])
+        self.assertEqual(self.names(url, ""), [])
+
+    def test_served_from_memory_and_refreshed_on_write(self):
+        url = "/api/events/autocomplete/"
+        day = datetime.date(2025, 1, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            event = Event.objects.create(
+                name="Concierto de jazz", category=self.music, start_date=day,
+                end_date=day, start_time=datetime.time(9),
+                end_time=datetime.time(10))
+        self.assertEqual(self.names(url, "conc"), ["Concierto de jazz"])
+        with self.assertNumQueries(0):
+            self.names(url, "conc")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            event.name = "Recital de piano"
+            event.save()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.names(url, "conc"), [])
+            self.assertEqual(self.names(url, "recital"), ["Recital de piano"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            event.is_active = False
+            event.save()
+        self.assertEqual(self.names(url, "recital"), [])
+
+
+class EventDatetimeTests(APITestCase):
+    """
+    start_at/end_at calculados en save() y rellenados por lotes.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(
+            email="staff@example.com", password="x", is_staff=True)
+        cls.category = Category.objects.create(name="Música")
+        cls.event = Event.objects.create(
+            name="Concierto", category=cls.category,
+            start_date=datetime.date(2025, 1, 1), end_date=datetime.date(2025, 1, 2),
+            start_time=datetime.time(21), end_time=datetime.time(1))
+
+    def test_computed_on_save(self):
+        self.assertEqual(
+            (self.event.start_at, self.event.end_at),
+            (datetime.datetime(2025, 1, 1, 21, tzinfo=datetime.timezone.utc),
+             datetime.datetime(2025, 1, 2, 1, tzinfo=datetime.timezone.utc)))
+
+        event = Event.objects.get(pk=self.event.pk)
+        event.end_time = datetime.time(3)
+        event.save(update_fields=["end_time"])
+        event.refresh_from_db()
+        self.assertEqual(event.end_at.hour, 3)
+
+    def test_backfill(self):
+        Event.objects.filter(pk=self.event.pk).update(start_at=None)
+        call_command("backfill_event_datetimes", batch_size=1, stdout=StringIO())
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.start_at.hour, 21)
+
+        # Sin --all solo se tocan las filas sin calcular.
+        Event.objects.filter(pk=self.event.pk).update(end_time=datetime.time(4))
+        call_command("backfill_event_datetimes", stdout=StringIO())
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.end_at.hour, 1)
+        call_command("backfill_event_datetimes", "--all", stdout=StringIO())
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.end_at.hour, 4)
+
+    def test_keyset_cursor_crosses_rows_without_start_at(self):
+        day = datetime.date(2025, 2, 1)
+        Event.objects.bulk_create([
+            Event(name=f"Sin calcular {i}", category=self.category,
+                  start_date=day, end_date=day,
+                  start_time=datetime.time(9), end_time=datetime.time(10))
+            for i in range(3)
+        ])
+        self.client.force_authenticate(self.staff)
+        expected = list(Event.objects.order_by(
+            F("start_at").asc(nulls_first=True), "id").values_list("id", flat=True))
+
+        seen, url = [], "/api/events/?page_size=2"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen += [event["id"] for event in response.data["results"]]
+            url, previous = response.data["next"], response.data["previous"]
+        self.assertEqual(seen, expected)
+
+        # Hacia atrás desde la última página se recorren las filas nulas.
+        seen = []
+        while previous:
+            response = self.client.get(previous)
+            self.assertEqual(response.status_code, 200)
+            seen = [event["id"] for event in response.data["results"]] + seen
+            previous = response.data["previous"]
+        self.assertEqual(seen, expected[:len(seen)])
+        self.assertEqual(len(seen), len(expected) - 2)
+
+    def test_partial_update_checks_combined_datetimes(self):
+        self.client.force_authenticate(self.staff)
+        response = self.client.patch(
+            f"/api/events/{self.event.id}/", {"end_date": "2025-01-01"},
+            format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("end_time", response.data["error"])
+
+
+class ResponseCacheTests(QueryCountTestCase):
+    """
+    Caché de respuestas de list/retrieve e invalidación desde las escrituras.
+    """
+
+    def get(self, url, queries):
+        with self.assertNumQueries(queries):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_hit_and_invalidation_on_write(self):
+        url = f"/api/events/{self.event.id}/"
+        self.assertEqual(self.get(url, 1)["X-Cache"], "MISS")
+        self.assertEqual(self.get(url, 0)["X-Cache"], "HIT")
+
+        self.client.patch(url, {"location": "Sala 2"}, format="json")
+        response = self.get(url, 1)
+        self.assertEqual(response.data["location"], "Sala 2")
+        self.assertEqual(response_cache_metrics("events-detail"),
+                         {"hit": 1, "miss": 2, "wait": 0})
+
+    def test_event_writes_invalidate_category_responses(self):
+        url = f"/api/categories/{self.category.id}/"
+        self.get(url, 1)
+        self.client.delete(f"/api/events/{self.event.id}/")
+        self.assertEqual(self.get(url, 1).data["events_count"], 19)
+
+    def test_key_depends_on_params_and_audience(self):
+        self.get("/api/events/?page_size=5", 1)
+        self.get("/api/events/?page_size=5", 0)
+        self.get("/api/events/?page_size=6", 1)
+        self.client.force_authenticate(
+            User.objects.create_user(email="user@example.com", password="x"))
+        self.get("/api/events/?page_size=5", 1)
@@ -10,7 +10,7 @@ from rest_framework.exceptions import PermissionDenied
 from drf_yasg import openapi as oa
 from drf_yasg.utils import swagger_auto_schema
 
-from modules.events.models.models import Category
+from modules.events.models.models import Category, Event
 from modules.events.serializers.category_serializers import (
     CategoryListSerializer,
     CategoryDetailSerializer,
@@ -19,14 +19,27 @@ from modules.events.serializers.category_serializers import (
 )
 
 from modules.common.utils import get_user_fullname
+from modules.common.pagination import KeysetPagination
+from modules.common.views import (
+    AutocompleteMixin,
+    PrefetchPlannerMixin,
+    ResponseCacheMixin,
+)
+from modules.authentication.permissions import HasAPIKeyScope
 
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(ResponseCacheMixin, AutocompleteMixin, PrefetchPlannerMixin,
+                      viewsets.ModelViewSet):
     """
     API endpoint that allows categories to be viewed or edited.
     """
     queryset = Category.objects.exclude(is_active=False)
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, HasAPIKeyScope]
+    api_key_scope = 'categories'
+    pagination_class = KeysetPagination
+    keyset_ordering = ('name', 'id')
+    # Los contadores de eventos cambian al escribir eventos
+    response_cache_models = (Category, Event)
     serializer_class = CategoryListSerializer
     lookup_field = 'id'
 
@@ -43,7 +56,7 @@ class CategoryViewSet(viewsets.ModelViewSet):
 
     def get_permissions(self):
         if self.action in ['create', 'update', 'partial_update', 'destroy']:
-            self.permission_classes = [IsAdminUser]
+            self.permission_classes = [IsAdminUser, HasAPIKeyScope]
         return super().get_permissions()
 
     def perform_create(self, serializer):
@@ -53,6 +66,7 @@ class CategoryViewSet(viewsets.ModelViewSet):
         if user.is_authenticated:
             full_name = get_user_fullname(user)
             serializer.save(created_by=full_name, created_date=timezone.now())
+            self.invalidate_response_cache()
         else:
             raise PermissionDenied(
                 detail="You do not have permission to perform this action."
@@ -65,6 +79,7 @@ class CategoryViewSet(viewsets.ModelViewSet):
         if user.is_authenticated:
             full_name = get_user_fullname(user)
             serializer.save(updated_by=full_name, updated_date=timezone.now())
+            self.invalidate_response_cache()
         else:
             raise PermissionDenied(
                 detail="You do not have permission to perform this action."
@@ -85,6 +100,7 @@ class CategoryViewSet(viewsets.ModelViewSet):
             instance.deleted_date = timezone.now()
             instance.is_active = False
             instance.save()
+        self.invalidate_response_cache()
 
     @swagger_auto_schema(
         operation_description="List all active categories.",
@@ -182,17 +198,20 @@ class CategoryViewSet(viewsets.ModelViewSet):
     )
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
-        if serializer.is_valid():
+        try:
+            serializer.is_valid(raise_exception=True)
+            # La unicidad del nombre la garantiza la BD al guardar.
             self.perform_create(serializer)
+        except ValidationError as exc:
             return Response(
-                {"message": _("Category created successfully"),
-                 "data": serializer.data},
-                status=status.HTTP_201_CREATED,
+                {"message": _("Category could not be created"),
+                 "error": exc.detail},
+                status=status.HTTP_400_BAD_REQUEST,
             )
         return Response(
-            {"message": _("Category could not be created"),
-             "error": serializer.errors},
-            status=status.HTTP_400_BAD_REQUEST,
+            {"message": _("Category created successfully"),
+             "data": serializer.data},
+            status=status.HTTP_201_CREATED,
         )
 
     @swagger_auto_schema(
@@ -242,17 +261,20 @@ class CategoryViewSet(viewsets.ModelViewSet):
         instance = self.get_object()
         serializer = self.get_serializer(
             instance, data=request.data, partial=partial)
-        if serializer.is_valid():
+        try:
+            serializer.is_valid(raise_exception=True)
+            # La unicidad del nombre la garantiza la BD al guardar.
             self.perform_update(serializer)
+        except ValidationError as exc:
             return Response(
-                {"message": _("Category updated successfully"),
-                 "data": serializer.data},
-                status=status.HTTP_200_OK,
+                {"message": _("Category could not be updated"),
+                 "error": exc.detail},
+                status=status.HTTP_400_BAD_REQUEST,
             )
         return Response(
-            {"message": _("Category could not be updated"),
-             "error": serializer.errors},
-            status=status.HTTP_400_BAD_REQUEST,
+            {"message": _("Category updated successfully"),
+             "data": serializer.data},
+            status=status.HTTP_200_OK,
         )
 
     @swagger_auto_schema(
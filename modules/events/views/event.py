@@ -6,11 +6,14 @@ from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 from rest_framework.validators import ValidationError
 from rest_framework.exceptions import PermissionDenied
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework.filters import OrderingFilter
 
 from drf_yasg import openapi as oa
 from drf_yasg.utils import swagger_auto_schema
 
-from modules.events.models.models import Event
+from modules.events.models.models import Category, Event
+from modules.events.filters import EventFilter, EventSearchFilter
 from modules.events.serializers.event_serializers import (
     EventListSerializer,
     EventDetailSerializer,
@@ -19,14 +22,33 @@ from modules.events.serializers.event_serializers import (
 )
 
 from modules.common.utils import get_user_fullname
+from modules.common.pagination import KeysetPagination
+from modules.common.views import (
+    AutocompleteMixin,
+    PrefetchPlannerMixin,
+    ResponseCacheMixin,
+)
+from modules.authentication.permissions import HasAPIKeyScope
 
 
-class EventViewSet(viewsets.ModelViewSet):
+class EventViewSet(ResponseCacheMixin, AutocompleteMixin, PrefetchPlannerMixin,
+                   viewsets.ModelViewSet):
     """
     API endpoint that allows events to be viewed or edited.
     """
-    queryset = Event.objects.filter(is_active=True)
-    permission_classes = [IsAuthenticated]
+    # EventFilter deja solo los activos salvo que el staff pida ?is_active=false
+    queryset = Event.objects.all()
+    filterset_class = EventFilter
+    # ?q= busca en el índice de texto completo y ordena por relevancia
+    filter_backends = [DjangoFilterBackend, EventSearchFilter, OrderingFilter]
+    permission_classes = [IsAuthenticated, HasAPIKeyScope]
+    api_key_scope = 'events'
+    pagination_class = KeysetPagination
+    keyset_ordering = ('start_at', 'id')
+    # Las búsquedas se paginan por número de página para conservar el orden
+    page_number_params = ('q',)
+    # Los listados incluyen el nombre de la categoría
+    response_cache_models = (Event, Category)
     serializer_class = EventListSerializer
     lookup_field = 'id'
 
@@ -43,7 +65,7 @@ class EventViewSet(viewsets.ModelViewSet):
 
     def get_permissions(self):
         if self.action in ['create', 'update', 'partial_update', 'destroy']:
-            self.permission_classes = [IsAdminUser]
+            self.permission_classes = [IsAdminUser, HasAPIKeyScope]
         return super().get_permissions()
 
     def perform_create(self, serializer):
@@ -53,6 +75,7 @@ class EventViewSet(viewsets.ModelViewSet):
         if user.is_authenticated:
             full_name = get_user_fullname(user)
             serializer.save(created_by=full_name, created_date=timezone.now())
+            self.invalidate_response_cache()
         else:
             raise PermissionDenied(
                 detail="You do not have permission to perform this action."
@@ -65,6 +88,7 @@ class EventViewSet(viewsets.ModelViewSet):
         if user.is_authenticated:
             full_name = get_user_fullname(user)
             serializer.save(updated_by=full_name, updated_date=timezone.now())
+            self.invalidate_response_cache()
         else:
             raise PermissionDenied(
                 detail="You do not have permission to perform this action."
@@ -85,6 +109,7 @@ class EventViewSet(viewsets.ModelViewSet):
             instance.deleted_date = timezone.now()
             instance.is_active = False
             instance.save()
+        self.invalidate_response_cache()
 
     @swagger_auto_schema(
         operation_description="List all active events.",
@@ -182,17 +207,20 @@ class EventViewSet(viewsets.ModelViewSet):
     )
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
-        if serializer.is_valid():
+        try:
+            serializer.is_valid(raise_exception=True)
+            # La unicidad del nombre la garantiza la BD al guardar.
             self.perform_create(serializer)
+        except ValidationError as exc:
             return Response(
-                {"message": _("Event created successfully"),
-                 "data": serializer.data},
-                status=status.HTTP_201_CREATED,
+                {"message": _("Event could not be created"),
+                 "error": exc.detail},
+                status=status.HTTP_400_BAD_REQUEST,
             )
         return Response(
-            {"message": _("Event could not be created"),
-             "error": serializer.errors},
-            status=status.HTTP_400_BAD_REQUEST,
+            {"message": _("Event created successfully"),
+             "data": serializer.data},
+            status=status.HTTP_201_CREATED,
         )
 
     @swagger_auto_schema(
@@ -242,17 +270,20 @@ class EventViewSet(viewsets.ModelViewSet):
         instance = self.get_object()
         serializer = self.get_serializer(
             instance, data=request.data, partial=partial)
-        if serializer.is_valid():
+        try:
+            serializer.is_valid(raise_exception=True)
+            # La unicidad del nombre la garantiza la BD al guardar.
             self.perform_update(serializer)
+        except ValidationError as exc:
             return Response(
-                {"message": _("Event updated successfully"),
-                 "data": serializer.data},
-                status=status.HTTP_200_OK,
+                {"message": _("Event could not be updated"),
+                 "error": exc.detail},
+                status=status.HTTP_400_BAD_REQUEST,
             )
         return Response(
-            {"message": _("Event could not be updated"),
-             "error": serializer.errors},
-            status=status.HTTP_400_BAD_REQUEST,
+            {"message": _("Event updated successfully"),
+             "data": serializer.data},
+            status=status.HTTP_200_OK,
         )
 
     @swagger_auto_schema(
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class ManagerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'modules.manager'
+
+    def ready(self):
+        from modules.common.counts import track_counts
+        from modules.manager.models.user import User
+
+        # Totales cacheados en la paginación por número de página
+        track_counts(User)
@@ -48,6 +48,10 @@ class User(AbstractUser, AuditableMixins):
         },
     )
 
+    # Se incrementa para invalidar de golpe todas las sesiones del usuario;
+    # viaja en el claim "gen" de los access tokens.
+    session_generation = models.PositiveIntegerField(default=0)
+
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["first_name", "last_name"]
 
@@ -57,6 +61,10 @@ class User(AbstractUser, AuditableMixins):
         verbose_name = _("User")
         verbose_name_plural = _("Users")
         ordering = ["first_name"]
+        indexes = [
+            # Orden de la paginación por keyset
+            models.Index(fields=["first_name", "id"]),
+        ]
 
     def __str__(self):
         return f"{self.get_full_name()} <{self.email}>"
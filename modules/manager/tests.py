@@ -1,3 +1,70 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APITestCase
 
-# Create your tests here.
+from modules.manager.models import User
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class UserViewSetQueryCountTests(APITestCase):
+    """
+    Regresión de consultas por acción: ninguna debe crecer con el número de
+    usuarios.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            email="admin@example.com", password="x", first_name="Admin",
+            is_staff=True)
+        for i in range(15):
+            User.objects.create_user(
+                email=f"user{i}@example.com", password="x", first_name=f"User {i}")
+        cls.member = User.objects.get(email="user0@example.com")
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.admin)
+
+    def test_list(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get("/api/users/").status_code, 200)
+
+    def test_list_page_number(self):
+        with self.assertNumQueries(2):
+            self.client.get("/api/users/?page=1")
+
+    def test_retrieve(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(f"/api/users/{self.member.id}/")
+        self.assertEqual(response.status_code, 200)
+
+    def test_create(self):
+        with self.assertNumQueries(1):
+            response = self.client.post("/api/users/", {
+                "username": "nuevo",
+                "email": "nuevo@example.com",
+                "first_name": "Nuevo",
+                "last_name": "Usuario",
+                "password": "una-clave-larga",
+            }, format="json")
+        self.assertEqual(response.status_code, 201)
+
+    def test_update(self):
+        with self.assertNumQueries(2):
+            response = self.client.put(
+                f"/api/users/{self.member.id}/",
+                {"first_name": "Otro", "last_name": "Nombre"}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+    def test_partial_update(self):
+        with self.assertNumQueries(2):
+            response = self.client.patch(
+                f"/api/users/{self.member.id}/", {"last_name": "Apellido"},
+                format="json")
+        self.assertEqual(response.status_code, 200)
+
+    def test_destroy(self):
+        with self.assertNumQueries(7):
+            response = self.client.delete(f"/api/users/{self.member.id}/")
+        self.assertIn(response.status_code, (200, 204))
@@ -15,6 +15,10 @@ from modules.manager.models.user import User
 
 # viewser base
 from modules.common.views import BaseModelViewSet
+from modules.common.pagination import KeysetPagination
+from modules.authentication.principals import invalidate_user
+from modules.authentication.sessions import end_all_sessions
+from modules.authentication.permissions import HasAPIKeyScope
 
 
 def get_user_fullname(user):
@@ -31,7 +35,10 @@ class UserViewSet(BaseModelViewSet):
 
     queryset = User.objects.filter(is_active=True)
     serializer_class = UserListSerializer
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, HasAPIKeyScope]
+    api_key_scope = "users"
+    pagination_class = KeysetPagination
+    keyset_ordering = ("first_name", "id")
     lookup_field = "id" 
 
     def get_serializer_class(self):
@@ -45,7 +52,7 @@ class UserViewSet(BaseModelViewSet):
 
     def get_permissions(self):
         if self.action in ["create", "update", "partial_update", "destroy"]:
-            self.permission_classes = [IsAdminUser]
+            self.permission_classes = [IsAdminUser, HasAPIKeyScope]
         return super().get_permissions()
     
     def perform_create(self, serializer):
@@ -64,7 +71,9 @@ class UserViewSet(BaseModelViewSet):
 
         if user.is_authenticated:
             full_name = get_user_fullname(user)
-            serializer.save(updated_by=full_name, updated_date=timezone.now())
+            instance = serializer.save(
+                updated_by=full_name, updated_date=timezone.now())
+            invalidate_user(instance)
         else:
             raise PermissionDenied("Usuario no autenticado")
 
@@ -83,6 +92,8 @@ class UserViewSet(BaseModelViewSet):
             instance.deleted_date = timezone.now()
             instance.is_active = False
             instance.save()
+        # Desactivar al usuario invalida todas sus sesiones
+        end_all_sessions(instance)
 
 
     @swagger_auto_schema(
@@ -295,8 +306,7 @@ class UserViewSet(BaseModelViewSet):
     def destroy(self, request, *args, **kwargs):
         try:
             instance = self.get_object()
-            instance.is_active = False
-            instance.save()
+            self.perform_destroy(instance)
             return Response(
                 {"message": "User deleted successfully"}, status=status.HTTP_200_OK
             )
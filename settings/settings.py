@@ -45,6 +45,7 @@ LOCAL_APPS = [
     'modules.common',
     'modules.authentication',
     'modules.manager',
+    'modules.events',
 
 ]
 
@@ -64,6 +65,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'modules.common.middleware.QueryBudgetMiddleware',
 ]
 
 ROOT_URLCONF = 'settings.urls'
@@ -141,18 +143,146 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AUTH_USER_MODEL = "manager.user"
 
 AUTHENTICATION_BACKENDS = [
-    'common.backends.EmailAdminAuthBackend',  # Para login con email en el admin
-    'django.contrib.auth.backends.ModelBackend',  # El backend por defecto
+    'common.backends.EmailAuthBackend',  # Login con email (API y admin)
 ]
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "modules.authentication.authentication.JWTAuthentication",
+        "modules.authentication.authentication.APIKeyAuthentication",
     ),
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend",
         "rest_framework.filters.OrderingFilter",
     ],
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    "DEFAULT_PAGINATION_CLASS": "modules.common.pagination.CachedCountPagination",
     "PAGE_SIZE": 10,  # Número de resultados por página
-}
\ No newline at end of file
+    # Token buckets de modules.authentication.throttling
+    "DEFAULT_THROTTLE_RATES": {
+        "login_ip": "20/min",
+        "login_email": "5/min",
+        "refresh_ip": "60/min",
+        "refresh_token": "5/min",
+        "forgot_password_ip": "10/hour",
+        "forgot_password_email": "3/hour",
+    },
+}
+
+# Caché
+# LocMem sirve para desarrollo y tests; en producción los contadores de
+# throttling, versiones de revocación, etc. deben vivir en una caché
+# compartida entre procesos (Redis, Memcached...).
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+# Tokens de autenticación
+# Mientras queden filas sin digest, las búsquedas por token se reintentan
+# contra las columnas en claro. Desactivar tras ejecutar backfill_token_digests.
+TOKEN_DIGEST_DUAL_READ = True
+
+# Segundos entre barridos de tokens caducados dentro del proceso web.
+# None lo desactiva (usar el comando sweep_expired_tokens desde cron).
+TOKEN_SWEEPER_INTERVAL = None
+
+# Correo
+# URL del frontend usada en los enlaces de verificación y restablecimiento.
+FRONTEND_URL = 'http://localhost:3000'
+# Hilos que envían el outbox dentro del proceso web. 0 lo desactiva
+# (usar el comando run_mailer como proceso aparte).
+EMAIL_OUTBOX_WORKERS = 0
+
+# Hashing de contraseñas
+# Con ASYNC_AUTH_VIEWS (solo bajo ASGI) login, registro y reset de contraseña
+# calculan los hashes en un pool acotado y responden 503 si su cola se llena.
+ASYNC_AUTH_VIEWS = False
+HASHING_POOL_WORKERS = 4
+HASHING_POOL_QUEUE = 32
+
+# Sesiones abiertas a la vez por usuario (una por dispositivo).
+MAX_SESSIONS_PER_USER = 5
+# Segundos entre actualizaciones de last_seen_at de una misma sesión.
+SESSION_TOUCH_INTERVAL = 300
+
+# Firma de access tokens
+# Anillo de claves asimétricas (EdDSA/RS256). La primera firma; las demás solo
+# verifican tokens emitidos antes de rotar. Ejemplo:
+#   JWT_SIGNING_KEYS = [
+#       {"kid": "2026-10", "algorithm": "EdDSA",
+#        "private_key_path": "/run/secrets/jwt-2026-10.pem"},
+#       {"kid": "2026-04", "algorithm": "EdDSA",
+#        "public_key_path": "/run/secrets/jwt-2026-04.pub.pem"},
+#   ]
+# Vacío = HS256 con SECRET_KEY. Las claves públicas se publican en
+# /api/auth/jwks.json.
+JWT_SIGNING_KEYS = []
+# Aceptar tokens HS256 sin "kid" durante la transición a claves asimétricas.
+JWT_ACCEPT_LEGACY_HS256 = True
+JWKS_MAX_AGE = 300
+
+# API keys para integraciones de servicio ("Authorization: Api-Key <clave>").
+# Las claves resueltas se cachean por proceso; revocar tarda como mucho
+# API_KEY_CACHE_TTL segundos en aplicarse.
+API_KEY_CACHE_TTL = 60
+
+# Introspección de tokens (/api/auth/introspect/): tope de Cache-Control en
+# segundos y tamaño máximo de lote.
+INTROSPECTION_MAX_AGE = 60
+INTROSPECTION_MAX_BATCH = 100
+
+# Tamaño máximo de página que puede pedir un cliente con ?page_size=
+MAX_PAGE_SIZE = 100
+
+# Totales de la paginación por número de página: segundos en caché y filas a
+# partir de las que se usa la estimación del planificador (solo PostgreSQL).
+COUNT_CACHE_TTL = 30
+COUNT_ESTIMATE_THRESHOLD = 100_000
+
+# Presupuesto de consultas por endpoint (modules.common.middleware). Activo
+# solo en desarrollo: avisa de N+1 y de endpoints por encima de su
+# presupuesto ("log") o lanza una excepción ("raise").
+QUERY_BUDGET_ENABLED = DEBUG
+QUERY_BUDGET_ACTION = "log"
+QUERY_BUDGET_DEFAULT = 10
+QUERY_BUDGET_REPEAT_THRESHOLD = 5
+QUERY_BUDGETS = {
+    # Incluyen la consulta del usuario autenticado.
+    "GET events-list": 3,
+    "GET events-detail": 2,
+    "GET categories-list": 3,
+    "GET categories-detail": 2,
+    "GET users-list": 3,
+    "GET users-detail": 2,
+    "auth-login": 8,
+    "auth-refresh": 6,
+    "auth-forgot-password": 8,
+}
+
+# Búsqueda de texto completo de eventos (?q=, modules.events.search):
+# configuración de texto de PostgreSQL y máximo de palabras por búsqueda.
+SEARCH_CONFIG = "spanish"
+MAX_SEARCH_TERMS = 16
+
+# Autocompletado por prefijo (modules.common.autocomplete): resultados por
+# defecto y máximos, vida de cada cambio en el diario compartido y cambios
+# que un worker reaplica antes de reconstruir su índice.
+AUTOCOMPLETE_LIMIT = 10
+AUTOCOMPLETE_MAX_LIMIT = 50
+AUTOCOMPLETE_JOURNAL_TTL = 3600
+AUTOCOMPLETE_MAX_REPLAY = 1000
+
+# Caché de respuestas de list/retrieve (modules.common.views.ResponseCacheMixin):
+# segundos por defecto y por vista (0 la desactiva), vida del candado del
+# recalculo único y espera máxima del resto de peticiones.
+RESPONSE_CACHE_ENABLED = True
+RESPONSE_CACHE_TTL = 60
+RESPONSE_CACHE_TTLS = {
+    "events-list": 30,
+    "events-detail": 60,
+    "categories-list": 300,
+    "categories-detail": 300,
+}
+RESPONSE_CACHE_LOCK_TIMEOUT = 10
+RESPONSE_CACHE_WAIT = 2